@@ -1,44 +1,16 @@
 import os
 import glob
 import logging
-import shutil
 import yaml
 import duckdb
-import pyarrow.parquet as pq
 
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.imports.common_utils import LocalS3WithDirectory, partition_commit, write_parquet
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def list_partitions_in_dir(base_dir, partition_column="file_version_date"):
-    """
-    Return a sorted list of partition values found in `base_dir` as subdirectories like:
-      file_version_date=YYYYMMDD
-    """
-    if not os.path.exists(base_dir):
-        return []
-    partitions = []
-    for entry in os.listdir(base_dir):
-        # Expect subdirs named like "file_version_date=20250101"
-        if entry.startswith(f"{partition_column}="):
-            val = entry.split("=")[1]
-            partitions.append(val)
-    return sorted(partitions)
-
-
-def remove_partition_dir(base_dir, partition_val, partition_column="file_version_date"):
-    """
-    Remove an existing partition directory if it exists, e.g.:
-      /base_dir/file_version_date=YYYYMMDD
-    """
-    part_dir = os.path.join(base_dir, f"{partition_column}={partition_val}")
-    if os.path.exists(part_dir):
-        shutil.rmtree(part_dir)
-        logging.info(f"Removed existing partition directory: {part_dir}")
-
-
 def transform_partition_parquet(
+        catalog,
         source_path,
         target_path,
         partition_val,
@@ -50,7 +22,8 @@ def transform_partition_parquet(
     1) Read a single partition (partition_val) from `source_path`.
     2) Load it into DuckDB as 'input_data'.
     3) Run the query_select to produce a result.
-    4) Write the result to `target_path` as a partitioned Parquet.
+    4) Commit the result to `target_path` as a partition (temp dir + atomic rename).
+    5) Record the new partition in the catalog.
     """
 
     # Partition directory for reading
@@ -73,16 +46,15 @@ def transform_partition_parquet(
     #arrow_table = conn.execute(query_select).arrow()
     arrow_table = conn.execute(f"{query_select} from read_parquet('{stg_path}', hive_partitioning = True)").arrow()
 
-    # Write the result to the target partition path
+    # Write the result to the target partition path (atomically replaces any previous version)
     target_partition_dir = os.path.join(target_path, f"{partition_column}={partition_val}")
-    os.makedirs(target_partition_dir, exist_ok=True)
+    with partition_commit(target_path, partition_val, partition_column, catalog=catalog) as tmp_dir:
+        write_parquet(
+            table=arrow_table,
+            where=os.path.join(tmp_dir, f"brz_{file_name}.parquet"),
+            profile="stage_balanced"
+        )
     out_file = os.path.join(target_partition_dir, f"brz_{file_name}.parquet")
-
-    pq.write_table(
-        table=arrow_table,
-        where=out_file,
-        compression="snappy"
-    )
     logging.info(f"Wrote transformed data to {out_file}")
 
     # Cleanup
@@ -136,9 +108,9 @@ def main(rerun_partitions):
         logging.info(f"Stage path: {stage_path}")
         logging.info(f"Bronze path: {bronze_path}")
 
-        # List partitions in source (stage) and target (bronze)
-        source_partitions = list_partitions_in_dir(stage_path, partition_column)
-        target_partitions = list_partitions_in_dir(bronze_path, partition_column)
+        # List partitions in source (stage) and target (bronze) from the catalog
+        source_partitions = storage.catalog.list_partitions(stage_path, partition_column)
+        target_partitions = storage.catalog.list_partitions(bronze_path, partition_column)
 
         logging.info(f"Found {len(source_partitions)-len(target_partitions)} partitions in stage for {dataset_name} to be processed...")
 
@@ -148,12 +120,13 @@ def main(rerun_partitions):
             already_in_target = (pval in target_partitions)
 
             # Decide if we should process this partition
+            # (a re-run replaces the old target partition atomically on commit)
             if do_rerun:
-                logging.info(f"Re-run requested for partition={pval}. Removing old data in target.")
-                remove_partition_dir(bronze_path, pval, partition_column)
+                logging.info(f"Re-run requested for partition={pval}. Old data in target will be replaced.")
 
             if (not already_in_target) or do_rerun:
                 transform_partition_parquet(
+                    catalog=storage.catalog,
                     source_path=stage_path,
                     target_path=bronze_path,
                     partition_val=pval,
@@ -1,13 +1,11 @@
 import os
 import glob
 import logging
-import shutil
 import duckdb
 import pyarrow as pa
-import pyarrow.parquet as pq
 import pandas as pd
 
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.imports.common_utils import LocalS3WithDirectory, partition_commit, write_parquet
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -48,19 +46,12 @@ def parse_partition_from_filename(filepath):
     else:
         return None
 
-def get_existing_partitions(stage_dir, partition_column="file_version_date"):
+def get_existing_partitions(catalog, stage_dir, partition_column="file_version_date"):
     """
-    Return a set of existing partition values from the stage directory
-    by looking for subfolders like file_version_date=YYYYMMDD.
+    Return a set of existing partition values of the stage directory
+    (file_version_date=YYYYMMDD subfolders) as recorded in the partition catalog.
     """
-    if not os.path.exists(stage_dir):
-        return set()
-    partition_values = set()
-    for name in os.listdir(stage_dir):
-        if name.startswith(f"{partition_column}="):
-            val = name.split("=")[1]
-            partition_values.add(val)
-    return partition_values
+    return set(catalog.list_partitions(stage_dir, partition_column))
 
 def duckdb_read_csv_as_strings(csv_file, has_header=True):
     """
@@ -137,7 +128,8 @@ def add_partition_column(table, partition_val, partition_column="file_version_da
     arr = pa.array([partition_val] * num_rows, type=pa.string())
     return table.append_column(partition_column, arr)
 
-def process_csv_files(raw_dir,
+def process_csv_files(catalog,
+                      raw_dir,
                       stage_dir,
                       column_mapping,
                       partition_column="file_version_date",
@@ -150,9 +142,9 @@ def process_csv_files(raw_dir,
     - Read with duckdb_read_csv_as_strings
     - Rename columns (optional)
     - Add partition column
-    - Write as partitioned Parquet
+    - Write as partitioned Parquet and record it in the catalog
     """
-    existing_parts = get_existing_partitions(stage_dir, partition_column)
+    existing_parts = get_existing_partitions(catalog, stage_dir, partition_column)
     logging.info(f"Existing partitions in stage: {len(existing_parts)}")
 
     csv_files = list_csv_files_in_partition(raw_dir)
@@ -180,20 +172,13 @@ def process_csv_files(raw_dir,
         # 3) Add partition column
         arrow_table = add_partition_column(arrow_table, partition_val, partition_column)
 
-        partition_dir = os.path.join(stage_dir, rf"{partition_column}={partition_val}")
-        if os.path.exists(partition_dir):
-            shutil.rmtree(partition_dir)
-            logging.info(f"Removed existing partition dir: {partition_dir}")
-        else:
-            os.makedirs(partition_dir, exist_ok=True)
-        out_file = os.path.join(stage_dir, rf"{partition_column}={partition_val}", f"{filename}.parquet")
-
-        # 4) Write partitioned Parquet
-        pq.write_table(
-            arrow_table,
-            out_file,
-            compression="snappy"
-        )
+        # 4) Commit partitioned Parquet (temp dir + atomic rename, replaces any previous version)
+        with partition_commit(stage_dir, partition_val, partition_column, catalog=catalog) as tmp_dir:
+            write_parquet(
+                arrow_table,
+                os.path.join(tmp_dir, f"{filename}.parquet"),
+                profile="stage_balanced"
+            )
         logging.info(f"Wrote Parquet data to {stage_dir} for {partition_val}")
 
 def main():
@@ -218,6 +203,7 @@ def main():
     rerun_dates = None  # or e.g. {"20250101"}
     logging.info("Processing fundamentals data.")
     process_csv_files(
+        catalog=storage.catalog,
         raw_dir=fd_raw_path,
         stage_dir=fd_stage_path,
         column_mapping=fd_mapping,
@@ -241,6 +227,7 @@ def main():
 
     logging.info("Processing ratings data.")
     process_csv_files(
+        catalog=storage.catalog,
         raw_dir=rd_raw_path,
         stage_dir=rd_stage_path,
         column_mapping=rd_mapping,
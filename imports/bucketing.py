@@ -0,0 +1,269 @@
+import os
+import re
+import zlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from tradeovant.imports.clustering import cluster_sort_indices, cluster_write_options
+from tradeovant.imports.io_stats import IO_STATS
+from tradeovant.imports.storage_paths import dataset_setting, partition_files, storage_location
+from tradeovant.imports.writer_profiles import ProfiledParquetWriter, write_parquet, writer_options
+
+
+# ------------------------------------------------------------------------------
+# SYMBOL BUCKETING
+# ------------------------------------------------------------------------------
+BUCKET_FILE_PATTERN = re.compile(r"-bucket-(\d{4})\.parquet$")
+BUCKET_ROW_GROUP_SIZE = 500_000  # Row group size of BucketedParquetWriter without a profile
+
+
+def bucketing_for(dataset_path):
+    """
+    (column, num_buckets) of dataset_path from LocalS3WithDirectory.BUCKETED_DATASETS,
+    or None when the dataset is not bucketed.
+    """
+    return dataset_setting("BUCKETED_DATASETS", dataset_path)
+
+
+def bucket_for_symbol(symbol, num_buckets):
+    """
+    Hash bucket of one symbol (crc32 of its string form). Nulls go to bucket 0.
+    """
+    if symbol is None:
+        return 0
+    return zlib.crc32(str(symbol).encode("utf-8")) % num_buckets
+
+
+def symbol_buckets(values, num_buckets):
+    """
+    Hash bucket of every value of an Arrow array or chunked array, as an int32 numpy
+    array. Each distinct symbol is hashed once, through the dictionary encoding.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks() if values.num_chunks else pa.array([], values.type)
+    encoded = pc.dictionary_encode(values)
+    # The extra last slot is the bucket of nulls
+    lookup = np.array([bucket_for_symbol(v, num_buckets) for v in encoded.dictionary.to_pylist()] + [0], dtype=np.int32)
+    return lookup[pc.fill_null(encoded.indices, len(lookup) - 1).to_numpy(zero_copy_only=False)]
+
+
+def bucket_file_name(file_prefix, bucket):
+    return f"{file_prefix}-bucket-{bucket:04d}.parquet"
+
+
+def write_bucketed(table, out_dir, file_prefix, column, num_buckets, clustering=None, **write_kwargs):
+    """
+    Write table as num_buckets parquet files named '<file_prefix>-bucket-NNNN.parquet',
+    one per hash bucket of column, each sorted by column (or by the clustering's sort
+    columns, see write_clustered). Every bucket gets a file, empty or not, so
+    per-bucket globs always match. The files sit directly in out_dir, so readers
+    globbing '*/*.parquet' still see the whole partition.
+
+    Parameters:
+        table (pa.Table): Data to write.
+        out_dir (str): Directory to write into, usually a partition_commit temp dir.
+        file_prefix (str): File name prefix, e.g. 'optiontrades'.
+        column (str): Symbol column to hash.
+        num_buckets (int): Number of buckets.
+        clustering (tuple): (sort columns, bloom filter columns) from clustering_for, or None.
+        **write_kwargs: Passed to write_parquet (compression, row_group_size, ...).
+
+    Returns:
+        list: Paths written, in bucket order.
+    """
+    buckets = symbol_buckets(table.column(column), num_buckets)
+    order = cluster_sort_indices(table, clustering[0] if clustering else [column], leading=buckets)
+    table = table.take(order)
+    bounds = np.searchsorted(buckets[order.to_numpy()], np.arange(num_buckets + 1))
+
+    paths = []
+    for bucket in range(num_buckets):
+        path = os.path.join(out_dir, bucket_file_name(file_prefix, bucket))
+        part = table.slice(bounds[bucket], bounds[bucket + 1] - bounds[bucket])
+        options = cluster_write_options(clustering, part.schema, part) if clustering else {}
+        write_parquet(part, path, **dict(options, **write_kwargs))
+        paths.append(path)
+    return paths
+
+
+def group_bucket_files(paths):
+    """
+    {bucket: [path, ...]} of parquet file paths, or None when any of them has no bucket
+    suffix (a partition written before bucketing).
+    """
+    buckets = {}
+    for path in paths:
+        match = BUCKET_FILE_PATTERN.search(path)
+        if match is None:
+            return None
+        buckets.setdefault(int(match.group(1)), []).append(path)
+    return {bucket: sorted(files) for bucket, files in sorted(buckets.items())} or None
+
+
+def partition_buckets(partition_dir):
+    """
+    {bucket: [path, ...]} of a partition directory, or None when it is not bucketed.
+    """
+    if not os.path.isdir(partition_dir):
+        return None
+    return group_bucket_files(partition_files(partition_dir))
+
+
+def bucket_files(dataset_path, symbols, partition_values=None, partition_column="file_version_date"):
+    """
+    Parquet files of a bucketed dataset that can hold any of symbols. Partitions
+    written before bucketing contribute all their files.
+
+    Parameters:
+        dataset_path (str): Dataset root directory.
+        symbols (str or list): Symbol(s) of the bucketing column.
+        partition_values (list): Partitions to look in. Default is every partition on disk.
+        partition_column (str): Hive partition column name.
+    """
+    bucketing = bucketing_for(dataset_path)
+    if bucketing is None:
+        raise ValueError(f"{dataset_path} is not in LocalS3WithDirectory.BUCKETED_DATASETS")
+    symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+    wanted = {bucket_for_symbol(symbol, bucketing[1]) for symbol in symbols}
+
+    if partition_values is None:
+        prefix = f"{partition_column}="
+        partition_values = sorted(entry.name[len(prefix):] for entry in os.scandir(dataset_path)
+                                  if entry.is_dir() and entry.name.startswith(prefix))
+    paths = []
+    for partition_value in partition_values:
+        partition_dir = os.path.join(dataset_path, f"{partition_column}={partition_value}")
+        buckets = partition_buckets(partition_dir)
+        if buckets is None:
+            paths.extend(partition_files(partition_dir) if os.path.isdir(partition_dir) else [])
+        else:
+            paths.extend(path for bucket in sorted(wanted) for path in buckets.get(bucket, []))
+    return paths
+
+
+def bucketed_read_parquet_sql(dataset_path, symbols, partition_values=None, partition_column="file_version_date"):
+    """
+    DuckDB table expression over only the bucket files that can hold symbols. The
+    symbol filter still has to be repeated in the WHERE clause.
+    """
+    paths = bucket_files(dataset_path, symbols, partition_values, partition_column)
+    if not paths:
+        return "(SELECT NULL WHERE FALSE)"
+    file_list = ", ".join("'" + path.replace(os.sep, "/") + "'" for path in paths)
+    return f"read_parquet([{file_list}], hive_partitioning = TRUE)"
+
+
+def bucket_glob(dataset_path, bucket, partition_value="*", partition_column="file_version_date"):
+    """
+    Glob of one bucket's files, e.g. '.../file_version_date=*/*-bucket-0007.parquet',
+    for SQL templates that read a dataset with read_parquet('<glob>').
+    """
+    return os.path.join(dataset_path, f"{partition_column}={partition_value}", f"*-bucket-{bucket:04d}.parquet")
+
+
+def run_per_bucket(func, num_buckets, max_workers=None):
+    """
+    Run func(bucket) for every bucket in a thread pool and return {bucket: result}.
+    For bucket-local work (joins and windows keyed by the bucketing column) whose
+    engine releases the GIL, such as one DuckDB connection per bucket.
+    """
+    max_workers = max_workers or min(num_buckets, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(func, bucket): bucket for bucket in range(num_buckets)}
+        return {futures[future]: future.result() for future in as_completed(futures)}
+
+
+class BucketedParquetWriter:
+    """
+    Streaming counterpart of write_bucketed: record batches are split by symbol
+    bucket into per-bucket buffers, and a bucket is written out as a row group once it
+    holds row_group_size rows. When all buffers together pass max_buffer_bytes, the
+    largest one is flushed early, so memory stays bounded whatever the input size.
+    On close, buckets that got no rows still get an empty file. With clustering, every
+    flushed row group is sorted on the clustering keys before it is written (see
+    ClusteredParquetWriter), so clustering costs no second pass over the files.
+
+    Usage:
+        with BucketedParquetWriter(tmp_dir, "optiontrades", "underlying_symbol", 16, schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+    """
+
+    def __init__(self, out_dir, file_prefix, column, num_buckets, schema, row_group_size=None,
+                 max_buffer_bytes=512 << 20, profile=None, clustering=None, **write_kwargs):
+        self.out_dir = out_dir
+        self.file_prefix = file_prefix
+        self.column = column
+        self.num_buckets = num_buckets
+        self.schema = schema
+        profile_row_group_size = writer_options(profile, schema)["row_group_size"] if profile is not None else None
+        self.row_group_size = row_group_size or profile_row_group_size or BUCKET_ROW_GROUP_SIZE
+        self.max_buffer_bytes = max_buffer_bytes
+        self.profile = profile
+        self.clustering = clustering
+        self.write_kwargs = write_kwargs
+        self.buffers = {bucket: [] for bucket in range(num_buckets)}
+        self.buffer_rows = dict.fromkeys(range(num_buckets), 0)
+        self.buffer_bytes = dict.fromkeys(range(num_buckets), 0)
+        self.writers = {}
+        self.started = time.perf_counter()
+
+    def path(self, bucket):
+        return os.path.join(self.out_dir, bucket_file_name(self.file_prefix, bucket))
+
+    def write_batch(self, batch):
+        buckets = symbol_buckets(batch.column(self.column), self.num_buckets)
+        order = np.argsort(buckets, kind="stable")
+        batch = batch.take(pa.array(order))
+        bounds = np.searchsorted(buckets[order], np.arange(self.num_buckets + 1))
+        for bucket in range(self.num_buckets):
+            if bounds[bucket + 1] > bounds[bucket]:
+                part = batch.slice(bounds[bucket], bounds[bucket + 1] - bounds[bucket])
+                self.buffers[bucket].append(part)
+                self.buffer_rows[bucket] += part.num_rows
+                self.buffer_bytes[bucket] += part.nbytes
+                if self.buffer_rows[bucket] >= self.row_group_size:
+                    self._flush(bucket)
+        while sum(self.buffer_bytes.values()) > self.max_buffer_bytes:
+            self._flush(max(self.buffer_bytes, key=self.buffer_bytes.get))
+
+    def _open(self, bucket, table=None):
+        options = self.write_kwargs
+        if self.clustering is not None:
+            options = dict(cluster_write_options(self.clustering, self.schema, table), **options)
+        self.writers[bucket] = ProfiledParquetWriter(self.path(bucket), self.schema, self.profile, **options)
+
+    def _flush(self, bucket):
+        if not self.buffers[bucket]:
+            return
+        table = pa.Table.from_batches(self.buffers[bucket], schema=self.schema)
+        if self.clustering is not None:
+            table = table.take(cluster_sort_indices(table, self.clustering[0]))
+        if bucket not in self.writers:
+            self._open(bucket, table)
+        self.writers[bucket].write_table(table, row_group_size=self.row_group_size)
+        self.buffers[bucket] = []
+        self.buffer_rows[bucket] = self.buffer_bytes[bucket] = 0
+
+    def close(self):
+        for bucket in range(self.num_buckets):
+            self._flush(bucket)
+            if bucket not in self.writers:
+                self._open(bucket)
+            self.writers[bucket].close()
+        bucket_name, bucket_key = storage_location(self.out_dir)
+        IO_STATS.record("write_parquet", bucket_name, bucket_key, time.perf_counter() - self.started,
+                        files=self.num_buckets,
+                        bytes_written=sum(os.path.getsize(self.path(bucket)) for bucket in range(self.num_buckets)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for writer in self.writers.values():
+                writer.close()
@@ -0,0 +1,158 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.compute as pc
+from tradeovant.imports.storage_paths import dataset_setting
+from tradeovant.imports.writer_profiles import ProfiledParquetWriter, write_parquet, writer_options
+
+
+# ------------------------------------------------------------------------------
+# CLUSTERED LAYOUT
+# ------------------------------------------------------------------------------
+CLUSTER_BLOOM_FPP = 0.05  # False-positive rate of the bloom filters written on cluster keys
+CLUSTER_ROW_GROUP_SIZE = 500_000  # Row group size of ClusteredParquetWriter without a profile
+
+
+def clustering_for(dataset_path):
+    """
+    (sort columns, bloom filter columns) of dataset_path from
+    LocalS3WithDirectory.CLUSTERED_DATASETS, or None when the dataset is not clustered.
+    """
+    return dataset_setting("CLUSTERED_DATASETS", dataset_path)
+
+
+def decoded(column):
+    """Column with dictionary encoding undone (sorting and count_distinct do not take dictionaries)."""
+    return column.cast(column.type.value_type) if pa.types.is_dictionary(column.type) else column
+
+
+def cluster_sort_indices(table, sort_by, leading=None):
+    """
+    Indices that sort table ascending by the sort_by columns it has (nulls last),
+    after the `leading` array when given (e.g. symbol buckets). Dictionary columns
+    are sorted on their decoded values.
+    """
+    keys = {}
+    if leading is not None:
+        keys["__leading"] = leading
+    for name in sort_by:
+        if name in table.column_names:
+            keys[name] = decoded(table.column(name))
+    if not keys:
+        return pa.array(np.arange(table.num_rows))
+    return pc.sort_indices(pa.table(keys), sort_keys=[(name, "ascending") for name in keys])
+
+
+def cluster_write_options(clustering, schema, table=None):
+    """
+    Write options of a clustered file: the sort order recorded as sorting_columns
+    (up to the first sort column missing from schema), page indexes, and bloom
+    filters on the bloom filter columns. Each bloom filter is sized on the distinct
+    values of table when given, else on the pyarrow default.
+
+    Returns:
+        dict: sorting_columns, bloom_filter_options and write_page_index.
+    """
+    sort_by, bloom_columns = clustering
+    sorting_columns = []
+    for name in sort_by:
+        index = schema.get_field_index(name)
+        if index < 0:
+            break
+        sorting_columns.append(pq.SortingColumn(index))
+    bloom_filter_options = {}
+    for name in bloom_columns:
+        if schema.get_field_index(name) < 0:
+            continue
+        options = {"fpp": CLUSTER_BLOOM_FPP}
+        if table is not None:
+            options["ndv"] = max(pc.count_distinct(decoded(table.column(name))).as_py(), 1)
+        bloom_filter_options[name] = options
+    return {"sorting_columns": sorting_columns or None,
+            "bloom_filter_options": bloom_filter_options or None,
+            "write_page_index": True}
+
+
+def write_clustered(table, where, clustering=None, **write_kwargs):
+    """
+    write_parquet of table sorted by the clustering's sort columns, with page indexes
+    and bloom filters on its keys, so row group and page statistics cover narrow key
+    ranges and DuckDB can skip most of a file on a symbol or chain filter.
+    Without clustering this is a plain write_parquet.
+
+    Parameters:
+        table (pa.Table): Data to write.
+        where (str): Target file path.
+        clustering (tuple): (sort columns, bloom filter columns) from clustering_for, or None.
+        **write_kwargs: Passed to write_parquet (profile, row_group_size, ...).
+    """
+    if clustering is not None:
+        table = table.take(cluster_sort_indices(table, clustering[0]))
+        write_kwargs = dict(cluster_write_options(clustering, table.schema, table), **write_kwargs)
+    write_parquet(table, where, **write_kwargs)
+
+
+class ClusteredParquetWriter:
+    """
+    Streaming counterpart of write_clustered: batches are buffered up to one row
+    group, which is sorted on the clustering's sort columns before it is written, so
+    memory holds one row group whatever the file size. Every row group is sorted
+    (page statistics and page indexes cover narrow key ranges), not the file as a
+    whole. Bloom filters are per row group in Parquet, so they are sized on the
+    distinct keys of the first row group.
+
+    Usage:
+        with ClusteredParquetWriter(path, schema, clustering, profile="raw_fast") as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+    """
+
+    def __init__(self, where, schema, clustering, profile=None, row_group_size=None, **write_kwargs):
+        self.where = where
+        self.schema = schema
+        self.clustering = clustering
+        self.profile = profile
+        profile_row_group_size = writer_options(profile, schema)["row_group_size"] if profile is not None else None
+        self.row_group_size = row_group_size or profile_row_group_size or CLUSTER_ROW_GROUP_SIZE
+        self.write_kwargs = write_kwargs
+        self.buffer = []
+        self.buffer_rows = 0
+        self.writer = None
+
+    def write_batch(self, batch):
+        self.buffer.append(batch)
+        self.buffer_rows += batch.num_rows
+        while self.buffer_rows >= self.row_group_size:
+            table = pa.Table.from_batches(self.buffer, schema=self.schema)
+            self._write_row_group(table.slice(0, self.row_group_size))
+            rest = table.slice(self.row_group_size)
+            self.buffer = rest.to_batches()
+            self.buffer_rows = rest.num_rows
+
+    def _open(self, table=None):
+        options = dict(cluster_write_options(self.clustering, self.schema, table), **self.write_kwargs)
+        self.writer = ProfiledParquetWriter(self.where, self.schema, self.profile, **options)
+
+    def _write_row_group(self, table):
+        table = table.take(cluster_sort_indices(table, self.clustering[0]))
+        if self.writer is None:
+            self._open(table)
+        self.writer.write_table(table, row_group_size=self.row_group_size)
+
+    def close(self):
+        if self.buffer_rows:
+            self._write_row_group(pa.Table.from_batches(self.buffer, schema=self.schema))
+        if self.writer is None:
+            self._open()  # No rows: an empty file
+        self.buffer = []
+        self.buffer_rows = 0
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self.writer is not None:
+            self.writer.close()
@@ -1,65 +1,181 @@
 import os
 import shutil
+import io
 import json
+import gzip
+import base64
+import fnmatch
 import zipfile
+import asyncio
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-import boto3
-from moto import mock_s3
+
+# Storage building blocks live in focused modules next to this one; they are re-exported
+# here so scripts keep importing everything from tradeovant.imports.common_utils.
+from tradeovant.imports.storage_paths import (
+    base_path, dataset_setting, fsync_dir, fsync_tree, partition_files, storage_location,
+)
+from tradeovant.imports.storage_backends import (
+    BACKEND_TYPES, LocalFileBackend, MotoBackend, S3Backend, get_backend, stop_backends,
+)
+from tradeovant.imports.io_stats import (
+    IOStatsRegistry, IO_STATS, LATENCY_BUCKETS_MS, dump_io_stats, io_timer, stats_prefix,
+)
+from tradeovant.imports.writer_profiles import ProfiledParquetWriter, WRITER_PROFILES, write_parquet, writer_options
+from tradeovant.imports.partition_catalog import (
+    PartitionCatalog, RENAMED_FROM_KEY, SCHEMA_VERSION_KEY, fold_schema, renamed_from, schema_fingerprint,
+    sqlite_transaction,
+)
+from tradeovant.imports.partition_commit import PartitionLock, partition_commit, staging_dir, swap_partition_dir
+from tradeovant.imports.compaction import (
+    COMPACT_ROW_GROUP_SIZE, COMPACT_TARGET_FILE_ROWS, compact_dataset, compact_partition, needs_compaction,
+)
+from tradeovant.imports.zip_index import ZipIndex, _run_extractions
+from tradeovant.imports.content_digests import DigestCache, FICLONE, copy_file, file_digest
+from tradeovant.imports.read_cache import ReadCache
+from tradeovant.imports.hot_cache import (
+    HOT_CACHE_NAME, hot_cache_enabled, hot_cache_path, read_latest_partition, refresh_hot_cache,
+)
+from tradeovant.imports.transaction_log import CommitConflictError, TransactionLogTable, parquet_file_stats
+from tradeovant.imports.dataset_index import BloomFilter, DatasetIndex, indexed_columns, json_stat
+from tradeovant.imports.retention import (
+    COLD_COMPRESSION, COLD_COMPRESSION_LEVEL, COLD_PROFILE, COLD_ROW_GROUP_SIZE, COLD_TARGET_FILE_ROWS,
+    apply_retention,
+)
+from tradeovant.imports.occ_symbols import OCC_TAIL_LENGTH, occ_fields, parse_occ_symbols
+from tradeovant.imports.clustering import (
+    CLUSTER_BLOOM_FPP, CLUSTER_ROW_GROUP_SIZE, ClusteredParquetWriter, cluster_sort_indices, cluster_write_options,
+    clustering_for, decoded, write_clustered,
+)
+from tradeovant.imports.bucketing import (
+    BUCKET_FILE_PATTERN, BUCKET_ROW_GROUP_SIZE, BucketedParquetWriter, bucket_file_name, bucket_files, bucket_for_symbol, bucket_glob,
+    bucketed_read_parquet_sql, bucketing_for, group_bucket_files, partition_buckets, run_per_bucket, symbol_buckets,
+    write_bucketed,
+)
+from tradeovant.imports.schema_drift import conform_dataset, conform_partition, project_to_schema
 
 
 class LocalS3WithDirectory:
     BASE_PATH = r"R:\local_bucket"  # Define base path within the class
     BUCKETS = ["raw_store", "stage_store", "temp_store", "bronze_store", "silver_store", "gold_store"]  # Define buckets
-    def __init__(self, region_name="us-east-1"):
+    BACKEND = os.environ.get("TRADEOVANT_STORAGE_BACKEND", "local")  # 'local', 'moto' or 's3'
+    S3_ENDPOINT_URL = os.environ.get("TRADEOVANT_S3_ENDPOINT_URL")  # e.g. 'http://localhost:9000' for MinIO
+    EXTRACT_WORKERS = min(8, os.cpu_count() or 1)  # Processes used by fetch_and_extract
+    CONTENT_ADDRESSED = False  # upload_file skips targets whose digest already matches
+    LINK_MODE = "copy"  # 'copy', 'hardlink' or 'reflink' for upload_file
+    READ_CACHE_DIR = os.environ.get("TRADEOVANT_READ_CACHE_DIR")  # Defaults to <BASE_PATH>/_read_cache
+    HOT_CACHE_DATASETS = [  # Datasets whose latest partition is kept as memory-mappable Arrow IPC
+        "bronze_store/finviz/fundamentals",
+        "raw_store/whales/optionscreener/parquet",
+    ]
+    INDEXED_DATASETS = {  # Dataset -> columns with bloom filters in its zone-map index
+        "raw_store/whales/optiontrades/parquet": ["underlying_symbol", "option_chain_id"],
+        "raw_store/whales/oichanges/parquet": ["underlying_symbol", "option_symbol"],
+        "raw_store/whales/optionscreener/parquet": ["ticker"],
+    }
+    BUCKETED_DATASETS = {  # Dataset -> (symbol column, number of hash buckets per date partition)
+        "raw_store/whales/optiontrades/parquet": ("underlying_symbol", 16),
+        "raw_store/whales/oichanges/parquet": ("underlying_symbol", 16),
+        "stage_store/whales/optiontrades": ("underlying_symbol", 16),
+        "stage_store/whales/optionchains": ("underlying_symbol", 16),
+    }
+    CLUSTERED_DATASETS = {  # Dataset -> (sort columns, columns with Parquet bloom filters), see write_clustered
+        "raw_store/whales/optiontrades/parquet": (["underlying_symbol", "option_chain_id", "executed_at"],
+                                                  ["underlying_symbol", "option_chain_id"]),
+        "stage_store/whales/optiontrades": (["underlying_symbol", "option_chain_id"],
+                                            ["underlying_symbol", "option_chain_id"]),
+    }
+    READ_CACHE_BYTES = int(os.environ.get("TRADEOVANT_READ_CACHE_BYTES", 20 << 30))  # LRU byte budget
+
+    def __init__(self, region_name="us-east-1", backend=None, endpoint_url=None):
         """
-        Initialize the local storage and mock S3 service.
+        Initialize the local storage. The object-store backend is not created here
+        but on first use, and is shared by every instance in the process.
 
         Parameters:
-            region_name (str): AWS region name for the mock S3 service.
+            region_name (str): AWS region name for the S3/moto backends.
+            backend (str): 'local' (default), 'moto' or 's3'. Defaults to BACKEND.
+            endpoint_url (str): S3-compatible endpoint for the 's3' backend. Defaults to S3_ENDPOINT_URL.
         """
         self.local_base_path = Path(self.BASE_PATH)
         self.region_name = region_name
-        self.mock = mock_s3()
-        self.mock.start()
-        self.s3 = boto3.client("s3", region_name=self.region_name)
-
-        # Automatically start and initialize buckets
-        self._initialize_buckets()
+        self.backend_name = backend or self.BACKEND
+        self.endpoint_url = endpoint_url or self.S3_ENDPOINT_URL
+        self._backend = None
+        self._catalog = None
+        self._zip_index = None
+        self._digests = None
+        self._read_cache = None
+
+    @property
+    def backend(self):
+        """
+        Storage backend, created (or fetched from the per-process cache) on first use.
+        """
+        if self._backend is None:
+            self._backend = get_backend(self.backend_name, self.local_base_path, self.BUCKETS, self.region_name,
+                                        self.endpoint_url)
+        return self._backend
 
     def stop(self):
         """
-        Stop the moto mock context explicitly.
+        Release this instance's handle on the backend. Shared backends are stopped
+        once at process exit (see stop_backends).
         """
-        self.mock.stop()
+        self._backend = None
 
-    def _initialize_buckets(self):
+    @property
+    def zip_index(self):
         """
-        Initialize the buckets and corresponding directories.
-        Ensures that buckets exist in both the mock S3 and local directory.
+        Persisted zip member index stored alongside the buckets, opened on first use.
         """
-        os.makedirs(self.local_base_path, exist_ok=True)  # Ensure the base path exists
+        if self._zip_index is None:
+            self._zip_index = ZipIndex(os.path.join(self.local_base_path, ZipIndex.DB_NAME))
+        return self._zip_index
 
-        # Get the list of existing buckets in the mock S3
-        existing_buckets = {bucket["Name"] for bucket in self.s3.list_buckets().get("Buckets", [])}
+    @property
+    def digests(self):
+        """
+        Content digest cache stored alongside the buckets, opened on first use.
+        """
+        if self._digests is None:
+            self._digests = DigestCache(os.path.join(self.local_base_path, DigestCache.DB_NAME))
+        return self._digests
 
-        for bucket_name in self.BUCKETS:
-            if bucket_name not in existing_buckets:
-                # Create the bucket in mock S3 only if it doesn't already exist
-                self.s3.create_bucket(Bucket=bucket_name)
+    @property
+    def read_cache(self):
+        """
+        Read-through disk cache for objects of remote backends, opened on first use.
+        """
+        if self._read_cache is None:
+            cache_dir = self.READ_CACHE_DIR or os.path.join(self.local_base_path, ReadCache.DIR_NAME)
+            self._read_cache = ReadCache(cache_dir, self.READ_CACHE_BYTES)
+        return self._read_cache
 
-            # Ensure the local directory exists for the bucket
-            bucket_path = self.local_base_path / bucket_name
-            if not bucket_path.exists():
-                bucket_path.mkdir(parents=True, exist_ok=True)
+    @property
+    def catalog(self):
+        """
+        Partition catalog stored alongside the buckets, opened on first use.
+        """
+        if self._catalog is None:
+            self._catalog = PartitionCatalog(os.path.join(self.local_base_path, PartitionCatalog.DB_NAME))
+        return self._catalog
 
-    def upload_file(self, local_file, bucket_name, bucket_key):
+    def upload_file(self, local_file, bucket_name, bucket_key, skip_unchanged=None, link_mode=None):
         """
-        Upload a file to the mock S3 bucket and local directory.
+        Upload a file to the local directory (and the object store for remote backends).
 
         Parameters:
             local_file (str): Path to the local file to upload.
             bucket_name (str): Name of the bucket.
             bucket_key (str): Key (path) to store the file in the bucket.
+            skip_unchanged (bool): Content-addressed mode - skip the copy (and the remote upload)
+                when the target already has the same digest. Defaults to CONTENT_ADDRESSED.
+            link_mode (str): 'copy', 'hardlink' or 'reflink' (see copy_file). Defaults to LINK_MODE.
         """
         # Manually build the paths
         target_path = os.path.join(self.local_base_path, bucket_name, bucket_key)
@@ -75,38 +191,156 @@ class LocalS3WithDirectory:
             print(f"Local file does not exist: {local_file}")
             return
 
+        skip_unchanged = self.CONTENT_ADDRESSED if skip_unchanged is None else skip_unchanged
+        link_mode = self.LINK_MODE if link_mode is None else link_mode
+
+        # Skip the copy when the target already holds the same bytes
+        if skip_unchanged and self.same_content(local_file, target_path):
+            print(f"Unchanged, skipped copy: {target_path}")
+            return
+
         # Copy the file to the target directory
         try:
-            shutil.copy(local_file, target_path)
+            with io_timer("upload_file", bucket_name, bucket_key) as io_counters:
+                copy_file(local_file, target_path, link_mode)
+                io_counters["files"] = 1
+                io_counters["bytes_written"] = os.path.getsize(target_path)
             print(f"File copied to local storage: {target_path}")
         except Exception as e:
             print(f"Error copying file: {e}")
             return
 
-        # # Upload the file to S3
-        # try:
-        #     self.s3.upload_file(local_file, bucket_name, bucket_key)
-        #     print(f"Uploaded to mock S3: {bucket_name}/{bucket_key}")
-        # except Exception as e:
-        #     print(f"Error uploading file to S3: {e}")
-        #     return
+        # Mirror the file to the object store when the backend is remote
+        if self.backend.remote:
+            try:
+                with io_timer(f"{self.backend.name}_upload", bucket_name, bucket_key) as io_counters:
+                    self.backend.upload_file(local_file, bucket_name, bucket_key)
+                    io_counters["files"] = 1
+                    io_counters["bytes_written"] = os.path.getsize(local_file)
+                print(f"Uploaded to {self.backend.name}: {bucket_name}/{bucket_key}")
+            except Exception as e:
+                print(f"Error uploading file to {self.backend.name}: {e}")
+                return
+
+    def same_content(self, path_a, path_b):
+        """
+        True when both files exist and hold the same bytes (size check, then cached digests).
+        """
+        if not (os.path.exists(path_a) and os.path.exists(path_b)):
+            return False
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        return self.digests.digest(path_a) == self.digests.digest(path_b)
+
+    def iter_objects(self, bucket_name, prefix="", suffix=None, glob=None, start_after=None, fetch_stat=False):
+        """
+        Lazily walk the objects of a bucket in key order (like S3 ListObjectsV2, without paging).
+        Built on os.scandir, so only one directory listing is held in memory at a time
+        and the first key is yielded as soon as it is found.
+
+        Parameters:
+            bucket_name (str): Name of the bucket.
+            prefix (str): Key prefix to match ('/' or '\\' separated). A trailing '/' selects a folder.
+            suffix (str): Only yield keys ending with this suffix, e.g. '.csv'.
+            glob (str): Only yield keys whose file name matches this fnmatch pattern, e.g. '*_2025-01-*.csv'.
+            start_after (str): Only yield keys sorting strictly after this key.
+            fetch_stat (bool): Add 'Size' and 'LastModified' to each entry (costs a stat call per file on POSIX).
+
+        Yields:
+            dict: {'Key': 'whales/darkpool/csv/x.csv'} plus 'Size'/'LastModified' when fetch_stat is set.
+        """
+        prefix = prefix.replace("\\", "/").lstrip("/")
+        bucket_path = os.path.join(self.local_base_path, bucket_name)
+        # Start from the deepest folder fully named by the prefix
+        start_dir = prefix.rsplit("/", 1)[0] + "/" if "/" in prefix else ""
+
+        def walk(dir_path, key_prefix):
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = [(e.name + "/" if e.is_dir() else e.name, e) for e in it]
+            except FileNotFoundError:
+                return
+            # Sorting on name + '/' for folders keeps the depth-first walk in plain key order
+            entries.sort(key=lambda item: item[0])
+            for name, entry in entries:
+                key = key_prefix + name
+                if start_after and key <= start_after and not start_after.startswith(key):
+                    continue
+                if not (key.startswith(prefix) or prefix.startswith(key)):
+                    continue
+                if name.endswith("/"):
+                    yield from walk(entry.path, key)
+                    continue
+                if (start_after and key <= start_after) or not key.startswith(prefix):
+                    continue
+                if suffix and not key.endswith(suffix):
+                    continue
+                if glob and not fnmatch.fnmatchcase(entry.name, glob):
+                    continue
+                obj = {"Key": key}
+                if fetch_stat:
+                    st = entry.stat()
+                    obj["Size"] = st.st_size
+                    obj["LastModified"] = datetime.fromtimestamp(st.st_mtime)
+                yield obj
+
+        yield from walk(os.path.join(bucket_path, start_dir), start_dir)
+
+    def list_objects_v2(self, bucket_name, prefix="", suffix=None, glob=None, max_keys=1000,
+                        continuation_token=None, start_after=None, fetch_stat=False):
+        """
+        Return one page of objects, shaped like the S3 ListObjectsV2 response.
+
+        Parameters:
+            bucket_name (str): Name of the bucket.
+            prefix, suffix, glob, start_after, fetch_stat: See iter_objects.
+            max_keys (int): Maximum number of keys in the page.
+            continuation_token (str): NextContinuationToken of the previous page.
+
+        Returns:
+            dict: {'Contents': [...], 'KeyCount': n, 'IsTruncated': bool, 'NextContinuationToken': str}
+        """
+        if continuation_token:
+            start_after = base64.urlsafe_b64decode(continuation_token.encode("ascii")).decode("utf-8")
+
+        contents = []
+        is_truncated = False
+        with io_timer("list_objects_v2", bucket_name, prefix) as io_counters:
+            for obj in self.iter_objects(bucket_name, prefix, suffix, glob, start_after, fetch_stat):
+                if len(contents) == max_keys:
+                    is_truncated = True
+                    break
+                contents.append(obj)
+            io_counters["files"] = len(contents)
+
+        response = {"Contents": contents, "KeyCount": len(contents), "IsTruncated": is_truncated}
+        if is_truncated:
+            last_key = contents[-1]["Key"]
+            response["NextContinuationToken"] = base64.urlsafe_b64encode(last_key.encode("utf-8")).decode("ascii")
+        return response
 
     def list_files(self, bucket_name, bucket_key=""):
         """
-        List files in the mock S3 bucket and local directory.
+        List files under a folder of the bucket.
 
         Parameters:
             bucket_name (str): Name of the bucket.
             bucket_key (str): Key (path) to search within the bucket.
+
+        Returns:
+            list: Keys relative to the bucket, '/' separated.
         """
-        bucket_path = self.local_base_path / bucket_name / bucket_key
-        files = [str(p.relative_to(self.local_base_path / bucket_name)) for p in bucket_path.rglob("*") if p.is_file()]
-        print(f"Files in bucket '{bucket_name}/{bucket_key}': {files}")
+        prefix = bucket_key.replace("\\", "/").strip("/")
+        with io_timer("list_files", bucket_name, prefix + "/") as io_counters:
+            files = [obj["Key"] for obj in self.iter_objects(bucket_name, prefix + "/" if prefix else "")]
+            io_counters["files"] = len(files)
+        print(f"Found {len(files)} files in bucket '{bucket_name}/{bucket_key}'")
         return files
 
     def download_file(self, bucket_name, bucket_key, local_path):
         """
-        Download a file from the mock S3 bucket and local directory.
+        Download a file from the local directory, falling back to the object store
+        for remote backends when the local copy is missing.
 
         Parameters:
             bucket_name (str): Name of the bucket.
@@ -114,11 +348,186 @@ class LocalS3WithDirectory:
             local_path (str): Path to save the downloaded file.
         """
         source_path = self.local_base_path / bucket_name / bucket_key
-        shutil.copy(source_path, local_path)
-        print(f"Downloaded from local storage: {source_path} to {local_path}")
+        if source_path.exists() or not self.backend.remote:
+            with io_timer("download_file", bucket_name, bucket_key) as io_counters:
+                shutil.copy(source_path, local_path)
+                io_counters["files"] = 1
+                io_counters["bytes_read"] = os.path.getsize(source_path)
+            print(f"Downloaded from local storage: {source_path} to {local_path}")
+            return
+
+        with io_timer(f"{self.backend.name}_download", bucket_name, bucket_key) as io_counters:
+            self.backend.download_file(bucket_name, bucket_key, local_path)
+            io_counters["files"] = 1
+            io_counters["bytes_read"] = os.path.getsize(local_path)
+        print(f"Downloaded from {self.backend.name}: {bucket_name}/{bucket_key} to {local_path}")
 
-        self.s3.download_file(bucket_name, bucket_key, local_path)
-        print(f"Downloaded from mock S3: {bucket_name}/{bucket_key} to {local_path}")
+    def upload_files(self, items, max_workers=None, skip_unchanged=None, link_mode=None):
+        """
+        Upload many files: local copies first, then one batched mirror to the object
+        store for remote backends (parallel, multipart transfers over one client).
+        Items whose target already holds the same content are skipped, copy and mirror
+        alike, as in upload_file.
+
+        Parameters:
+            items (list): (local_file, bucket_name, bucket_key) tuples.
+            max_workers (int): Transfers in flight. Defaults to the backend's BATCH_WORKERS.
+            skip_unchanged (bool): Content-addressed mode (see upload_file). Defaults to CONTENT_ADDRESSED.
+            link_mode (str): 'copy', 'hardlink' or 'reflink' (see copy_file). Defaults to LINK_MODE.
+
+        Returns:
+            list: (item, error) tuples for the items that failed.
+        """
+        items = list(items)
+        skip_unchanged = self.CONTENT_ADDRESSED if skip_unchanged is None else skip_unchanged
+        link_mode = self.LINK_MODE if link_mode is None else link_mode
+        failed = []
+        copied = []
+        unchanged = 0
+        for local_file, bucket_name, bucket_key in items:
+            target_path = os.path.join(self.local_base_path, bucket_name, bucket_key)
+            try:
+                if skip_unchanged and self.same_content(local_file, target_path):
+                    unchanged += 1
+                    continue
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                with io_timer("upload_file", bucket_name, bucket_key) as io_counters:
+                    copy_file(local_file, target_path, link_mode)
+                    io_counters["files"] = 1
+                    io_counters["bytes_written"] = os.path.getsize(target_path)
+                copied.append((local_file, bucket_name, bucket_key))
+            except Exception as e:
+                failed.append(((local_file, bucket_name, bucket_key), e))
+
+        if self.backend.remote and copied:
+            start = time.perf_counter()
+            for (local_file, bucket_name, bucket_key), error in self.backend.upload_files(copied, max_workers):
+                IO_STATS.record(f"{self.backend.name}_upload", bucket_name, bucket_key, time.perf_counter() - start,
+                                bytes_written=0 if error else os.path.getsize(local_file), files=1, error=bool(error))
+                if error:
+                    failed.append(((local_file, bucket_name, bucket_key), error))
+
+        print(f"Uploaded {len(items) - len(failed) - unchanged}/{len(items)} file(s), {unchanged} unchanged skipped")
+        for item, error in failed:
+            print(f"Error uploading {item[0]} to {item[1]}/{item[2]}: {error}")
+        return failed
+
+    def download_files(self, items, max_workers=None):
+        """
+        Download many files, from the local copies when present and otherwise as one
+        batch from the object store (parallel, multipart transfers over one client).
+
+        Parameters:
+            items (list): (bucket_name, bucket_key, local_path) tuples.
+            max_workers (int): Transfers in flight. Defaults to the backend's BATCH_WORKERS.
+
+        Returns:
+            list: (item, error) tuples for the items that failed.
+        """
+        items = list(items)
+        failed = []
+        remote_items = []
+        for bucket_name, bucket_key, local_path in items:
+            source_path = os.path.join(self.local_base_path, bucket_name, bucket_key)
+            if os.path.exists(source_path) or not self.backend.remote:
+                try:
+                    with io_timer("download_file", bucket_name, bucket_key) as io_counters:
+                        shutil.copy(source_path, local_path)
+                        io_counters["files"] = 1
+                        io_counters["bytes_read"] = os.path.getsize(source_path)
+                except Exception as e:
+                    failed.append(((bucket_name, bucket_key, local_path), e))
+            else:
+                remote_items.append((bucket_name, bucket_key, local_path))
+
+        if remote_items:
+            start = time.perf_counter()
+            for (bucket_name, bucket_key, local_path), error in self.backend.download_files(remote_items, max_workers):
+                IO_STATS.record(f"{self.backend.name}_download", bucket_name, bucket_key, time.perf_counter() - start,
+                                bytes_read=0 if error else os.path.getsize(local_path), files=1, error=bool(error))
+                if error:
+                    failed.append(((bucket_name, bucket_key, local_path), error))
+
+        print(f"Downloaded {len(items) - len(failed)}/{len(items)} file(s)")
+        for item, error in failed:
+            print(f"Error downloading {item[0]}/{item[1]} to {item[2]}: {error}")
+        return failed
+
+    def get_bytes(self, bucket_name, bucket_key):
+        """
+        Read an object into memory, falling back to the object store for remote
+        backends when the local copy is missing.
+
+        Parameters:
+            bucket_name (str): Name of the bucket.
+            bucket_key (str): Key (path) of the object.
+
+        Returns:
+            bytes: The object content.
+        """
+        source_path = self.local_base_path / bucket_name / bucket_key
+        if not source_path.exists() and self.backend.remote:
+            self.download_file(bucket_name, bucket_key, source_path)
+
+        with io_timer("get", bucket_name, bucket_key) as io_counters:
+            with open(source_path, "rb") as f:
+                data = f.read()
+            io_counters["files"] = 1
+            io_counters["bytes_read"] = len(data)
+        return data
+
+    def cached_path(self, bucket_name, bucket_key):
+        """
+        Local path to read an object from: the bucket copy when present or the backend
+        is local, otherwise a read-through cache entry (fetched on a miss or an ETag change).
+
+        Parameters:
+            bucket_name (str): Name of the bucket.
+            bucket_key (str): Key (path) of the object.
+
+        Returns:
+            str: A local file path for DuckDB, pyarrow, etc.
+        """
+        local_path = os.path.join(self.local_base_path, bucket_name, bucket_key)
+        if not self.backend.remote or os.path.exists(local_path):
+            return local_path
+        return self.read_cache.get_path(self.backend, bucket_name, bucket_key)
+
+    def cached_paths(self, bucket_name, prefix="", suffix=None, glob=None):
+        """
+        Local paths for every object under a prefix, in key order (see cached_path).
+        Cache entries keep the key layout, so hive folders (file_version_date=...) still
+        partition the files for DuckDB read_parquet(..., hive_partitioning = TRUE).
+
+        Parameters:
+            bucket_name (str): Name of the bucket.
+            prefix (str): Key prefix, e.g. 'whales/optiontrades/parquet/file_version_date=20250101/'.
+            suffix (str): Only include keys ending with this suffix, e.g. '.parquet'.
+            glob (str): Only include keys whose file name matches this fnmatch pattern.
+
+        Returns:
+            list: Local file paths.
+        """
+        if not self.backend.remote:
+            return [os.path.join(self.local_base_path, bucket_name, obj["Key"])
+                    for obj in self.iter_objects(bucket_name, prefix, suffix, glob)]
+
+        paths = []
+        fetched = set()
+        for obj in sorted(self.backend.iter_objects(bucket_name, prefix), key=lambda o: o["Key"]):
+            key = obj["Key"]
+            if (suffix and not key.endswith(suffix)) or (glob and not fnmatch.fnmatchcase(key.rsplit("/", 1)[-1], glob)):
+                continue
+            local_path = os.path.join(self.local_base_path, bucket_name, key)
+            if os.path.exists(local_path):
+                paths.append(local_path)
+            else:
+                paths.append(self.read_cache.get_path(self.backend, bucket_name, key, obj["ETag"], obj["Size"], evict=False))
+                fetched.add((bucket_name, key))
+        # Evict once, after the batch, so none of the returned paths is removed
+        if fetched:
+            self.read_cache.evict(keep=fetched)
+        return paths
 
     def move_and_unzip(self, source_path, bucket_name, bucket_key):
         """
@@ -140,18 +549,47 @@ class LocalS3WithDirectory:
         # Process each zip file in the source directory
         for zip_file in source_path.glob("*.zip"):
             try:
-                # Move the zip file
-                shutil.move(str(zip_file), target_path / zip_file.name)
-                print(f"Moved: {zip_file} to {target_path / zip_file.name}")
-
-                # Unzip the file
-                with zipfile.ZipFile(target_path / zip_file.name, 'r') as zf:
-                    zf.extractall(unzipped_path)
-                print(f"Unzipped: {zip_file.name} to {unzipped_path}")
+                with io_timer("move_and_unzip", bucket_name, f"{bucket_key}/{zip_file.name}") as io_counters:
+                    # Move the zip file
+                    shutil.move(str(zip_file), target_path / zip_file.name)
+                    print(f"Moved: {zip_file} to {target_path / zip_file.name}")
+
+                    # Unzip the file
+                    with zipfile.ZipFile(target_path / zip_file.name, 'r') as zf:
+                        zf.extractall(unzipped_path)
+                        io_counters["files"] = len(zf.infolist())
+                        io_counters["bytes_written"] = sum(info.file_size for info in zf.infolist())
+                    print(f"Unzipped: {zip_file.name} to {unzipped_path}")
             except Exception as e:
                 print(f"Error processing {zip_file}: {e}")
 
-    def fetch_and_extract(self, source_path, bucket_name, bucket_key):
+    def _plan_extraction(self, source_path, target_path):
+        """
+        Work out which zip members are missing from target_path.
+        Member lists come from the zip index, so unchanged archives are not reopened.
+
+        Returns:
+            dict: {zip_path: [member, ...]} with each missing member assigned to the first zip holding it.
+        """
+        target_path.mkdir(parents=True, exist_ok=True)
+        with os.scandir(target_path) as entries:
+            existing_files = {entry.name for entry in entries if entry.is_file()}
+
+        plan = {}
+        planned = set()
+        for zip_file in sorted(Path(source_path).glob("*.zip")):
+            try:
+                members = self.zip_index.members(zip_file)
+            except Exception as e:
+                print(f"Error reading zip file '{zip_file}': {e}")
+                continue
+            missing = [m for m in members if m not in existing_files and m not in planned]
+            if missing:
+                plan[str(zip_file)] = missing
+                planned.update(missing)
+        return plan
+
+    def fetch_and_extract(self, source_path, bucket_name, bucket_key, max_workers=None):
         """
         Fetch and extract files dynamically from source zip files to the target directory if not present.
 
@@ -159,55 +597,152 @@ class LocalS3WithDirectory:
             source_path (str): Path to the source directory containing zip files.
             bucket_name (str): Name of the target bucket.
             bucket_key (str): Key (path) within the bucket for the extracted files.
+            max_workers (int): Extraction processes. Defaults to EXTRACT_WORKERS.
         """
-        source_path = Path(source_path)
-        target_path = self.local_base_path / bucket_name / bucket_key
+        self.fetch_and_extract_many([(source_path, bucket_name, bucket_key)], max_workers=max_workers)
 
-        # Ensure target directory exists
-        target_path.mkdir(parents=True, exist_ok=True)
+    def fetch_and_extract_many(self, jobs, max_workers=None):
+        """
+        Extract the missing members of several source directories at once.
+        Every (zip, members) unit across all jobs goes to one process pool, so separate
+        drops (e.g. darkpool, hotchains, optiontrades) extract side by side.
 
-        # Get the list of files already in the target directory
-        existing_files = set(f.name for f in target_path.glob("*") if f.is_file())
+        Parameters:
+            jobs (list): (source_path, bucket_name, bucket_key) tuples, as for fetch_and_extract.
+            max_workers (int): Extraction processes. Defaults to EXTRACT_WORKERS.
+        """
+        tasks = []
+        task_keys = {}
+        for source_path, bucket_name, bucket_key in jobs:
+            target_path = self.local_base_path / bucket_name / bucket_key
+            task_keys[str(target_path)] = (bucket_name, f"{bucket_key}/")
+            plan = self._plan_extraction(source_path, target_path)
+            if not plan:
+                print(f"No files to extract from '{source_path}'.")
+                continue
+            print(f"Files to extract from '{source_path}': {sum(len(m) for m in plan.values())}")
+            tasks.extend((zip_file, members, str(target_path)) for zip_file, members in plan.items())
+
+        if not tasks:
+            return
 
-        # Collect all files available in the source zip files
-        files_to_extract = set()
-        for zip_file in source_path.glob("*.zip"):
-            try:
-                with zipfile.ZipFile(zip_file, 'r') as zf:
-                    files_to_extract.update(zf.namelist())
-            except Exception as e:
-                print(f"Error reading zip file '{zip_file}': {e}")
+        workers = max(1, min(max_workers or self.EXTRACT_WORKERS, len(tasks)))
+        start = time.perf_counter()
+        for (zip_file, members, target_path), error in _run_extractions(tasks, workers):
+            # Units run side by side, so each records the time until it finished
+            bucket_name, bucket_key = task_keys[target_path]
+            IO_STATS.record("fetch_and_extract", bucket_name, bucket_key, time.perf_counter() - start,
+                            files=0 if error else len(members), error=bool(error))
+            if error:
+                print(f"Error extracting files from '{zip_file}': {error}")
+            else:
+                print(f"Extracted {len(members)} file(s) from '{zip_file}' to '{target_path}'")
+
+    @contextmanager
+    def open_for_put(self, bucket_name, bucket_key, buffer_size=1 << 20):
+        """
+        Open a buffered binary stream that writes straight to the final key.
+        Bytes go to a hidden sibling file that replaces the key atomically when the
+        block exits cleanly (and is then mirrored to remote backends).
 
-        # Remove files that already exist in the target directory
-        missing_files = files_to_extract - existing_files
-        if not missing_files:
-            print("No files to extract.")
-            return
+        Parameters:
+            bucket_name (str): Name of the target bucket.
+            bucket_key (str): Key (path) within the bucket.
+            buffer_size (int): Write buffer size in bytes.
+        """
+        target_path = os.path.join(self.local_base_path, bucket_name, bucket_key)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = os.path.join(os.path.dirname(target_path), f".{os.path.basename(target_path)}.{uuid.uuid4().hex}.tmp")
+        try:
+            with io_timer("put", bucket_name, bucket_key) as io_counters:
+                with open(tmp_path, "wb", buffering=buffer_size) as stream:
+                    yield stream
+                    io_counters["files"] = 1
+                    io_counters["bytes_written"] = stream.tell()
+                os.replace(tmp_path, target_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if self.backend.remote:
+            self.backend.upload_file(target_path, bucket_name, bucket_key)
+
+    def put_bytes(self, bucket_name, bucket_key, data):
+        """
+        Write bytes directly to the specified bucket key.
 
-        print(f"Files to extract: {missing_files}")
+        Parameters:
+            bucket_name (str): Name of the target bucket.
+            bucket_key (str): Key (path) within the bucket.
+            data (bytes): The content to store.
+        """
+        with self.open_for_put(bucket_name, bucket_key) as stream:
+            stream.write(data)
+        print(f"Saved {len(data)} bytes to {bucket_name}/{bucket_key}")
 
-        # Extract missing files
-        for zip_file in source_path.glob("*.zip"):
-            try:
-                with zipfile.ZipFile(zip_file, 'r') as zf:
-                    zip_contents = set(zf.namelist())
-                    # Find files in this zip that are missing
-                    files_to_extract_from_this_zip = missing_files.intersection(zip_contents)
-
-                    for filename in files_to_extract_from_this_zip:
-                        zf.extract(filename, target_path)
-                        print(f"Extracted '{filename}' from '{zip_file}' to '{target_path}'")
-                        missing_files.remove(filename)
-
-                    # If all missing files are found, exit early
-                    if not missing_files:
-                        break
-            except Exception as e:
-                print(f"Error extracting files from '{zip_file}': {e}")
+    def put_json(self, bucket_name, bucket_key, data, compress=None, indent=None):
+        """
+        Stream JSON data directly to the specified bucket key (no intermediate string or file).
+
+        Parameters:
+            bucket_name (str): Name of the target bucket.
+            bucket_key (str): Key (path) within the bucket.
+            data: JSON-serializable data.
+            compress (str): None or 'gzip'.
+            indent (int): Pretty-print indent. Default is compact output.
+        """
+        separators = (",", ":") if indent is None else None
+        with self.open_for_put(bucket_name, bucket_key) as stream:
+            if compress == "gzip":
+                with gzip.GzipFile(fileobj=stream, mode="wb", compresslevel=6) as gz:
+                    with io.TextIOWrapper(gz, encoding="utf-8") as text:
+                        json.dump(data, text, indent=indent, separators=separators)
+            elif compress is None:
+                text = io.TextIOWrapper(stream, encoding="utf-8")
+                json.dump(data, text, indent=indent, separators=separators)
+                text.flush()
+                text.detach()  # Leave the stream open for open_for_put to commit
+            else:
+                raise ValueError(f"Unsupported compression '{compress}'. Expected None or 'gzip'")
+        print(f"Saved JSON data to {bucket_name}/{bucket_key}")
+
+    def put_arrow_table(self, bucket_name, bucket_key, table, profile="raw_fast", **write_kwargs):
+        """
+        Write an Arrow table as Parquet directly to the specified bucket key.
+
+        Parameters:
+            bucket_name (str): Name of the target bucket.
+            bucket_key (str): Key (path) within the bucket.
+            table (pa.Table): The table to store.
+            profile (str): WRITER_PROFILES entry giving the write settings.
+            write_kwargs: Passed through to pyarrow.parquet.write_table (override the profile).
+        """
+        with self.open_for_put(bucket_name, bucket_key) as stream:
+            write_parquet(table, stream, profile=profile, **write_kwargs)
+        print(f"Saved {table.num_rows} rows to {bucket_name}/{bucket_key}")
+
+    def put_record_batches(self, bucket_name, bucket_key, batches, schema, profile="raw_fast", **write_kwargs):
+        """
+        Write an iterable of record batches as one Parquet file directly to the specified
+        bucket key, without collecting them into a table first.
 
-        # Log any files that were not found
-        if missing_files:
-            print(f"The following files were not found in any source zip files: {missing_files}")
+        Parameters:
+            bucket_name (str): Name of the target bucket.
+            bucket_key (str): Key (path) within the bucket.
+            batches: Iterable of pa.RecordBatch matching schema.
+            schema (pa.Schema): Schema of the batches.
+            profile (str): WRITER_PROFILES entry giving the write settings.
+            write_kwargs: Passed through to pyarrow.parquet.ParquetWriter (override the profile).
+        """
+        row_count = 0
+        with self.open_for_put(bucket_name, bucket_key) as stream:
+            with ProfiledParquetWriter(stream, schema, profile, **write_kwargs) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+                    row_count += batch.num_rows
+        print(f"Saved {row_count} rows to {bucket_name}/{bucket_key}")
+        return row_count
 
     def save_json(self, bucket_name, bucket_key, data):
         """
@@ -218,12 +753,17 @@ class LocalS3WithDirectory:
             bucket_key (str): Key (path) within the bucket.
             data (dict): The data to be saved as JSON.
         """
-        # Convert the data into a JSON string
-        json_data = json.dumps(data)
+        self.put_json(bucket_name, bucket_key, data)
 
-        # Save the JSON file
-        self.upload_file(json_data, bucket_name, bucket_key)
-        print(f"Saved JSON data to {bucket_name}/{bucket_key}")
+    def object_exists(self, bucket_name, bucket_key):
+        """
+        Check if an object (file) exists in the specified bucket.
+
+        Parameters:
+            bucket_name (str): Name of the target bucket.
+            bucket_key (str): Key (path) within the bucket.
+        """
+        return (self.local_base_path / bucket_name / bucket_key).is_file()
 
     def folder_exists(self, bucket_name, bucket_key=""):
         """
@@ -246,9 +786,81 @@ class LocalS3WithDirectory:
         """
         file_path = self.local_base_path / bucket_name / bucket_key
         if file_path.exists():
-            os.remove(file_path)
+            with io_timer("remove_file", bucket_name, bucket_key) as io_counters:
+                os.remove(file_path)
+                io_counters["files"] = 1
             print(f"Removed file: {file_path}")
-            self.s3.delete_object(Bucket=bucket_name, Key=bucket_key)
-            print(f"Removed from mock S3: {bucket_name}/{bucket_key}")
+            if self.backend.remote:
+                self.backend.delete_object(bucket_name, bucket_key)
+                print(f"Removed from {self.backend.name}: {bucket_name}/{bucket_key}")
         else:
-            print(f"File {file_path} does not exist.")
\ No newline at end of file
+            print(f"File {file_path} does not exist.")
+
+
+# ------------------------------------------------------------------------------
+# ASYNC STORAGE
+# ------------------------------------------------------------------------------
+class AsyncLocalS3:
+    """
+    Awaitable facade over LocalS3WithDirectory for asyncio scrapers.
+
+    Blocking file calls run on a bounded I/O thread pool so network awaits and disk
+    writes overlap in one event loop. At most max_in_flight operations are admitted at
+    once; further callers wait on the semaphore (backpressure) instead of queueing
+    unbounded payloads in memory.
+
+    Usage:
+        async with AsyncLocalS3() as astorage:
+            await astorage.put("raw_store", "stockcharts/pof_charts/DIS.png", content)
+    """
+
+    IO_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+    def __init__(self, storage=None, io_workers=None, max_in_flight=None):
+        self.storage = storage or LocalS3WithDirectory()
+        self.io_workers = io_workers or self.IO_WORKERS
+        self.max_in_flight = max_in_flight or self.io_workers * 4
+        self._executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="storage-io")
+        self._semaphores = {}
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        # One semaphore per event loop: callers may asyncio.run() several batches
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            self._semaphores = {loop: asyncio.Semaphore(self.max_in_flight)}
+            semaphore = self._semaphores[loop]
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    async def put(self, bucket_name, bucket_key, data):
+        """Write bytes to bucket_key (see LocalS3WithDirectory.put_bytes)."""
+        return await self._run(self.storage.put_bytes, bucket_name, bucket_key, data)
+
+    async def put_json(self, bucket_name, bucket_key, data, compress=None, indent=None):
+        """Stream JSON data to bucket_key (see LocalS3WithDirectory.put_json)."""
+        return await self._run(self.storage.put_json, bucket_name, bucket_key, data, compress, indent)
+
+    async def get(self, bucket_name, bucket_key):
+        """Read an object into memory (see LocalS3WithDirectory.get_bytes)."""
+        return await self._run(self.storage.get_bytes, bucket_name, bucket_key)
+
+    async def list(self, bucket_name, prefix=""):
+        """List keys under prefix, in key order."""
+        return await self._run(
+            lambda: [obj["Key"] for obj in self.storage.iter_objects(bucket_name, prefix)]
+        )
+
+    async def exists(self, bucket_name, bucket_key):
+        """Check if an object exists."""
+        return await self._run(self.storage.object_exists, bucket_name, bucket_key)
+
+    def close(self):
+        """Wait for in-flight operations and release the I/O threads."""
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
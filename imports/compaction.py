@@ -0,0 +1,178 @@
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as pads
+from tradeovant.imports.bucketing import partition_buckets
+from tradeovant.imports.clustering import cluster_sort_indices, cluster_write_options, clustering_for
+from tradeovant.imports.partition_catalog import PartitionCatalog
+from tradeovant.imports.partition_commit import partition_commit
+from tradeovant.imports.storage_paths import partition_files
+from tradeovant.imports.writer_profiles import ProfiledParquetWriter
+
+
+# ------------------------------------------------------------------------------
+# PARTITION COMPACTION
+# ------------------------------------------------------------------------------
+COMPACT_TARGET_FILE_ROWS = 5_000_000
+COMPACT_ROW_GROUP_SIZE = 500_000
+
+
+def _partition_layout(partition_dir):
+    """
+    (files, rows, row_groups) of a partition directory, from the parquet footers only.
+    """
+    files = partition_files(partition_dir)
+    rows = row_groups = 0
+    for path in files:
+        metadata = pq.read_metadata(path)
+        rows += metadata.num_rows
+        row_groups += metadata.num_row_groups
+    return files, rows, row_groups
+
+
+def needs_compaction(files, rows, row_groups, target_file_rows=COMPACT_TARGET_FILE_ROWS,
+                     row_group_size=COMPACT_ROW_GROUP_SIZE, num_buckets=None):
+    """
+    True when a partition has more files than its row count calls for, or more than
+    twice the row groups the target row-group size would give. A bucketed partition
+    calls for one file per bucket.
+    """
+    if not files:
+        return False
+    expected_files = num_buckets or max(1, -(-rows // target_file_rows))
+    expected_row_groups = max(1, -(-rows // row_group_size)) + expected_files - 1
+    return len(files) > expected_files or row_groups > 2 * expected_row_groups
+
+
+def compact_partition(dataset_path, partition_value, partition_column="file_version_date", catalog=None,
+                      target_file_rows=COMPACT_TARGET_FILE_ROWS, row_group_size=COMPACT_ROW_GROUP_SIZE,
+                      compression=None, force=False, compression_level=None, columns=None, profile=None):
+    """
+    Rewrite one partition into as few files as target_file_rows allows, each with
+    row groups of row_group_size rows. Files are streamed batch by batch (schemas are
+    unified, missing columns become nulls) into a partition_commit, so the rewrite is
+    swapped in atomically under the partition lock and recorded in the catalog.
+    A bucketed partition (see write_bucketed) is rewritten into one file per bucket.
+    A clustered dataset (see write_clustered) has every output row group sorted on
+    its keys as it is written, so compaction keeps the narrow key ranges while
+    holding no more than one row group in memory.
+
+    Parameters:
+        dataset_path (str): Dataset root directory.
+        partition_value (str): Partition value, e.g. '20250101'.
+        partition_column (str): Hive partition column name.
+        catalog (PartitionCatalog): Catalog to record the compacted partition in.
+        target_file_rows (int): Maximum rows per output file.
+        row_group_size (int): Rows per row group.
+        compression (str): Parquet compression codec. Default is the profile's, or snappy.
+        force (bool): Rewrite even when needs_compaction says the layout is fine.
+        compression_level (int): Codec level, e.g. 19 for zstd. Default is the profile's or the codec default.
+        columns (list): Keep only these columns (missing ones are ignored). Default is all.
+        profile (str): WRITER_PROFILES entry for the write settings (codec, dictionary,
+            byte-stream-split, page index). row_group_size and explicit codec arguments win.
+
+    Returns:
+        dict: {'partition', 'compacted', 'files_before', 'files_after', 'row_groups_before', 'row_groups_after', 'rows'}
+    """
+    partition_dir = os.path.join(dataset_path, f"{partition_column}={partition_value}")
+    files, rows, row_groups = _partition_layout(partition_dir)
+    buckets = partition_buckets(partition_dir)
+    result = {"partition": str(partition_value), "compacted": False, "rows": rows,
+              "files_before": len(files), "files_after": len(files),
+              "row_groups_before": row_groups, "row_groups_after": row_groups}
+    if not force and not needs_compaction(files, rows, row_groups, target_file_rows, row_group_size,
+                                          num_buckets=len(buckets) if buckets else None):
+        return result
+
+    with partition_commit(dataset_path, partition_value, partition_column, catalog=catalog) as tmp_dir:
+        # Re-read under the partition lock in case a writer replaced the partition meanwhile
+        files, rows, row_groups = _partition_layout(partition_dir)
+        buckets = partition_buckets(partition_dir)
+        result.update(rows=rows, files_before=len(files), row_groups_before=row_groups)
+        if not files:
+            raise FileNotFoundError(f"No parquet files in {partition_dir}")
+
+        full_schema = pa.unify_schemas([pq.read_schema(path) for path in files])
+        schema = full_schema
+        if columns is not None:
+            schema = pa.schema([field for field in schema if field.name in columns], metadata=schema.metadata)
+        # (fixed output name or None for rolling part files, input files)
+        if buckets:
+            groups = [(os.path.basename(paths[0]), paths) for paths in buckets.values()]
+        else:
+            # A single output keeps the partition's original file name
+            groups = [(os.path.basename(files[0]) if rows <= target_file_rows else None, files)]
+        codec = {"compression": compression or ("snappy" if profile is None else None),
+                 "compression_level": compression_level}
+        codec = {key: value for key, value in codec.items() if value is not None}
+        clustering = clustering_for(dataset_path)
+        state = {"writer": None, "index": -1, "rows": 0}
+
+        def write_row_group(table, name):
+            if state["writer"] is not None and name is None and state["rows"] + table.num_rows > target_file_rows:
+                state["writer"].close()
+                state["writer"] = None
+            if clustering is not None:
+                table = table.take(cluster_sort_indices(table, clustering[0]))
+            if state["writer"] is None:
+                state["index"] += 1
+                state["rows"] = 0
+                path = os.path.join(tmp_dir, name or f"part-{state['index']:05d}.parquet")
+                options = codec
+                if clustering is not None:
+                    # Bloom filters are per row group: size them on the file's first one
+                    options = dict(cluster_write_options(clustering, schema, table if table.num_rows else None),
+                                   **codec)
+                state["writer"] = ProfiledParquetWriter(path, schema, profile, **options)
+            state["writer"].write_table(table, row_group_size=row_group_size)
+            state["rows"] += table.num_rows
+
+        try:
+            for name, group_files in groups:
+                dataset = pads.dataset(group_files, schema=full_schema, format="parquet")
+                batches = dataset.to_batches(columns=schema.names, batch_size=row_group_size)
+                # Small input batches are buffered so every row group but the last is full-sized
+                pending = pa.Table.from_batches([], schema=schema)
+                for batch in batches:
+                    pending = pa.concat_tables([pending, pa.Table.from_batches([batch], schema=schema)])
+                    while pending.num_rows >= row_group_size:
+                        write_row_group(pending.slice(0, row_group_size), name)
+                        pending = pending.slice(row_group_size)
+                if pending.num_rows or (buckets and state["writer"] is None):
+                    # Empty buckets keep an (empty) file so per-bucket globs still match
+                    write_row_group(pending, name)
+                if name is not None and state["writer"] is not None:
+                    state["writer"].close()
+                    state["writer"] = None
+        finally:
+            if state["writer"] is not None:
+                state["writer"].close()
+
+        files_after, _, row_groups_after = _partition_layout(tmp_dir)
+        result.update(compacted=True, files_after=len(files_after), row_groups_after=row_groups_after)
+    return result
+
+
+def compact_dataset(dataset_path, partition_column="file_version_date", start=None, end=None, catalog=None, **kwargs):
+    """
+    Compact every partition of a dataset, or those with start <= value <= end.
+    Extra keyword arguments go to compact_partition.
+
+    Returns:
+        list: One compact_partition result per partition.
+    """
+    catalog = catalog or PartitionCatalog()
+    results = []
+    for partition_value in catalog.list_partitions(dataset_path, partition_column):
+        if (start and partition_value < str(start)) or (end and partition_value > str(end)):
+            continue
+        try:
+            result = compact_partition(dataset_path, partition_value, partition_column, catalog, **kwargs)
+        except Exception as e:
+            print(f"Error compacting {dataset_path} {partition_column}={partition_value}: {e}")
+            continue
+        if result["compacted"]:
+            print(f"Compacted {partition_column}={partition_value}: {result['files_before']} -> {result['files_after']} "
+                  f"file(s), {result['row_groups_before']} -> {result['row_groups_after']} row group(s)")
+        results.append(result)
+    return results
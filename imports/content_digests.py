@@ -0,0 +1,125 @@
+import os
+import shutil
+import hashlib
+import uuid
+from tradeovant.imports.partition_catalog import sqlite_transaction
+from tradeovant.imports.storage_paths import base_path
+
+try:
+    import xxhash  # Optional: fastest digest for content-addressed uploads
+except ImportError:
+    xxhash = None
+
+try:
+    from blake3 import blake3  # Optional: used when xxhash is not installed
+except ImportError:
+    blake3 = None
+
+
+# ------------------------------------------------------------------------------
+# CONTENT DIGESTS AND LINKED COPIES
+# ------------------------------------------------------------------------------
+def _new_hasher():
+    """
+    Return (algorithm name, hasher): xxh3-128 or BLAKE3 when installed, else stdlib blake2b.
+    """
+    if xxhash is not None:
+        return "xxh3_128", xxhash.xxh3_128()
+    if blake3 is not None:
+        return "blake3", blake3()
+    return "blake2b", hashlib.blake2b(digest_size=16)
+
+
+def file_digest(path, chunk_size=8 << 20):
+    """
+    Return (algorithm name, hex digest) of a file's contents, read in chunks.
+    """
+    algo, hasher = _new_hasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return algo, hasher.hexdigest()
+
+
+class DigestCache:
+    """
+    Sidecar store of file digests keyed by path and validated by size and mtime,
+    so a file is only re-hashed after it changes.
+    """
+    DB_NAME = "_content_digests.db"
+
+    def __init__(self, db_path=None):
+        self.db_path = str(db_path or os.path.join(base_path(), self.DB_NAME))
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS digests (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    algo TEXT NOT NULL,
+                    digest TEXT NOT NULL
+                )""")
+
+    def digest(self, path):
+        """
+        Return the hex digest of a file, from the cache when size and mtime are unchanged.
+        """
+        key = os.path.abspath(str(path))
+        st = os.stat(key)
+        algo = _new_hasher()[0]
+        with sqlite_transaction(self.db_path) as conn:
+            row = conn.execute("SELECT size, mtime_ns, algo, digest FROM digests WHERE path = ?", (key,)).fetchone()
+        if row and row[:3] == (st.st_size, st.st_mtime_ns, algo):
+            return row[3]
+
+        algo, digest = file_digest(key)
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?)",
+                (key, st.st_size, st.st_mtime_ns, algo, digest)
+            )
+        return digest
+
+
+FICLONE = 0x40049409  # Linux ioctl that clones file extents (btrfs, XFS, ...)
+
+
+def _reflink(src, dst):
+    import fcntl  # POSIX only
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def copy_file(src, dst, link_mode="copy"):
+    """
+    Copy src to dst, replacing dst atomically.
+
+    link_mode:
+        'copy'     - plain byte copy.
+        'hardlink' - hard link to src (no data written; both names share the same bytes,
+                     so only use it for sources that are never modified in place).
+        'reflink'  - copy-on-write clone where the filesystem supports it.
+    'hardlink' and 'reflink' fall back to a plain copy when the filesystem refuses them.
+    """
+    tmp_path = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.{uuid.uuid4().hex}.tmp")
+    try:
+        if link_mode == "hardlink":
+            try:
+                os.link(src, tmp_path)
+            except OSError:
+                shutil.copy2(src, tmp_path)
+        elif link_mode == "reflink":
+            try:
+                _reflink(src, tmp_path)
+            except (OSError, ImportError):
+                shutil.copy2(src, tmp_path)
+        else:
+            shutil.copy(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
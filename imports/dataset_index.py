@@ -0,0 +1,340 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.compute as pc
+from tradeovant.imports.bucketing import BUCKET_FILE_PATTERN, bucket_for_symbol, bucketing_for
+from tradeovant.imports.clustering import decoded
+from tradeovant.imports.partition_catalog import sqlite_transaction
+from tradeovant.imports.storage_paths import dataset_setting
+
+
+# ------------------------------------------------------------------------------
+# ZONE MAPS AND BLOOM FILTERS
+# ------------------------------------------------------------------------------
+def indexed_columns(dataset_path):
+    """
+    Bloom filter columns of dataset_path from LocalS3WithDirectory.INDEXED_DATASETS,
+    or None when the dataset is not indexed.
+    """
+    return dataset_setting("INDEXED_DATASETS", dataset_path)
+
+
+def json_stat(value):
+    """
+    Parquet min/max statistic as a JSON value (dates, timestamps and decimals as strings).
+    """
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+class BloomFilter:
+    """
+    Bit-array bloom filter over the string form of values (double hashing on blake2b).
+    """
+
+    def __init__(self, num_bits, num_hashes, bits=None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = np.frombuffer(bits, dtype=np.uint8).copy() if bits is not None else np.zeros((num_bits + 7) // 8, np.uint8)
+
+    @classmethod
+    def for_values(cls, values, fpp=0.01):
+        """
+        Build a filter sized for the given values at false-positive rate fpp.
+        """
+        values = list(values)
+        n = max(1, len(values))
+        num_bits = max(64, int(-n * np.log(fpp) / (np.log(2) ** 2)))
+        num_hashes = max(1, round(num_bits / n * np.log(2)))
+        bloom = cls(num_bits, num_hashes)
+        if values:
+            positions = bloom._positions(values).ravel()
+            np.bitwise_or.at(bloom.bits, (positions >> 3).astype(np.int64), (1 << (positions & 7)).astype(np.uint8))
+        return bloom
+
+    def _positions(self, values):
+        """
+        Bit positions, shape (len(values), num_hashes).
+        """
+        digests = np.frombuffer(
+            b"".join(hashlib.blake2b(str(v).encode("utf-8"), digest_size=16).digest() for v in values), dtype="<u8"
+        ).reshape(-1, 2)
+        h1, h2 = digests[:, :1], digests[:, 1:] | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)[None, :]
+        return (h1 + steps * h2) % np.uint64(self.num_bits)  # Wraps mod 2**64, same on build and lookup
+
+    def might_contain(self, value):
+        positions = self._positions([value])[0]
+        return bool(np.all(self.bits[(positions >> 3).astype(np.int64)] & (1 << (positions & 7)).astype(np.uint8)))
+
+    def to_bytes(self):
+        return self.bits.tobytes()
+
+
+def _matches_zone(filter_value, min_value, max_value):
+    """
+    False only when the zone map proves no value can match: filter_value is a scalar,
+    a list/set of candidates, or a (low, high) tuple with None for an open end.
+    """
+    if min_value is None or max_value is None:
+        return True
+    try:
+        if isinstance(filter_value, tuple):
+            low, high = filter_value
+            return (high is None or min_value <= high) and (low is None or max_value >= low)
+        candidates = filter_value if isinstance(filter_value, (list, set, frozenset)) else [filter_value]
+        return any(min_value <= value <= max_value for value in candidates)
+    except TypeError:  # Incomparable types: cannot prune
+        return True
+
+
+class DatasetIndex:
+    """
+    Sidecar index of a hive-partitioned parquet dataset, stored in <dataset>/_index.db:
+      - zone maps: min/max/null count per column, per file (row_group -1) and per row group,
+        copied from the parquet footers;
+      - bloom filters per file on the configured columns (distinct values of that file).
+    prune() and read_parquet_sql() use it to hand DuckDB only the files that can match,
+    and read_table() additionally skips row groups with pyarrow.
+
+    Usage:
+        index = DatasetIndex(trades_path, ["underlying_symbol", "option_chain_id"])
+        index.refresh()
+        sql = f"SELECT * FROM {index.read_parquet_sql({'underlying_symbol': 'SPY'})}"
+    """
+    DB_NAME = "_index.db"
+    BLOOM_FPP = 0.01
+
+    def __init__(self, dataset_path, bloom_columns=(), partition_column="file_version_date"):
+        self.dataset_path = str(dataset_path)
+        self.bloom_columns = list(bloom_columns or [])
+        self.partition_column = partition_column
+        self.db_path = os.path.join(self.dataset_path, self.DB_NAME)
+        os.makedirs(self.dataset_path, exist_ok=True)
+
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    partition_value TEXT,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    num_rows INTEGER NOT NULL,
+                    num_row_groups INTEGER NOT NULL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS zone_maps (
+                    path TEXT NOT NULL,
+                    row_group INTEGER NOT NULL,
+                    column_name TEXT NOT NULL,
+                    min_value TEXT,
+                    max_value TEXT,
+                    null_count INTEGER,
+                    PRIMARY KEY (path, row_group, column_name)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS blooms (
+                    path TEXT NOT NULL,
+                    column_name TEXT NOT NULL,
+                    num_bits INTEGER NOT NULL,
+                    num_hashes INTEGER NOT NULL,
+                    bits BLOB NOT NULL,
+                    PRIMARY KEY (path, column_name)
+                )""")
+
+    # -- building --------------------------------------------------------------
+    def _data_files(self, partition_values=None):
+        prefix = f"{self.partition_column}="
+        wanted = {f"{prefix}{v}" for v in partition_values} if partition_values is not None else None
+        files = {}
+        for entry in os.scandir(self.dataset_path):
+            if not (entry.is_dir() and entry.name.startswith(prefix)) or (wanted is not None and entry.name not in wanted):
+                continue
+            for file_entry in os.scandir(entry.path):
+                if file_entry.name.endswith(".parquet") and not file_entry.name.startswith((".", "_")):
+                    files[f"{entry.name}/{file_entry.name}"] = file_entry.stat()
+        return files
+
+    def _index_file(self, relative_path):
+        full_path = os.path.join(self.dataset_path, *relative_path.split("/"))
+        metadata = pq.read_metadata(full_path)
+        zone_rows = []
+        file_zones = {}
+        for rg in range(metadata.num_row_groups):
+            row_group = metadata.row_group(rg)
+            for col in range(row_group.num_columns):
+                column = row_group.column(col)
+                stats = column.statistics
+                name = column.path_in_schema
+                if stats is None or not stats.has_min_max:
+                    file_zones[name] = None
+                    continue
+                min_value, max_value = json_stat(stats.min), json_stat(stats.max)
+                zone_rows.append((relative_path, rg, name, json.dumps(min_value), json.dumps(max_value), stats.null_count))
+                if name not in file_zones:
+                    file_zones[name] = [min_value, max_value, stats.null_count or 0]
+                elif file_zones[name] is not None:
+                    zone = file_zones[name]
+                    zone[0], zone[1] = min(zone[0], min_value), max(zone[1], max_value)
+                    zone[2] += stats.null_count or 0
+        for name, zone in file_zones.items():
+            if zone is not None:
+                zone_rows.append((relative_path, -1, name, json.dumps(zone[0]), json.dumps(zone[1]), zone[2]))
+
+        bloom_rows = []
+        present = [c for c in self.bloom_columns if c in metadata.schema.names]
+        if present:
+            table = pq.read_table(full_path, columns=present)
+            for column_name in present:
+                values = [v for v in pc.unique(table.column(column_name)).to_pylist() if v is not None]
+                bloom = BloomFilter.for_values(values, self.BLOOM_FPP)
+                bloom_rows.append((relative_path, column_name, bloom.num_bits, bloom.num_hashes, bloom.to_bytes()))
+        return metadata, zone_rows, bloom_rows
+
+    def refresh(self, partition_values=None):
+        """
+        Index new and changed files and forget deleted ones, for every partition or
+        only the given partition values.
+
+        Returns:
+            int: Number of files (re)indexed.
+        """
+        on_disk = self._data_files(partition_values)
+        with sqlite_transaction(self.db_path, write=False) as conn:
+            known = {row[0]: (row[1], row[2], row[3]) for row in conn.execute(
+                "SELECT path, size, mtime_ns, partition_value FROM files")}
+        if partition_values is not None:
+            wanted = {str(v) for v in partition_values}
+            known = {path: info for path, info in known.items() if info[2] in wanted}
+
+        stale = [path for path in known if path not in on_disk]
+        changed = [path for path, st in on_disk.items()
+                   if path not in known or known[path][:2] != (st.st_size, st.st_mtime_ns)]
+
+        for path in changed:
+            st = on_disk[path]
+            metadata, zone_rows, bloom_rows = self._index_file(path)
+            partition_value = path.split("/", 1)[0].split("=", 1)[1]
+            with sqlite_transaction(self.db_path) as conn:
+                for table_name in ("files", "zone_maps", "blooms"):
+                    conn.execute(f"DELETE FROM {table_name} WHERE path = ?", (path,))
+                conn.execute("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                             (path, partition_value, st.st_size, st.st_mtime_ns, metadata.num_rows, metadata.num_row_groups))
+                conn.executemany("INSERT INTO zone_maps VALUES (?, ?, ?, ?, ?, ?)", zone_rows)
+                conn.executemany("INSERT INTO blooms VALUES (?, ?, ?, ?, ?)", bloom_rows)
+
+        if stale:
+            with sqlite_transaction(self.db_path) as conn:
+                for table_name in ("files", "zone_maps", "blooms"):
+                    conn.executemany(f"DELETE FROM {table_name} WHERE path = ?", [(path,) for path in stale])
+        if changed or stale:
+            print(f"Indexed {len(changed)} file(s), dropped {len(stale)} from {self.dataset_path}")
+        return len(changed)
+
+    # -- pruning ---------------------------------------------------------------
+    def prune(self, filters, row_groups=False):
+        """
+        Files (absolute paths) that may hold rows matching every filter.
+
+        Parameters:
+            filters (dict): column -> value, list/set of values (IN), or (low, high) range.
+                The partition column is matched against the hive folder.
+            row_groups (bool): Return {path: [row_group, ...]} instead of a list of paths.
+        """
+        filters = filters or {}
+        placeholders = ",".join("?" * len(filters)) or "NULL"
+        with sqlite_transaction(self.db_path, write=False) as conn:
+            files = conn.execute("SELECT path, partition_value, num_row_groups FROM files ORDER BY path").fetchall()
+            zones = {}
+            for path, rg, name, min_value, max_value in conn.execute(
+                    f"SELECT path, row_group, column_name, min_value, max_value FROM zone_maps "
+                    f"WHERE column_name IN ({placeholders})", list(filters)):
+                zones[(path, rg, name)] = (json.loads(min_value), json.loads(max_value))
+            blooms = {(path, name): BloomFilter(num_bits, num_hashes, bits) for path, name, num_bits, num_hashes, bits in
+                      conn.execute(f"SELECT path, column_name, num_bits, num_hashes, bits FROM blooms "
+                                   f"WHERE column_name IN ({placeholders})", list(filters))}
+
+        # Files of a bucketed dataset whose bucket cannot hold the filtered symbols are skipped by name
+        wanted_buckets = None
+        bucketing = bucketing_for(self.dataset_path)
+        if bucketing is not None and bucketing[0] in filters and not isinstance(filters[bucketing[0]], tuple):
+            symbols = filters[bucketing[0]]
+            symbols = symbols if isinstance(symbols, (list, set, frozenset)) else [symbols]
+            wanted_buckets = {bucket_for_symbol(symbol, bucketing[1]) for symbol in symbols}
+
+        selected = {}
+        for path, partition_value, num_row_groups in files:
+            match = BUCKET_FILE_PATTERN.search(path) if wanted_buckets is not None else None
+            if match is not None and int(match.group(1)) not in wanted_buckets:
+                continue
+            keep = True
+            for column_name, filter_value in filters.items():
+                if column_name == self.partition_column:
+                    keep = _matches_zone(filter_value, partition_value, partition_value)
+                elif (path, -1, column_name) in zones:
+                    keep = _matches_zone(filter_value, *zones[(path, -1, column_name)])
+                if keep and (path, column_name) in blooms and not isinstance(filter_value, tuple):
+                    candidates = filter_value if isinstance(filter_value, (list, set, frozenset)) else [filter_value]
+                    keep = any(blooms[(path, column_name)].might_contain(v) for v in candidates)
+                if not keep:
+                    break
+            if not keep:
+                continue
+            selected[path] = [
+                rg for rg in range(num_row_groups)
+                if all(column_name == self.partition_column or (path, rg, column_name) not in zones
+                       or _matches_zone(filter_value, *zones[(path, rg, column_name)])
+                       for column_name, filter_value in filters.items())
+            ]
+
+        to_path = lambda p: os.path.join(self.dataset_path, *p.split("/"))
+        if row_groups:
+            return {to_path(p): rgs for p, rgs in selected.items() if rgs}
+        return [to_path(p) for p, rgs in selected.items() if rgs]
+
+    def read_parquet_sql(self, filters):
+        """
+        DuckDB table expression over only the files that may match filters. The filters
+        still have to be repeated in the WHERE clause; pruning only drops files.
+        """
+        paths = self.prune(filters)
+        if not paths:
+            return "(SELECT NULL WHERE FALSE)"
+        file_list = ", ".join("'" + path.replace(os.sep, "/") + "'" for path in paths)
+        return f"read_parquet([{file_list}], hive_partitioning = TRUE)"
+
+    def read_table(self, filters, columns=None):
+        """
+        Read only the row groups that may match filters, then apply the filters exactly.
+        """
+        read_columns = None
+        if columns is not None:
+            read_columns = list(columns) + [c for c in filters if c not in columns and c != self.partition_column]
+        tables = []
+        for path, rgs in self.prune(filters, row_groups=True).items():
+            table = pq.ParquetFile(path).read_row_groups(rgs, columns=read_columns)
+            tables.append(table)
+        if not tables:
+            return None
+        table = pa.concat_tables(tables, promote_options="default")
+        mask = None
+        for column_name, filter_value in filters.items():
+            if column_name not in table.column_names:
+                continue
+            column = decoded(table.column(column_name))  # Dictionary columns (e.g. underlying_symbol) compare as values
+            if isinstance(filter_value, tuple):
+                low, high = filter_value
+                condition = pc.and_kleene(
+                    pc.greater_equal(column, low) if low is not None else pc.is_valid(column),
+                    pc.less_equal(column, high) if high is not None else pc.is_valid(column))
+            elif isinstance(filter_value, (list, set, frozenset)):
+                condition = pc.is_in(column, value_set=pa.array(list(filter_value), column.type))
+            else:
+                condition = pc.equal(column, filter_value)
+            mask = condition if mask is None else pc.and_kleene(mask, condition)
+        table = table.filter(mask) if mask is not None else table
+        return table.select(list(columns)) if columns is not None else table
@@ -0,0 +1,118 @@
+import os
+import uuid
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tradeovant.imports.partition_catalog import PartitionCatalog
+from tradeovant.imports.storage_paths import dataset_setting
+
+
+# ------------------------------------------------------------------------------
+# LATEST-PARTITION HOT CACHE
+# ------------------------------------------------------------------------------
+HOT_CACHE_NAME = "_latest.arrow"  # Leading '_' keeps it out of pyarrow dataset scans
+
+
+def hot_cache_path(dataset_path):
+    return os.path.join(dataset_path, HOT_CACHE_NAME)
+
+
+def hot_cache_enabled(dataset_path):
+    """
+    True when dataset_path is one of LocalS3WithDirectory.HOT_CACHE_DATASETS.
+    """
+    return dataset_setting("HOT_CACHE_DATASETS", dataset_path) is not None
+
+
+def _open_hot_cache(path):
+    """
+    Memory-map an Arrow IPC file and return its table (zero-copy), or None if missing.
+    """
+    if not os.path.exists(path):
+        return None
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def refresh_hot_cache(dataset_path, partition_column="file_version_date", catalog=None, if_latest=None):
+    """
+    Rewrite the dataset's hot cache: its latest partition as one uncompressed Arrow IPC
+    (Feather v2) file, tagged with the partition value and catalog written_at.
+
+    Parameters:
+        dataset_path (str): Dataset root directory.
+        partition_column (str): Hive partition column name.
+        catalog (PartitionCatalog): Catalog to read partitions from. Defaults to PartitionCatalog().
+        if_latest (str): Only refresh when this partition value is the latest one.
+
+    Returns:
+        pa.Table: The cached table, or None when nothing was refreshed.
+    """
+    catalog = catalog or PartitionCatalog()
+    partitions = catalog.list_partitions(dataset_path, partition_column)
+    if not partitions or (if_latest is not None and str(if_latest) != partitions[-1]):
+        return None
+    latest = partitions[-1]
+    record = catalog.get_partition(dataset_path, latest, partition_column)
+
+    table = pq.read_table(os.path.join(dataset_path, f"{partition_column}={latest}"))
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"hot_cache.partition_column": partition_column.encode(),
+        b"hot_cache.partition_value": latest.encode(),
+        b"hot_cache.written_at": (record or {}).get("written_at", "").encode(),
+    })
+
+    path = hot_cache_path(dataset_path)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        print(f"Refreshed hot cache {path} ({partition_column}={latest}, {table.num_rows} rows)")
+    except PermissionError as e:  # Windows: a reader still has the old file mapped
+        print(f"Hot cache {path} is in use, keeping the previous copy: {e}")
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return table
+
+
+def read_latest_partition(dataset_path, columns=None, partition_column="file_version_date", catalog=None):
+    """
+    Return the dataset's latest partition from its memory-mapped hot cache, rebuilding
+    the cache first when it is missing or older than the latest catalog entry.
+    Uncompressed IPC maps straight into Arrow buffers, so processes share the page cache.
+
+    Parameters:
+        dataset_path (str): Dataset root directory.
+        columns (list): Columns to keep. Default is all.
+        partition_column (str): Hive partition column name.
+        catalog (PartitionCatalog): Catalog to read partitions from. Defaults to PartitionCatalog().
+
+    Returns:
+        pa.Table: The latest partition; its value is in the schema metadata
+        under b'hot_cache.partition_value'.
+    """
+    catalog = catalog or PartitionCatalog()
+    partitions = catalog.list_partitions(dataset_path, partition_column)
+    if not partitions:
+        raise ValueError(f"No partitions found in {dataset_path}")
+    record = catalog.get_partition(dataset_path, partitions[-1], partition_column) or {}
+
+    def current(table):
+        metadata = (table.schema.metadata or {}) if table is not None else {}
+        return (metadata.get(b"hot_cache.partition_value", b"").decode() == partitions[-1]
+                and metadata.get(b"hot_cache.written_at", b"").decode() == record.get("written_at", ""))
+
+    path = hot_cache_path(dataset_path)
+    table = _open_hot_cache(path)
+    if not current(table):
+        table = refresh_hot_cache(dataset_path, partition_column, catalog)
+        # Serve the file just written, memory-mapped like any later read; the in-memory
+        # copy only when the old file could not be replaced (still mapped on Windows)
+        cached = _open_hot_cache(path)
+        if current(cached):
+            table = cached
+
+    return table.select(columns) if columns else table
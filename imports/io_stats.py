@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from tradeovant.imports.storage_paths import base_path
+
+
+# ------------------------------------------------------------------------------
+# I/O INSTRUMENTATION
+# ------------------------------------------------------------------------------
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+def stats_prefix(bucket_key, depth=2):
+    """
+    Group a key under its first `depth` folders, e.g. 'unusual_whales/optiontrades'.
+    Staging folders ('.optiontrades.staging/...') count towards the dataset they stage.
+    """
+    parts = []
+    for part in bucket_key.replace("\\", "/").split("/")[:-1]:
+        if part.startswith(".") and part.endswith(".staging"):
+            parts.append(part[1:-len(".staging")])
+            break
+        if part:
+            parts.append(part)
+        if len(parts) == depth:
+            break
+    return "/".join(parts)
+
+
+class IOStatsRegistry:
+    """
+    In-process counters for storage operations, keyed by (operation, bucket, prefix).
+    Each entry holds call/error/file counts, bytes read and written, and a latency
+    histogram with upper bounds LATENCY_BUCKETS_MS (plus an overflow bucket).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, op, bucket_name, bucket_key="", seconds=0.0, bytes_read=0, bytes_written=0, files=0, error=False):
+        key = (op, bucket_name or "", stats_prefix(bucket_key or ""))
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"calls": 0, "errors": 0, "files": 0, "bytes_read": 0, "bytes_written": 0,
+                         "total_ms": 0.0, "max_ms": 0.0, "latency_ms": [0] * (len(LATENCY_BUCKETS_MS) + 1)}
+                self._entries[key] = entry
+            entry["calls"] += 1
+            entry["errors"] += int(error)
+            entry["files"] += files
+            entry["bytes_read"] += bytes_read
+            entry["bytes_written"] += bytes_written
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            bucket_index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound),
+                                len(LATENCY_BUCKETS_MS))
+            entry["latency_ms"][bucket_index] += 1
+
+    def snapshot(self):
+        """
+        Return the counters as a JSON-ready list, one dict per (operation, bucket, prefix).
+        """
+        labels = [f"le_{bound}" for bound in LATENCY_BUCKETS_MS] + ["overflow"]
+        with self._lock:
+            items = sorted(self._entries.items())
+            return [
+                {"op": op, "bucket": bucket, "prefix": prefix,
+                 **{k: v for k, v in entry.items() if k != "latency_ms"},
+                 "mean_ms": entry["total_ms"] / entry["calls"],
+                 "latency_ms": dict(zip(labels, entry["latency_ms"]))}
+                for (op, bucket, prefix), entry in items
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def dump_json(self, path):
+        """
+        Write the snapshot to path as JSON. Returns path, or None when nothing was recorded.
+        """
+        stats = self.snapshot()
+        if not stats:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"run": os.path.basename(sys.argv[0] or "python"), "pid": os.getpid(),
+                       "written_at": datetime.now().isoformat(timespec="seconds"), "stats": stats}, f, indent=2)
+        return path
+
+
+IO_STATS = IOStatsRegistry()
+
+
+@contextmanager
+def io_timer(op, bucket_name, bucket_key=""):
+    """
+    Time one storage operation and record it in IO_STATS.
+    The yielded dict takes 'bytes_read', 'bytes_written' and 'files' from the caller.
+
+    Usage:
+        with io_timer("upload_file", bucket, key) as io:
+            ...
+            io["bytes_written"] = size
+    """
+    counters = {"bytes_read": 0, "bytes_written": 0, "files": 0}
+    error = False
+    start = time.perf_counter()
+    try:
+        yield counters
+    except BaseException:
+        error = True
+        raise
+    finally:
+        IO_STATS.record(op, bucket_name, bucket_key, time.perf_counter() - start, error=error, **counters)
+
+
+def dump_io_stats(path=None):
+    """
+    Write IO_STATS as JSON, by default to <BASE_PATH>/_io_stats/<script>_<timestamp>_<pid>.json.
+    Call it at the end of a run, or set TRADEOVANT_IO_STATS=1 to have every run dump its
+    stats at exit.
+    """
+    if path is None:
+        run_name = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+        file_name = f"{run_name}_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.json"
+        path = os.path.join(base_path(), "_io_stats", file_name)
+    try:
+        written = IO_STATS.dump_json(path)
+    except OSError as e:
+        print(f"Error writing I/O stats to {path}: {e}")
+        return None
+    if written:
+        print(f"I/O stats written to {written}")
+    return written
+
+
+if os.environ.get("TRADEOVANT_IO_STATS") == "1":
+    atexit.register(dump_io_stats)
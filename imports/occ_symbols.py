@@ -0,0 +1,111 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from tradeovant.imports.clustering import decoded
+
+
+# ------------------------------------------------------------------------------
+# OCC OPTION SYMBOLS
+# ------------------------------------------------------------------------------
+# OCC (OSI) option symbol: root of 1-6 characters (space-padded to 6 in the OSI form),
+# expiry as YYMMDD, C or P, then the strike times 1000 as 8 digits, e.g. 'SPY250310P00565000'.
+# Everything but the root has a fixed width, counted from the end of the symbol.
+OCC_TAIL_LENGTH = 15
+
+
+def occ_fields(prefix=""):
+    """Arrow fields of the columns parse_occ_symbols returns, names prefixed with prefix."""
+    return [
+        pa.field(f"{prefix}root", pa.string()),
+        pa.field(f"{prefix}expiry", pa.date32()),
+        pa.field(f"{prefix}option_type", pa.dictionary(pa.int32(), pa.string())),
+        pa.field(f"{prefix}strike", pa.float64()),
+    ]
+
+
+def parse_occ_symbols(symbols, prefix=""):
+    """
+    Decode OCC option symbols in bulk. The 15 fixed-width bytes at the end of every
+    symbol are gathered straight out of the Arrow string buffer as two 8-byte words
+    plus the type byte; expiry and strike digits are then checked and decoded eight
+    at a time (see _parse_ascii_digits) and the expiry looked up in a YYMMDD -> days
+    table. Only the root goes through an Arrow compute slice. Symbols that are not
+    OCC-shaped, or whose expiry is not a real date, give NULL in all four columns.
+
+    Parameters:
+        symbols (pa.Array | pa.ChunkedArray): Option symbols (string or dictionary of strings).
+        prefix (str): Prefix of the returned column names, e.g. 'occ_'.
+
+    Returns:
+        dict: {name: pa.Array} for root (string), expiry (date32), option_type
+              (dictionary, 'C' or 'P') and strike (float64), in occ_fields order.
+    """
+    if isinstance(symbols, pa.ChunkedArray):
+        symbols = symbols.combine_chunks() if symbols.num_chunks else pa.array([], symbols.type)
+    symbols = decoded(symbols).cast(pa.string())
+    num_rows = len(symbols)
+    offsets = np.frombuffer(symbols.buffers()[1], dtype=np.int32)[symbols.offset:symbols.offset + num_rows + 1]
+    data_buffer = symbols.buffers()[2]
+    data = np.frombuffer(data_buffer, dtype=np.uint8) if data_buffer is not None else np.zeros(0, np.uint8)
+
+    lengths = np.diff(offsets)
+    valid = (lengths > OCC_TAIL_LENGTH) & (lengths <= OCC_TAIL_LENGTH + 6)
+    if symbols.null_count:
+        valid &= symbols.is_valid().to_numpy(zero_copy_only=False)
+    if len(data) < OCC_TAIL_LENGTH:  # Every symbol is too short
+        data = np.zeros(OCC_TAIL_LENGTH, dtype=np.uint8)
+    # Invalid rows read from position 0 instead, so every read stays in the buffer
+    tail_start = np.where(valid, offsets[1:] - OCC_TAIL_LENGTH, 0)
+
+    # Overlapping little-endian 8-byte words, one starting at every byte of the buffer:
+    # one gather reads 8 characters of every symbol
+    words = np.ndarray(shape=(len(data) - 7,), dtype="<u8", buffer=data, strides=(1,))
+    # YYMMDD as the 8 digits '00YYMMDD' (the word also holds the type and a strike digit)
+    yymmdd, date_digits = _parse_ascii_digits((words[tail_start] << np.uint64(16)) | np.uint64(0x3030))
+    strike_units, strike_digits = _parse_ascii_digits(words[tail_start + 7])
+    option_type = data[tail_start + 6]
+    is_call = option_type == ord("C")
+    # Expiry as days since 1970-01-01; impossible dates (month 13, Feb 30) are -1
+    expiry = _OCC_EXPIRY_DAYS[np.minimum(yymmdd, len(_OCC_EXPIRY_DAYS) - 1)]
+    valid &= date_digits & strike_digits & (is_call | (option_type == ord("P"))) & (expiry >= 0)
+    null_mask = ~valid
+
+    root = pc.utf8_slice_codeunits(symbols, 0, -OCC_TAIL_LENGTH)
+    if (data[np.maximum(tail_start - 1, 0)][valid] == ord(" ")).any():  # OSI form, root padded to 6
+        root = pc.utf8_rtrim(root, characters=" ")
+    values = [
+        pc.if_else(pa.array(valid), root, pa.scalar(None, pa.string())),
+        pa.array(expiry, type=pa.int32(), mask=null_mask).cast(pa.date32()),
+        pa.DictionaryArray.from_arrays(pa.array((~is_call).astype(np.int32), mask=null_mask)
+                                       if num_rows else pa.array([], pa.int32()), pa.array(["C", "P"])),
+        pa.array(strike_units / 1000.0, type=pa.float64(), mask=null_mask),
+    ]
+    return {field.name: value for field, value in zip(occ_fields(prefix), values)}
+
+
+def _parse_ascii_digits(words):
+    """
+    Decode uint64 words of 8 ASCII characters (first character in the lowest byte)
+    as 8-digit numbers, e.g. b'00565000' -> 565000, by merging adjacent digits, then
+    pairs, then quads (SWAR). Returns (values, mask of the words that are all digits).
+    """
+    digits = words - np.uint64(0x3030303030303030)
+    # A byte below '0' wraps to >= 0x80, and one above '9' gets there once 0x76 is added
+    check = digits + np.uint64(0x7676767676767676)
+    check |= digits
+    check &= np.uint64(0x8080808080808080)
+    for shift, factor, mask in ((8, 10, 0x00FF00FF00FF00FF), (16, 100, 0x0000FFFF0000FFFF), (32, 10000, 0xFFFFFFFF)):
+        high = digits >> np.uint64(shift)
+        digits *= np.uint64(factor)
+        digits += high
+        digits &= np.uint64(mask)
+    return digits, check == 0
+
+
+# Days since 1970-01-01 of every OCC expiry 20YY-MM-DD, indexed by YYMMDD; -1 where
+# YYMMDD is not a date
+_OCC_DATES = np.arange("2000-01-01", "2100-01-01", dtype="datetime64[D]")
+_OCC_EXPIRY_DAYS = np.full(1_000_000, -1, dtype=np.int32)
+_OCC_EXPIRY_DAYS[(_OCC_DATES.astype("datetime64[Y]").astype(np.int64) - 30) * 10000
+                 + (_OCC_DATES.astype("datetime64[M]").astype(np.int64) % 12 + 1) * 100
+                 + (_OCC_DATES - _OCC_DATES.astype("datetime64[M]")).astype(np.int64) + 1] = _OCC_DATES.astype(np.int64)
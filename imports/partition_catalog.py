@@ -0,0 +1,517 @@
+import os
+import json
+import sqlite3
+import hashlib
+from contextlib import contextmanager
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tradeovant.imports.storage_paths import base_path as default_base_path
+
+
+# ------------------------------------------------------------------------------
+# PARTITION CATALOG
+# ------------------------------------------------------------------------------
+@contextmanager
+def sqlite_transaction(db_path, write=True):
+    """
+    Open a short-lived SQLite connection and run the block as one transaction.
+    Writes take the write lock up front (BEGIN IMMEDIATE), so concurrent jobs queue on
+    it instead of failing mid-update. Reads (write=False) use a deferred transaction,
+    which in WAL mode reads a consistent snapshot without waiting for writers.
+    """
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+
+SCHEMA_VERSION_KEY = b"tradeovant.schema_version"  # Parquet key-value metadata of the registered schema version
+RENAMED_FROM_KEY = b"tradeovant.renamed_from"  # Field metadata: comma-separated former names of a column
+
+
+def schema_fingerprint(schema):
+    """
+    Return a short, stable hash of an Arrow schema (names, types and nullability).
+    Schema-level metadata (e.g. the pandas block) is ignored.
+    """
+    schema_str = schema.remove_metadata().to_string(show_field_metadata=False, show_schema_metadata=False)
+    return hashlib.sha256(schema_str.encode("utf-8")).hexdigest()[:16]
+
+
+def renamed_from(field):
+    """Former names of a column, from its RENAMED_FROM_KEY field metadata."""
+    names = (field.metadata or {}).get(RENAMED_FROM_KEY)
+    return names.decode("utf-8").split(",") if names else []
+
+
+def fold_schema(unified, schema, dataset=""):
+    """
+    Unified schema of a dataset after a file with schema: unified's columns in their
+    order, a column renamed in schema (see renamed_from) taking the old column's
+    place, columns schema adds appended, and a column whose type changed taking the
+    new type. Schema metadata is dropped.
+    """
+    fields = list(unified)
+    names = [field.name for field in fields]
+    for field in schema:
+        if field.name not in names:
+            old_names = [name for name in renamed_from(field) if name in names]
+            if old_names:
+                print(f"Schema drift in {dataset}: column '{old_names[0]}' renamed to '{field.name}'")
+                names[names.index(old_names[0])] = field.name
+                fields[names.index(field.name)] = field
+            else:
+                names.append(field.name)
+                fields.append(field)
+            continue
+        index = names.index(field.name)
+        if not fields[index].type.equals(field.type):
+            print(f"Schema drift in {dataset}: column '{field.name}' changes type {fields[index].type} -> {field.type}")
+            fields[index] = field
+    return pa.schema(fields)
+
+
+def _partition_stats(partition_dir):
+    """
+    Collect row count, byte size, file count, schema fingerprint and registered
+    schema version (see PartitionCatalog.register_schema) for the parquet files in
+    a single partition directory (read from the footers only).
+    """
+    row_count, byte_size, file_count, fingerprint, schema_version = 0, 0, 0, None, None
+    with os.scandir(partition_dir) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.endswith(".parquet"):
+                continue
+            byte_size += entry.stat().st_size
+            file_count += 1
+            metadata = pq.read_metadata(entry.path)
+            row_count += metadata.num_rows
+            if fingerprint is None:
+                fingerprint = schema_fingerprint(metadata.schema.to_arrow_schema())
+                version = (metadata.metadata or {}).get(SCHEMA_VERSION_KEY)
+                schema_version = int(version) if version is not None else None
+    return row_count, byte_size, file_count, fingerprint, schema_version
+
+
+class PartitionCatalog:
+    """
+    Persistent manifest of the hive partitions (e.g. file_version_date=YYYYMMDD)
+    written under the local buckets, kept in a small SQLite file.
+
+    Incremental jobs read their source/target partitions from here instead of
+    listing directories. A dataset that has never been seen is scanned once to
+    bootstrap its entries; after that every writer records its partition with
+    record_partition and the directory is not listed again.
+
+    partition_commit records a partition only after its directory is in place, so an
+    entry always names a complete partition. While a recorded partition is being
+    rewritten, its directory is briefly missing (see swap_partition_dir): a reader
+    that planned from the catalog and then gets FileNotFoundError should retry.
+
+    It also holds the schema registry of datasets whose writers call
+    register_schema once a partition is committed: every distinct unified schema is
+    a numbered version, and each partition records the version its files have (from
+    their metadata stamp, or looked up by their schema fingerprint).
+    """
+    DB_NAME = "_partition_catalog.db"
+    PARTITION_COLUMNS = ("dataset, partition_column, partition_value, row_count, byte_size, file_count, "
+                         "schema_fingerprint, schema_version, written_at")
+
+    def __init__(self, db_path=None, base_path=None):
+        """
+        Parameters:
+            db_path (str): Path of the SQLite manifest. Defaults to BASE_PATH/_partition_catalog.db.
+            base_path (str): Root that dataset keys are made relative to. Defaults to BASE_PATH.
+        """
+        self.base_path = os.path.normpath(str(base_path or default_base_path()))
+        self.db_path = str(db_path or os.path.join(self.base_path, self.DB_NAME))
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        # WAL lets readers run alongside a writer; the mode is stored in the database file
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+        finally:
+            conn.close()
+
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS datasets (
+                    dataset TEXT NOT NULL,
+                    partition_column TEXT NOT NULL,
+                    scanned_at TEXT NOT NULL,
+                    PRIMARY KEY (dataset, partition_column)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS partitions (
+                    dataset TEXT NOT NULL,
+                    partition_column TEXT NOT NULL,
+                    partition_value TEXT NOT NULL,
+                    row_count INTEGER,
+                    byte_size INTEGER,
+                    file_count INTEGER,
+                    schema_fingerprint TEXT,
+                    written_at TEXT NOT NULL,
+                    schema_version INTEGER,
+                    PRIMARY KEY (dataset, partition_column, partition_value)
+                )""")
+            # Catalogs created before the schema registry
+            if "schema_version" not in [row[1] for row in conn.execute("PRAGMA table_info(partitions)")]:
+                conn.execute("ALTER TABLE partitions ADD COLUMN schema_version INTEGER")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_versions (
+                    dataset TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    schema BLOB NOT NULL,
+                    columns TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (dataset, version)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS partition_tiers (
+                    dataset TEXT NOT NULL,
+                    partition_column TEXT NOT NULL,
+                    partition_value TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    policy TEXT,
+                    written_at TEXT NOT NULL,
+                    PRIMARY KEY (dataset, partition_column, partition_value)
+                )""")
+
+    def _transaction(self):
+        return sqlite_transaction(self.db_path)
+
+    def _read_transaction(self):
+        return sqlite_transaction(self.db_path, write=False)
+
+    def dataset_key(self, dataset_path):
+        """
+        Normalize a dataset directory into its catalog key, e.g.
+          R:\\local_bucket\\raw_store\\whales\\optiontrades\\parquet -> raw_store/whales/optiontrades/parquet
+        Paths outside the base path are kept as-is (with forward slashes).
+        """
+        path = os.path.normpath(str(dataset_path))
+        if os.path.normcase(path).startswith(os.path.normcase(self.base_path) + os.sep):
+            path = path[len(self.base_path) + 1:]
+        return path.replace("\\", "/").rstrip("/")
+
+    def _bootstrap(self, conn, dataset, dataset_path, partition_column):
+        """
+        One-time scan of an uncatalogued dataset directory.
+        """
+        prefix = f"{partition_column}="
+        scanned_at = datetime.now().isoformat(timespec="seconds")
+        rows = []
+        if os.path.isdir(dataset_path):
+            with os.scandir(dataset_path) as entries:
+                for entry in entries:
+                    if entry.is_dir() and entry.name.startswith(prefix):
+                        stats = _partition_stats(entry.path)
+                        if stats[4] is None:
+                            stats = (*stats[:4], self._registered_version(conn, dataset, stats[3]))
+                        rows.append((dataset, partition_column, entry.name.split("=")[1], *stats, scanned_at))
+
+        conn.executemany(f"INSERT OR REPLACE INTO partitions ({self.PARTITION_COLUMNS}) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO datasets VALUES (?, ?, ?)", (dataset, partition_column, scanned_at))
+        print(f"Catalog bootstrapped {dataset} with {len(rows)} partitions")
+
+    def _ensure_dataset(self, conn, dataset_path, partition_column):
+        dataset = self.dataset_key(dataset_path)
+        known = conn.execute(
+            "SELECT 1 FROM datasets WHERE dataset = ? AND partition_column = ?",
+            (dataset, partition_column)
+        ).fetchone()
+        if not known:
+            self._bootstrap(conn, dataset, dataset_path, partition_column)
+        return dataset
+
+    def _ensure_known(self, dataset_path, partition_column):
+        """
+        Dataset key of dataset_path, bootstrapping the dataset first if it is uncatalogued.
+        The check is a read; only a miss takes the write lock (and checks again under it).
+        """
+        dataset = self.dataset_key(dataset_path)
+        with self._read_transaction() as conn:
+            known = conn.execute(
+                "SELECT 1 FROM datasets WHERE dataset = ? AND partition_column = ?",
+                (dataset, partition_column)
+            ).fetchone()
+        if not known:
+            with self._transaction() as conn:
+                self._ensure_dataset(conn, dataset_path, partition_column)
+        return dataset
+
+    def list_partitions(self, dataset_path, partition_column="file_version_date"):
+        """
+        Return a sorted list of partition values recorded for the dataset.
+
+        Parameters:
+            dataset_path (str): Dataset root directory (holding partition_column=<value> folders).
+            partition_column (str): Hive partition column name.
+        """
+        dataset = self._ensure_known(dataset_path, partition_column)
+        with self._read_transaction() as conn:
+            rows = conn.execute(
+                "SELECT partition_value FROM partitions WHERE dataset = ? AND partition_column = ? "
+                "ORDER BY partition_value",
+                (dataset, partition_column)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get_partition(self, dataset_path, partition_value, partition_column="file_version_date"):
+        """
+        Return the manifest entry of a single partition as a dict, or None if it is not recorded.
+        """
+        dataset = self._ensure_known(dataset_path, partition_column)
+        with self._read_transaction() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM partitions WHERE dataset = ? AND partition_column = ? AND partition_value = ?",
+                (dataset, partition_column, str(partition_value))
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record_partition(self, dataset_path, partition_value, partition_column="file_version_date"):
+        """
+        Record (or replace) a partition after it has been written. Stats are read
+        from the parquet footers of that partition directory only.
+
+        Parameters:
+            dataset_path (str): Dataset root directory.
+            partition_value (str): Partition value, e.g. '20250101'.
+            partition_column (str): Hive partition column name.
+        """
+        partition_dir = os.path.join(dataset_path, f"{partition_column}={partition_value}")
+        stats = _partition_stats(partition_dir)
+        written_at = datetime.now().isoformat(timespec="microseconds")
+
+        with self._transaction() as conn:
+            dataset = self._ensure_dataset(conn, dataset_path, partition_column)
+            if stats[4] is None:  # Files not stamped with a version: look their schema up in the registry
+                stats = (*stats[:4], self._registered_version(conn, dataset, stats[3]))
+            conn.execute(
+                f"INSERT OR REPLACE INTO partitions ({self.PARTITION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (dataset, partition_column, str(partition_value), *stats, written_at)
+            )
+        return {
+            "row_count": stats[0],
+            "byte_size": stats[1],
+            "file_count": stats[2],
+            "schema_fingerprint": stats[3],
+            "schema_version": stats[4],
+            "written_at": written_at,
+        }
+
+    def set_tier(self, dataset_path, partition_value, tier, policy=None, partition_column="file_version_date"):
+        """
+        Mark a recorded partition as being in a storage tier (e.g. 'cold'). The mark holds
+        for the partition's current written_at only: rewriting the partition makes it 'hot' again.
+        """
+        dataset = self.dataset_key(dataset_path)
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT written_at FROM partitions WHERE dataset = ? AND partition_column = ? AND partition_value = ?",
+                (dataset, partition_column, str(partition_value))
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Partition {partition_column}={partition_value} of {dataset} is not in the catalog")
+            conn.execute(
+                "INSERT OR REPLACE INTO partition_tiers VALUES (?, ?, ?, ?, ?, ?)",
+                (dataset, partition_column, str(partition_value), tier,
+                 json.dumps(policy) if policy is not None else None, row[0])
+            )
+
+    def get_tier(self, dataset_path, partition_value, partition_column="file_version_date"):
+        """
+        (tier, policy) of a recorded partition, as stored by set_tier, or None when it
+        has no mark matching its current version (i.e. it is 'hot').
+        """
+        dataset = self.dataset_key(dataset_path)
+        with self._read_transaction() as conn:
+            row = conn.execute(
+                "SELECT t.tier, t.policy FROM partitions p JOIN partition_tiers t ON t.dataset = p.dataset "
+                "AND t.partition_column = p.partition_column AND t.partition_value = p.partition_value "
+                "AND t.written_at = p.written_at "
+                "WHERE p.dataset = ? AND p.partition_column = ? AND p.partition_value = ?",
+                (dataset, partition_column, str(partition_value))
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]) if row[1] is not None else None
+
+    def list_tiers(self, dataset_path, partition_column="file_version_date"):
+        """
+        {partition_value: tier} for every recorded partition; 'hot' unless a set_tier
+        mark matches the partition's current version.
+        """
+        dataset = self._ensure_known(dataset_path, partition_column)
+        with self._read_transaction() as conn:
+            rows = conn.execute(
+                "SELECT p.partition_value, t.tier FROM partitions p "
+                "LEFT JOIN partition_tiers t ON t.dataset = p.dataset AND t.partition_column = p.partition_column "
+                "AND t.partition_value = p.partition_value AND t.written_at = p.written_at "
+                "WHERE p.dataset = ? AND p.partition_column = ? ORDER BY p.partition_value",
+                (dataset, partition_column)
+            ).fetchall()
+        return {value: tier or "hot" for value, tier in rows}
+
+    def remove_partition(self, dataset_path, partition_value, partition_column="file_version_date"):
+        """
+        Drop a partition from the manifest (call after removing its directory).
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM partitions WHERE dataset = ? AND partition_column = ? AND partition_value = ?",
+                (self.dataset_key(dataset_path), partition_column, str(partition_value))
+            )
+
+    def refresh(self, dataset_path, partition_column="file_version_date"):
+        """
+        Forget everything recorded for a dataset and rescan its directory.
+        Use after the dataset was changed by something that does not update the catalog.
+        """
+        dataset = self.dataset_key(dataset_path)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM partitions WHERE dataset = ? AND partition_column = ?", (dataset, partition_column))
+            self._bootstrap(conn, dataset, dataset_path, partition_column)
+
+    @staticmethod
+    def _latest_schema(conn, dataset):
+        row = conn.execute(
+            "SELECT version, schema FROM schema_versions WHERE dataset = ? ORDER BY version DESC LIMIT 1", (dataset,)
+        ).fetchone()
+        return (row[0], pa.ipc.read_schema(pa.py_buffer(row[1]))) if row else None
+
+    @staticmethod
+    def _registered_version(conn, dataset, fingerprint):
+        if fingerprint is None:
+            return None
+        row = conn.execute(
+            "SELECT max(version) FROM schema_versions WHERE dataset = ? AND fingerprint = ?", (dataset, fingerprint)
+        ).fetchone()
+        return row[0]
+
+    def unify_schema(self, dataset_path, schema):
+        """
+        Schema a file about to be written should have: its columns folded into the
+        dataset's latest registered schema (see fold_schema). Read-only; the result is
+        registered with register_schema once the partition is committed. Writers
+        project their data onto it (see project_to_schema), so every file of a
+        version has exactly the same columns.
+
+        Parameters:
+            dataset_path (str): Dataset root directory.
+            schema (pa.Schema): Columns of the file (schema metadata is ignored).
+
+        Returns:
+            pa.Schema: The unified schema, without schema metadata.
+        """
+        dataset = self.dataset_key(dataset_path)
+        with self._read_transaction() as conn:
+            latest = self._latest_schema(conn, dataset)
+        return fold_schema(latest[1] if latest else pa.schema([]), schema, dataset)
+
+    def register_schema(self, dataset_path, schema, partition_value=None, partition_column="file_version_date"):
+        """
+        Record the schema of a committed partition in the dataset's registry: it is
+        folded into the latest version (see fold_schema), and when that changes the
+        latest version it is stored as the next version. With partition_value, the
+        partition's catalog entry gets the version if its files have that schema
+        (a partition planned against an older latest stays behind, see
+        partitions_behind).
+
+        Parameters:
+            dataset_path (str): Dataset root directory.
+            schema (pa.Schema): Columns of the partition's files (schema metadata is ignored).
+            partition_value (str): Partition written with schema, e.g. '20250101'.
+            partition_column (str): Hive partition column name.
+
+        Returns:
+            (int, pa.Schema): The version and its unified schema, with the version in
+                              its metadata under SCHEMA_VERSION_KEY.
+        """
+        dataset = self.dataset_key(dataset_path)
+        with self._transaction() as conn:
+            latest = self._latest_schema(conn, dataset)
+            version, unified = latest or (0, pa.schema([]))
+            candidate = fold_schema(unified, schema, dataset)
+            if latest is None or not candidate.equals(unified, check_metadata=False):
+                added = [name for name in candidate.names if name not in unified.names]
+                version += 1
+                conn.execute(
+                    "INSERT INTO schema_versions VALUES (?, ?, ?, ?, ?, ?)",
+                    (dataset, version, candidate.serialize().to_pybytes(),
+                     json.dumps([[field.name, str(field.type)] for field in candidate]),
+                     schema_fingerprint(candidate), datetime.now().isoformat(timespec="seconds"))
+                )
+                print(f"Registered schema version {version} of {dataset}"
+                      + (f" (added {added})" if latest is not None and added else ""))
+                unified = candidate
+            if partition_value is not None:
+                conn.execute(
+                    "UPDATE partitions SET schema_version = ? WHERE dataset = ? AND partition_column = ? "
+                    "AND partition_value = ? AND schema_fingerprint = ?",
+                    (version, dataset, partition_column, str(partition_value), schema_fingerprint(unified))
+                )
+        return version, unified.with_metadata({SCHEMA_VERSION_KEY: str(version).encode("ascii")})
+
+    def get_schema(self, dataset_path, version=None):
+        """
+        (version, schema) of a registered schema version (the latest by default),
+        or None when the dataset has no registered schema.
+        """
+        dataset = self.dataset_key(dataset_path)
+        with self._read_transaction() as conn:
+            if version is None:
+                row = conn.execute(
+                    "SELECT version, schema FROM schema_versions WHERE dataset = ? ORDER BY version DESC LIMIT 1",
+                    (dataset,)
+                ).fetchone()
+            else:
+                row = conn.execute("SELECT version, schema FROM schema_versions WHERE dataset = ? AND version = ?",
+                                   (dataset, int(version))).fetchone()
+        if row is None:
+            return None
+        schema = pa.ipc.read_schema(pa.py_buffer(row[1]))
+        return row[0], schema.with_metadata({SCHEMA_VERSION_KEY: str(row[0]).encode("ascii")})
+
+    def list_schema_versions(self, dataset_path):
+        """
+        [{'version', 'columns', 'fingerprint', 'created_at'}, ...] of a dataset, oldest first.
+        """
+        with self._read_transaction() as conn:
+            rows = conn.execute(
+                "SELECT version, columns, fingerprint, created_at FROM schema_versions WHERE dataset = ? "
+                "ORDER BY version", (self.dataset_key(dataset_path),)
+            ).fetchall()
+        return [{"version": version, "columns": json.loads(columns), "fingerprint": fingerprint,
+                 "created_at": created_at} for version, columns, fingerprint, created_at in rows]
+
+    def partitions_behind(self, dataset_path, partition_column="file_version_date", include_unversioned=True):
+        """
+        Partition values written with an older schema version than the latest one
+        (or, with include_unversioned, before the registry existed) whose columns
+        also differ from it, i.e. the partitions conform_dataset would rewrite.
+        """
+        latest = self.get_schema(dataset_path)
+        if latest is None:
+            return []
+        dataset = self._ensure_known(dataset_path, partition_column)
+        with self._read_transaction() as conn:
+            rows = conn.execute(
+                "SELECT partition_value FROM partitions WHERE dataset = ? AND partition_column = ? "
+                "AND (schema_version < ? OR (? AND schema_version IS NULL)) "
+                "AND (schema_fingerprint IS NULL OR schema_fingerprint != ?) ORDER BY partition_value",
+                (dataset, partition_column, latest[0], int(include_unversioned), schema_fingerprint(latest[1]))
+            ).fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,154 @@
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from tradeovant.imports.dataset_index import DatasetIndex, indexed_columns
+from tradeovant.imports.hot_cache import hot_cache_enabled, refresh_hot_cache
+from tradeovant.imports.storage_paths import fsync_dir, fsync_tree
+
+
+# ------------------------------------------------------------------------------
+# ATOMIC PARTITION COMMITS
+# ------------------------------------------------------------------------------
+def staging_dir(dataset_path):
+    """
+    Hidden folder next to a dataset (same filesystem, outside its globs) that holds
+    in-flight partition writes and lock files, e.g.
+      .../whales/optiontrades/parquet -> .../whales/optiontrades/.parquet.staging
+    """
+    dataset_path = os.path.normpath(str(dataset_path))
+    return os.path.join(os.path.dirname(dataset_path), f".{os.path.basename(dataset_path)}.staging")
+
+
+def _lock_file(fd):
+    """
+    Take a non-blocking exclusive OS lock on an open lock file; raises OSError while
+    another handle holds it.
+    """
+    if os.name == "nt":
+        import msvcrt  # Windows only
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl  # POSIX only
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock_file(fd):
+    if os.name == "nt":
+        import msvcrt
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class PartitionLock:
+    """
+    Exclusive per-partition lock, so only one process (or thread) at a time can rewrite
+    a given partition. It is an OS lock on a lock file in the staging folder (flock on
+    POSIX, msvcrt.locking on Windows), which the OS drops when its holder exits or
+    crashes: there are no stale locks to detect or break. Lock files stay in place.
+    """
+
+    def __init__(self, dataset_path, partition_value, partition_column="file_version_date", timeout=600):
+        self.lock_path = os.path.join(staging_dir(dataset_path), f"{partition_column}={partition_value}.lock")
+        self.timeout = timeout
+        self._fd = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                _lock_file(fd)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for partition lock: {self.lock_path}") from None
+                time.sleep(0.2)
+        self._fd = fd
+        return self
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            _unlock_file(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def swap_partition_dir(new_dir, partition_dir):
+    """
+    Move a fully written directory into place as partition_dir. An existing partition
+    is first renamed aside, then new_dir is renamed to partition_dir, so readers see
+    the old or the new files but never a half-written partition.
+
+    The two renames are not one atomic step: in between (a few microseconds) the
+    partition directory does not exist. A reader that lists or opens it at that
+    moment misses the partition or gets FileNotFoundError, and should retry.
+    """
+    trash_dir = None
+    if os.path.exists(partition_dir):
+        trash_dir = os.path.join(os.path.dirname(new_dir), f".trash-{uuid.uuid4().hex}")
+        os.rename(partition_dir, trash_dir)
+    os.makedirs(os.path.dirname(partition_dir), exist_ok=True)
+    os.rename(new_dir, partition_dir)
+    fsync_dir(os.path.dirname(partition_dir))
+    if trash_dir:
+        shutil.rmtree(trash_dir, ignore_errors=True)
+
+
+@contextmanager
+def partition_commit(dataset_path, partition_value, partition_column="file_version_date", catalog=None):
+    """
+    Write a partition with a commit protocol instead of rmtree + write in place:
+      1) take the partition lock,
+      2) yield a hidden temp directory to write the partition's files into,
+      3) fsync it and swap it in as dataset_path/partition_column=partition_value
+         (see swap_partition_dir for the brief window in which a rewritten partition is missing),
+      4) record the partition in the catalog (if given) and refresh the dataset's hot
+         cache when it is listed in HOT_CACHE_DATASETS and this is its latest partition,
+      5) re-index the partition when the dataset is listed in INDEXED_DATASETS.
+    If the block raises, the temp directory is discarded and the old partition is untouched.
+
+    Example:
+        with partition_commit(stage_path, "20250101", catalog=storage.catalog) as tmp_dir:
+            pq.write_table(table, os.path.join(tmp_dir, "data.parquet"))
+    """
+    partition_dir = os.path.join(dataset_path, f"{partition_column}={partition_value}")
+    with PartitionLock(dataset_path, partition_value, partition_column):
+        tmp_dir = os.path.join(staging_dir(dataset_path), f".tmp-{partition_column}={partition_value}-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            yield tmp_dir
+            fsync_tree(tmp_dir)
+            swap_partition_dir(tmp_dir, partition_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        if catalog is not None:
+            catalog.record_partition(dataset_path, partition_value, partition_column)
+            if hot_cache_enabled(dataset_path):
+                try:
+                    refresh_hot_cache(dataset_path, partition_column, catalog, if_latest=partition_value)
+                except Exception as e:
+                    print(f"Error refreshing hot cache of {dataset_path}: {e}")
+        bloom_columns = indexed_columns(dataset_path)
+        if bloom_columns is not None:
+            try:
+                DatasetIndex(dataset_path, bloom_columns, partition_column).refresh([partition_value])
+            except Exception as e:
+                print(f"Error refreshing index of {dataset_path}: {e}")
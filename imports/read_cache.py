@@ -0,0 +1,119 @@
+import os
+import time
+import uuid
+from tradeovant.imports.io_stats import IO_STATS, io_timer
+from tradeovant.imports.partition_catalog import sqlite_transaction
+
+
+# ------------------------------------------------------------------------------
+# READ-THROUGH CACHE
+# ------------------------------------------------------------------------------
+class ReadCache:
+    """
+    Disk cache of remote objects keyed by (bucket, key) and validated by ETag,
+    evicted least-recently-used first once the cached bytes exceed max_bytes.
+    Files keep their key layout under cache_dir/<bucket>/ so hive folders survive.
+    """
+    DIR_NAME = "_read_cache"
+    DB_NAME = "_read_cache.db"
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self.db_path = os.path.join(self.cache_dir, self.DB_NAME)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    bucket TEXT NOT NULL,
+                    object_key TEXT NOT NULL,
+                    etag TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (bucket, object_key)
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_access ON cache_entries (last_access)")
+
+    def entry_path(self, bucket_name, bucket_key):
+        return os.path.join(self.cache_dir, bucket_name, *bucket_key.replace("\\", "/").split("/"))
+
+    def get_path(self, backend, bucket_name, bucket_key, etag=None, size=None, evict=True):
+        """
+        Return the cached local path of an object, downloading it on a miss or when
+        its ETag changed. A HEAD request is made only when etag is not given.
+        Pass evict=False when fetching a batch and call evict(keep=...) once at the end.
+        """
+        if etag is None:
+            head = backend.head_object(bucket_name, bucket_key)
+            etag, size = head["ETag"], head["Size"]
+        path = self.entry_path(bucket_name, bucket_key)
+
+        with sqlite_transaction(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT etag FROM cache_entries WHERE bucket = ? AND object_key = ?", (bucket_name, bucket_key)
+            ).fetchone()
+            if row and row[0] == etag and os.path.exists(path):
+                conn.execute(
+                    "UPDATE cache_entries SET last_access = ? WHERE bucket = ? AND object_key = ?",
+                    (time.time(), bucket_name, bucket_key)
+                )
+                IO_STATS.record("read_cache_hit", bucket_name, bucket_key, files=1)
+                return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with io_timer("read_cache_fetch", bucket_name, bucket_key) as io_counters:
+                backend.download_file(bucket_name, bucket_key, tmp_path)
+                io_counters["files"] = 1
+                io_counters["bytes_read"] = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries VALUES (?, ?, ?, ?, ?)",
+                (bucket_name, bucket_key, etag, os.path.getsize(path), time.time())
+            )
+        if evict:
+            self.evict(keep={(bucket_name, bucket_key)})
+        return path
+
+    def evict(self, max_bytes=None, keep=None):
+        """
+        Remove least-recently-used entries until the cache fits in max_bytes
+        (defaults to the cache budget). Entries in keep, a set of (bucket, key), are never removed.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with sqlite_transaction(self.db_path) as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+            if total <= max_bytes:
+                return 0
+            victims = []
+            for bucket_name, bucket_key, size in conn.execute(
+                    "SELECT bucket, object_key, size FROM cache_entries ORDER BY last_access").fetchall():
+                if total <= max_bytes:
+                    break
+                if keep and (bucket_name, bucket_key) in keep:
+                    continue
+                victims.append((bucket_name, bucket_key))
+                total -= size
+            conn.executemany("DELETE FROM cache_entries WHERE bucket = ? AND object_key = ?", victims)
+
+        for bucket_name, bucket_key in victims:
+            path = self.entry_path(bucket_name, bucket_key)
+            if os.path.exists(path):
+                os.remove(path)
+        if victims:
+            print(f"Evicted {len(victims)} object(s) from the read cache")
+        return len(victims)
+
+    def clear(self):
+        """
+        Remove every cached object.
+        """
+        return self.evict(max_bytes=0)
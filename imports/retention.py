@@ -0,0 +1,78 @@
+import os
+import shutil
+from datetime import datetime
+from tradeovant.imports.compaction import compact_partition
+from tradeovant.imports.partition_catalog import PartitionCatalog
+from tradeovant.imports.partition_commit import PartitionLock
+from tradeovant.imports.writer_profiles import WRITER_PROFILES
+
+
+# ------------------------------------------------------------------------------
+# RETENTION AND COLD TIER
+# ------------------------------------------------------------------------------
+COLD_PROFILE = "cold_archive"
+COLD_COMPRESSION = WRITER_PROFILES[COLD_PROFILE]["compression"]
+COLD_COMPRESSION_LEVEL = WRITER_PROFILES[COLD_PROFILE]["compression_level"]
+COLD_ROW_GROUP_SIZE = WRITER_PROFILES[COLD_PROFILE]["row_group_size"]
+COLD_TARGET_FILE_ROWS = 20_000_000
+
+
+def apply_retention(dataset_path, cold_after_days=None, delete_after_days=None, partition_column="file_version_date",
+                    catalog=None, today=None, compression=COLD_COMPRESSION, compression_level=COLD_COMPRESSION_LEVEL,
+                    row_group_size=COLD_ROW_GROUP_SIZE, target_file_rows=COLD_TARGET_FILE_ROWS, columns=None):
+    """
+    Apply a retention policy to a dataset partitioned by a YYYYMMDD column.
+
+    Partitions older than cold_after_days are rewritten in place into the cold tier
+    (high-level zstd, larger row groups and, if columns is given, only those columns)
+    through compact_partition, so the paths readers glob and the catalog entries stay
+    the same; the catalog marks them 'cold' so later runs skip them. Partitions older
+    than delete_after_days are removed from disk and the catalog.
+
+    Parameters:
+        dataset_path (str): Dataset root directory.
+        cold_after_days (int): Age in days after which partitions go cold. None to skip.
+        delete_after_days (int): Age in days after which partitions are deleted. None to keep forever.
+        partition_column (str): Hive partition column name (values must be YYYYMMDD).
+        catalog (PartitionCatalog): Catalog of the dataset. Defaults to PartitionCatalog().
+        today (date): Reference date. Defaults to today.
+        compression, compression_level, row_group_size, target_file_rows: Cold tier layout.
+        columns (list): Columns the cold tier keeps. Default is all.
+
+    Returns:
+        dict: {'cold': [partition_value, ...], 'deleted': [...], 'errors': [...]}
+    """
+    catalog = catalog or PartitionCatalog()
+    today = today or datetime.now().date()
+    policy = {"compression": compression, "compression_level": compression_level,
+              "row_group_size": row_group_size, "columns": columns}
+    result = {"cold": [], "deleted": [], "errors": []}
+
+    for partition_value, tier in catalog.list_tiers(dataset_path, partition_column).items():
+        try:
+            age_days = (today - datetime.strptime(partition_value, "%Y%m%d").date()).days
+        except ValueError:
+            continue
+
+        try:
+            if delete_after_days is not None and age_days > delete_after_days:
+                partition_dir = os.path.join(dataset_path, f"{partition_column}={partition_value}")
+                with PartitionLock(dataset_path, partition_value, partition_column):
+                    shutil.rmtree(partition_dir, ignore_errors=True)
+                    catalog.remove_partition(dataset_path, partition_value, partition_column)
+                result["deleted"].append(partition_value)
+            elif cold_after_days is not None and age_days > cold_after_days and tier != "cold":
+                keep = None if columns is None else list(columns) + [partition_column]
+                compact_partition(dataset_path, partition_value, partition_column, catalog,
+                                  target_file_rows=target_file_rows, row_group_size=row_group_size,
+                                  compression=compression, compression_level=compression_level,
+                                  columns=keep, force=True, profile=COLD_PROFILE)
+                catalog.set_tier(dataset_path, partition_value, "cold", policy, partition_column)
+                result["cold"].append(partition_value)
+        except Exception as e:
+            print(f"Error applying retention to {dataset_path} {partition_column}={partition_value}: {e}")
+            result["errors"].append(partition_value)
+
+    print(f"Retention on {dataset_path}: {len(result['cold'])} partition(s) moved to cold, "
+          f"{len(result['deleted'])} deleted, {len(result['errors'])} failed")
+    return result
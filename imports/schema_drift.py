@@ -0,0 +1,120 @@
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tradeovant.imports.clustering import CLUSTER_ROW_GROUP_SIZE, ClusteredParquetWriter, clustering_for
+from tradeovant.imports.partition_catalog import PartitionCatalog, renamed_from
+from tradeovant.imports.partition_commit import partition_commit
+from tradeovant.imports.retention import COLD_PROFILE
+from tradeovant.imports.storage_paths import partition_files
+from tradeovant.imports.writer_profiles import ProfiledParquetWriter
+
+
+# ------------------------------------------------------------------------------
+# SCHEMA DRIFT
+# ------------------------------------------------------------------------------
+def project_to_schema(data, schema):
+    """
+    Project a record batch or table onto schema, column by column: columns it has
+    are reused as they are (cast only when the type differs), a renamed column is
+    read from its former name (see renamed_from), columns it lacks become all-null
+    arrays, and columns schema does not list are dropped.
+
+    Returns:
+        pa.RecordBatch | pa.Table: Same kind as data, with exactly schema's columns.
+    """
+    columns = []
+    for field in schema:
+        index = data.schema.get_field_index(field.name)
+        for old_name in renamed_from(field):
+            if index >= 0:
+                break
+            index = data.schema.get_field_index(old_name)
+        if index < 0:
+            columns.append(pa.nulls(data.num_rows, field.type))
+        else:
+            column = data.column(index)
+            columns.append(column if column.type.equals(field.type) else column.cast(field.type))
+    if isinstance(data, pa.RecordBatch):
+        return pa.RecordBatch.from_arrays(columns, schema=schema)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def conform_partition(dataset_path, partition_value, partition_column="file_version_date", catalog=None,
+                      profile=None, convert=None, row_group_size=None, **write_kwargs):
+    """
+    Rewrite the files of one partition onto the dataset's latest registered schema
+    (see PartitionCatalog.register_schema), keeping their names (and so their symbol
+    buckets) and the dataset's clustering, in a partition_commit. Files are streamed
+    one row group at a time, so memory does not grow with the partition. Afterwards a
+    wide scan reads one schema from every conformed partition, with no union_by_name.
+    A partition in the cold tier (see apply_retention) is rewritten with its cold
+    layout instead of profile and stays cold; columns its policy dropped come back
+    as nulls.
+
+    Parameters:
+        convert (callable): Optional batch -> batch step run before the projection,
+                            e.g. to type the columns of a legacy all-string file.
+        row_group_size (int): Rows per read batch and written row group
+                              (default CLUSTER_ROW_GROUP_SIZE).
+        profile, **write_kwargs: Writer settings (see ProfiledParquetWriter).
+
+    Returns:
+        int: The schema version the partition now has.
+    """
+    catalog = catalog or PartitionCatalog()
+    latest = catalog.get_schema(dataset_path)
+    if latest is None:
+        raise ValueError(f"{dataset_path} has no registered schema")
+    version, schema = latest
+    tier = catalog.get_tier(dataset_path, partition_value, partition_column)
+    if tier is not None and tier[0] == "cold":
+        policy = tier[1] or {}
+        profile = COLD_PROFILE
+        write_kwargs = dict(write_kwargs, **{key: policy[key] for key in ("compression", "compression_level")
+                                             if policy.get(key) is not None})
+        row_group_size = policy.get("row_group_size") or row_group_size
+    row_group_size = row_group_size or CLUSTER_ROW_GROUP_SIZE
+    partition_dir = os.path.join(dataset_path, f"{partition_column}={partition_value}")
+    clustering = clustering_for(dataset_path)
+    with partition_commit(dataset_path, partition_value, partition_column, catalog=catalog) as tmp_dir:
+        for path in partition_files(partition_dir):
+            where = os.path.join(tmp_dir, os.path.basename(path))
+            if clustering is not None:
+                writer = ClusteredParquetWriter(where, schema, clustering, profile, row_group_size, **write_kwargs)
+            else:
+                writer = ProfiledParquetWriter(where, schema, profile, row_group_size=row_group_size, **write_kwargs)
+            try:
+                for batch in pq.ParquetFile(path).iter_batches(batch_size=row_group_size):
+                    writer.write_batch(project_to_schema(convert(batch) if convert else batch, schema))
+            finally:
+                writer.close()
+    if tier is not None:
+        catalog.set_tier(dataset_path, partition_value, tier[0], tier[1], partition_column)
+    return version
+
+
+def conform_dataset(dataset_path, partition_column="file_version_date", catalog=None, include_unversioned=False,
+                    **kwargs):
+    """
+    conform_partition every partition of a dataset written with an older schema
+    version than the latest (see PartitionCatalog.partitions_behind). Partitions
+    written before the registry existed are only included with include_unversioned,
+    a one-off migration that may rewrite the whole history. Run it as its own job
+    (see raw_whales_conform_schema), not after every build.
+    Extra keyword arguments go to conform_partition.
+
+    Returns:
+        dict: {'conformed': [...], 'errors': [...]} partition values.
+    """
+    catalog = catalog or PartitionCatalog()
+    result = {"conformed": [], "errors": []}
+    for partition_value in catalog.partitions_behind(dataset_path, partition_column, include_unversioned):
+        try:
+            conform_partition(dataset_path, partition_value, partition_column, catalog=catalog, **kwargs)
+            result["conformed"].append(partition_value)
+        except Exception as e:
+            print(f"Error conforming {dataset_path} {partition_column}={partition_value}: {e}")
+            result["errors"].append(partition_value)
+    print(f"Conformed {len(result['conformed'])} partition(s) of {dataset_path} to its latest schema, "
+          f"{len(result['errors'])} failed")
+    return result
@@ -0,0 +1,232 @@
+import os
+import shutil
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ------------------------------------------------------------------------------
+# STORAGE BACKENDS
+# ------------------------------------------------------------------------------
+class LocalFileBackend:
+    """
+    Objects live only in the local bucket directories. This is the default
+    backend: nothing to start, and neither boto3 nor moto is imported.
+    """
+    name = "local"
+    remote = False
+
+    def __init__(self, base_path):
+        self.base_path = str(base_path)
+
+    def create_buckets(self, bucket_names):
+        for bucket_name in bucket_names:
+            os.makedirs(os.path.join(self.base_path, bucket_name), exist_ok=True)
+
+    def upload_file(self, local_file, bucket_name, bucket_key):
+        target_path = os.path.join(self.base_path, bucket_name, bucket_key)
+        if os.path.abspath(local_file) != os.path.abspath(target_path):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            shutil.copy(local_file, target_path)
+
+    def download_file(self, bucket_name, bucket_key, local_path):
+        shutil.copy(os.path.join(self.base_path, bucket_name, bucket_key), local_path)
+
+    def delete_object(self, bucket_name, bucket_key):
+        file_path = os.path.join(self.base_path, bucket_name, bucket_key)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def upload_files(self, items, max_workers=None):
+        return _run_transfers(self.upload_file, items, 1)
+
+    def download_files(self, items, max_workers=None):
+        return _run_transfers(self.download_file, items, 1)
+
+    def stop(self):
+        pass
+
+
+class S3Backend:
+    """
+    Any S3-compatible endpoint (AWS, a local MinIO, ...) through boto3.
+    With rename_buckets, our local bucket names are mapped to valid S3 names, e.g.
+    raw_store -> raw-store; bucket names of third-party endpoints are used as given.
+
+    Transfers above MULTIPART_THRESHOLD are split into MULTIPART_CHUNKSIZE parts sent
+    MAX_CONCURRENCY at a time; upload_files/download_files run BATCH_WORKERS transfers
+    side by side. All of it shares one client whose connection pool is sized for both.
+    """
+    name = "s3"
+    remote = True
+    MULTIPART_THRESHOLD = 64 << 20
+    MULTIPART_CHUNKSIZE = 16 << 20
+    MAX_CONCURRENCY = 8  # Parts in flight per transfer
+    BATCH_WORKERS = 8  # Transfers in flight per batch
+
+    def __init__(self, region_name="us-east-1", endpoint_url=None, rename_buckets=False, **client_kwargs):
+        import boto3  # Only imported when an S3 backend is actually used
+        from botocore.config import Config
+        from boto3.s3.transfer import TransferConfig
+
+        self.region_name = region_name
+        self.endpoint_url = endpoint_url
+        self.rename_buckets = rename_buckets
+        client_kwargs.setdefault("config", Config(max_pool_connections=self.MAX_CONCURRENCY * self.BATCH_WORKERS))
+        self.s3 = boto3.client("s3", region_name=region_name, endpoint_url=endpoint_url, **client_kwargs)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=self.MULTIPART_THRESHOLD,
+            multipart_chunksize=self.MULTIPART_CHUNKSIZE,
+            max_concurrency=self.MAX_CONCURRENCY,
+            use_threads=True,
+        )
+
+    def remote_bucket(self, bucket_name):
+        return bucket_name.replace("_", "-") if self.rename_buckets else bucket_name
+
+    @staticmethod
+    def remote_key(bucket_key):
+        return str(bucket_key).replace("\\", "/").lstrip("/")
+
+    def create_buckets(self, bucket_names):
+        existing_buckets = {bucket["Name"] for bucket in self.s3.list_buckets().get("Buckets", [])}
+        for bucket_name in bucket_names:
+            if self.remote_bucket(bucket_name) not in existing_buckets:
+                self.s3.create_bucket(Bucket=self.remote_bucket(bucket_name))
+
+    def upload_file(self, local_file, bucket_name, bucket_key):
+        self.s3.upload_file(str(local_file), self.remote_bucket(bucket_name), self.remote_key(bucket_key),
+                            Config=self.transfer_config)
+
+    def download_file(self, bucket_name, bucket_key, local_path):
+        self.s3.download_file(self.remote_bucket(bucket_name), self.remote_key(bucket_key), str(local_path),
+                              Config=self.transfer_config)
+
+    def upload_files(self, items, max_workers=None):
+        """
+        Upload many (local_file, bucket_name, bucket_key) items over the shared client.
+        Returns [(item, error), ...] with error None on success.
+        """
+        return _run_transfers(self.upload_file, items, max_workers or self.BATCH_WORKERS)
+
+    def download_files(self, items, max_workers=None):
+        """
+        Download many (bucket_name, bucket_key, local_path) items over the shared client.
+        Returns [(item, error), ...] with error None on success.
+        """
+        return _run_transfers(self.download_file, items, max_workers or self.BATCH_WORKERS)
+
+    def delete_object(self, bucket_name, bucket_key):
+        self.s3.delete_object(Bucket=self.remote_bucket(bucket_name), Key=self.remote_key(bucket_key))
+
+    def head_object(self, bucket_name, bucket_key):
+        response = self.s3.head_object(Bucket=self.remote_bucket(bucket_name), Key=self.remote_key(bucket_key))
+        return {"Key": self.remote_key(bucket_key), "ETag": response["ETag"].strip('"'), "Size": response["ContentLength"]}
+
+    def iter_objects(self, bucket_name, prefix=""):
+        paginator = self.s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.remote_bucket(bucket_name), Prefix=self.remote_key(prefix)):
+            for obj in page.get("Contents", []):
+                yield {"Key": obj["Key"], "ETag": obj["ETag"].strip('"'), "Size": obj["Size"]}
+
+    def stop(self):
+        pass
+
+
+class MotoBackend(S3Backend):
+    """
+    In-memory S3 emulated by moto, for tests and dry runs of the S3 code paths.
+    """
+    name = "moto"
+
+    def __init__(self, region_name="us-east-1", **client_kwargs):
+        from moto import mock_s3  # Only imported when the moto backend is actually used
+
+        from botocore.config import Config
+
+        self.mock = mock_s3()
+        self.mock.start()
+        # moto 4 keeps the aws-chunked checksum framing of multipart parts in the stored
+        # object, so only send checksums when an operation requires them
+        pool_size = self.MAX_CONCURRENCY * self.BATCH_WORKERS
+        try:
+            config = Config(max_pool_connections=pool_size, request_checksum_calculation="when_required",
+                            response_checksum_validation="when_required")
+        except TypeError:  # botocore < 1.36 has no default checksums
+            config = Config(max_pool_connections=pool_size)
+        client_kwargs.setdefault("config", config)
+        super().__init__(region_name=region_name, **client_kwargs)
+
+    def stop(self):
+        self.mock.stop()
+
+
+def _run_transfers(transfer, items, max_workers):
+    """
+    Call transfer(*item) for every item on up to max_workers threads.
+    Returns [(item, error), ...] in input order, error None on success.
+    """
+    items = list(items)
+
+    def run(item):
+        try:
+            transfer(*item)
+            return item, None
+        except Exception as e:
+            return item, e
+
+    if max_workers <= 1 or len(items) <= 1:
+        return [run(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix="s3-transfer") as executor:
+        return list(executor.map(run, items))
+
+
+BACKEND_TYPES = {
+    LocalFileBackend.name: LocalFileBackend,
+    S3Backend.name: S3Backend,
+    MotoBackend.name: MotoBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name, base_path, buckets=(), region_name="us-east-1", endpoint_url=None):
+    """
+    Return the process-wide backend for the given settings, creating it (and its
+    buckets) on first use. Later LocalS3WithDirectory instances share it.
+
+    Parameters:
+        name (str): 'local', 'moto' or 's3'.
+        base_path (str): Local bucket root (used by the local backend).
+        buckets (list): Bucket names created on first use.
+        region_name (str): AWS region name for the S3/moto backends.
+        endpoint_url (str): S3-compatible endpoint, e.g. 'http://localhost:9000' for MinIO.
+    """
+    if name not in BACKEND_TYPES:
+        raise ValueError(f"Unknown storage backend '{name}'. Expected one of {sorted(BACKEND_TYPES)}")
+
+    cache_key = (name, str(base_path), region_name, endpoint_url)
+    with _backends_lock:
+        backend = _backends.get(cache_key)
+        if backend is None:
+            if name == LocalFileBackend.name:
+                backend = LocalFileBackend(base_path)
+            elif name == MotoBackend.name:
+                backend = MotoBackend(region_name=region_name, rename_buckets=True)
+            else:
+                backend = S3Backend(region_name=region_name, endpoint_url=endpoint_url, rename_buckets=True)
+            backend.create_buckets(buckets)
+            _backends[cache_key] = backend
+    return backend
+
+
+@atexit.register
+def stop_backends():
+    """
+    Stop every backend created in this process (registered to run at exit).
+    """
+    with _backends_lock:
+        for backend in _backends.values():
+            backend.stop()
+        _backends.clear()
@@ -0,0 +1,86 @@
+import os
+
+
+# ------------------------------------------------------------------------------
+# STORAGE PATHS
+# ------------------------------------------------------------------------------
+# Path and file helpers shared by the storage modules. LocalS3WithDirectory is looked
+# up when a helper runs rather than at import time, because common_utils itself
+# imports the modules that use these helpers.
+def _storage_class():
+    from tradeovant.imports.common_utils import LocalS3WithDirectory
+    return LocalS3WithDirectory
+
+
+def base_path():
+    """
+    Local bucket root, LocalS3WithDirectory.BASE_PATH.
+    """
+    return _storage_class().BASE_PATH
+
+
+def storage_location(path):
+    """
+    Split a filesystem path under LocalS3WithDirectory.BASE_PATH into (bucket, key).
+    Paths outside the bucket root come back as ('', path).
+    """
+    try:
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(base_path()))
+    except ValueError:  # Different drive on Windows
+        return "", str(path)
+    if relative.startswith(".."):
+        return "", str(path)
+    bucket_name, _, bucket_key = relative.replace("\\", "/").partition("/")
+    return bucket_name, bucket_key
+
+
+def dataset_setting(name, dataset_path):
+    """
+    Entry of dataset_path in one of the per-dataset settings of LocalS3WithDirectory,
+    e.g. dataset_setting('BUCKETED_DATASETS', path) -> ('underlying_symbol', 16).
+    Datasets are keyed '<bucket>/<key>'. Returns None when the dataset is not listed
+    (True for list settings such as HOT_CACHE_DATASETS).
+    """
+    bucket_name, bucket_key = storage_location(dataset_path)
+    dataset = f"{bucket_name}/{bucket_key}".rstrip("/")
+    setting = getattr(_storage_class(), name)
+    if isinstance(setting, dict):
+        return setting.get(dataset)
+    return True if dataset in setting else None
+
+
+def partition_files(partition_dir):
+    """
+    Sorted parquet files of a partition directory (hidden and '_' files excluded).
+    """
+    return sorted(
+        entry.path for entry in os.scandir(partition_dir)
+        if entry.is_file() and entry.name.endswith(".parquet") and not entry.name.startswith((".", "_"))
+    )
+
+
+def fsync_tree(path):
+    """
+    Flush every file under path (and the directories themselves where the OS allows it).
+    """
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            fd = os.open(os.path.join(root, name), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        fsync_dir(root)
+
+
+def fsync_dir(path):
+    """
+    Flush a directory entry (new or renamed children) to disk. No-op on Windows.
+    """
+    if os.name == "nt":
+        return  # Directories cannot be opened for fsync on Windows
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,381 @@
+import os
+import shutil
+import json
+import time
+import uuid
+from contextlib import contextmanager
+import pyarrow.parquet as pq
+from tradeovant.imports.dataset_index import json_stat
+from tradeovant.imports.storage_paths import fsync_dir
+
+
+# ------------------------------------------------------------------------------
+# TRANSACTION LOG TABLES
+# ------------------------------------------------------------------------------
+class CommitConflictError(Exception):
+    """
+    Raised when a concurrent commit touched the same partitions as ours.
+    """
+
+
+def parquet_file_stats(path):
+    """
+    File-level statistics from a parquet footer: row count plus per-column
+    min/max (over all row groups) and null counts.
+    """
+    metadata = pq.read_metadata(path)
+    stats = {"numRecords": metadata.num_rows, "minValues": {}, "maxValues": {}, "nullCount": {}}
+    for col in range(metadata.num_columns):
+        name = metadata.schema.column(col).path
+        mins, maxs, nulls = [], [], 0
+        for rg in range(metadata.num_row_groups):
+            col_stats = metadata.row_group(rg).column(col).statistics
+            if col_stats is None:
+                mins = maxs = None
+                break
+            nulls += col_stats.null_count or 0
+            if col_stats.has_min_max:
+                mins.append(col_stats.min)
+                maxs.append(col_stats.max)
+        if mins:
+            stats["minValues"][name] = json_stat(min(mins))
+            stats["maxValues"][name] = json_stat(max(maxs))
+        if mins is not None:
+            stats["nullCount"][name] = nulls
+    return stats
+
+
+class TransactionLogTable:
+    """
+    Lightweight table format over a hive-partitioned dataset directory.
+
+    Every commit is one JSON-lines file, _txn_log/<version:020d>.json, holding
+    'commitInfo', 'metaData', 'add' and 'remove' actions (shaped like Delta Lake's).
+    A version file is created with a hard link, which fails if the version exists, so
+    a multi-file commit becomes visible all at once or not at all. Snapshots replay the
+    log from the newest checkpoint, so readers plan from the log instead of listing
+    directories and never see half-written files. Replaced files stay on disk until
+    vacuum(), which keeps older snapshots readable (time travel).
+
+    Hive globs over the directory also see replaced files, so datasets written through
+    this class must be read with files() / read_parquet_sql(), or vacuumed with
+    retain_versions=1 right after every commit.
+
+    Usage:
+        table = TransactionLogTable(dataset_path)
+        with table.write_partition("20250101") as tmp_dir:
+            pq.write_table(arrow_table, os.path.join(tmp_dir, "data.parquet"))
+        conn.execute(f"SELECT * FROM {table.read_parquet_sql(version=3)}")
+    """
+    LOG_DIR = "_txn_log"
+    CHECKPOINT_INTERVAL = 20  # Versions between full-snapshot checkpoints
+    COMMIT_RETRIES = 10
+
+    def __init__(self, dataset_path, partition_column="file_version_date"):
+        self.dataset_path = str(dataset_path)
+        self.partition_column = partition_column
+        self.log_path = os.path.join(self.dataset_path, self.LOG_DIR)
+
+    # -- log files -------------------------------------------------------------
+    def _version_path(self, version):
+        return os.path.join(self.log_path, f"{version:020d}.json")
+
+    def _checkpoint_path(self, version):
+        return os.path.join(self.log_path, f"{version:020d}.checkpoint.json")
+
+    def versions(self):
+        """
+        All committed versions, ascending.
+        """
+        if not os.path.isdir(self.log_path):
+            return []
+        return sorted(
+            int(name[:20]) for name in os.listdir(self.log_path)
+            if len(name) == 25 and name.endswith(".json") and name[:20].isdigit()
+        )
+
+    def latest_version(self):
+        """
+        The newest committed version, or None for a table without a log.
+        """
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def _read_actions(self, version):
+        with open(self._version_path(version), "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _commit_info(self, version):
+        """
+        commitInfo of a version, read from the first line of its file only.
+        """
+        with open(self._version_path(version), "r", encoding="utf-8") as f:
+            return json.loads(f.readline())["commitInfo"]
+
+    def _version_as_of(self, versions, as_of):
+        """
+        Last version committed at or before as_of. Commit timestamps increase with the
+        version (see commit), so this is a binary search that reads ~log2(n) commitInfo lines.
+        """
+        as_of_ms = int(as_of.timestamp() * 1000)
+        low, high = 0, len(versions)
+        while low < high:
+            mid = (low + high) // 2
+            if self._commit_info(versions[mid])["timestamp"] <= as_of_ms:
+                low = mid + 1
+            else:
+                high = mid
+        return versions[low - 1] if low else None
+
+    # -- snapshots -------------------------------------------------------------
+    def snapshot(self, version=None, as_of=None):
+        """
+        Replay the log up to a version (default latest) or the last commit at or
+        before as_of (datetime).
+
+        Returns:
+            dict: {'version', 'timestamp', 'metaData', 'files': {relative_path: add_action}}
+        """
+        versions = self.versions()
+        if as_of is not None:
+            target = self._version_as_of(versions, as_of)
+        elif version is not None:
+            target = max((v for v in versions if v <= version), default=None)
+        else:
+            target = versions[-1] if versions else None
+        if target is None:
+            raise ValueError(f"No snapshot of {self.dataset_path} for version={version}, as_of={as_of}")
+
+        state = {"version": None, "timestamp": None, "metaData": None, "files": {}}
+        checkpoints = [v for v in self._checkpoints() if v <= target]
+        if checkpoints:
+            with open(self._checkpoint_path(checkpoints[-1]), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        start = state["version"] + 1 if state["version"] is not None else 0
+
+        for v in range(start, target + 1):
+            for action in self._read_actions(v):
+                if "commitInfo" in action:
+                    state["timestamp"] = action["commitInfo"]["timestamp"]
+                elif "metaData" in action:
+                    state["metaData"] = action["metaData"]
+                elif "add" in action:
+                    state["files"][action["add"]["path"]] = action["add"]
+                elif "remove" in action:
+                    state["files"].pop(action["remove"]["path"], None)
+            state["version"] = v
+        return state
+
+    def _checkpoints(self):
+        if not os.path.isdir(self.log_path):
+            return []
+        return sorted(int(name[:20]) for name in os.listdir(self.log_path) if name.endswith(".checkpoint.json"))
+
+    def files(self, version=None, as_of=None, partition_values=None):
+        """
+        Absolute paths of the data files in a snapshot, optionally for some partitions only.
+        """
+        files = self.snapshot(version, as_of)["files"]
+        wanted = {str(v) for v in partition_values} if partition_values is not None else None
+        return [
+            os.path.join(self.dataset_path, *path.split("/"))
+            for path, add in sorted(files.items())
+            if wanted is None or add["partitionValues"].get(self.partition_column) in wanted
+        ]
+
+    def read_parquet_sql(self, version=None, as_of=None, partition_values=None):
+        """
+        DuckDB table expression reading a pinned snapshot, e.g. for
+        f"SELECT * FROM {table.read_parquet_sql(version=3)}".
+        """
+        paths = self.files(version, as_of, partition_values)
+        if not paths:
+            raise ValueError(f"Snapshot of {self.dataset_path} has no files")
+        file_list = ", ".join("'" + path.replace(os.sep, "/") + "'" for path in paths)
+        return f"read_parquet([{file_list}], hive_partitioning = TRUE)"
+
+    def history(self):
+        """
+        commitInfo of every version, oldest first.
+        """
+        return [{"version": v, **self._commit_info(v)} for v in self.versions()]
+
+    # -- commits ---------------------------------------------------------------
+    def _add_action(self, relative_path):
+        full_path = os.path.join(self.dataset_path, *relative_path.split("/"))
+        partition_values = {}
+        for part in relative_path.split("/")[:-1]:
+            if "=" in part:
+                key, value = part.split("=", 1)
+                partition_values[key] = value
+        st = os.stat(full_path)
+        return {"add": {
+            "path": relative_path,
+            "partitionValues": partition_values,
+            "size": st.st_size,
+            "modificationTime": int(st.st_mtime * 1000),
+            "dataChange": True,
+            "stats": parquet_file_stats(full_path),
+        }}
+
+    def commit(self, add_paths=(), remove_paths=(), operation="WRITE", read_version=None, schema=None):
+        """
+        Atomically commit one version adding and removing data files (paths relative to
+        the dataset, '/' separated). When read_version is given and other commits landed
+        after it, the commit is retried on top of them unless they touched the same
+        partitions, in which case CommitConflictError is raised. A blind commit
+        (read_version None) did not plan from a snapshot, so it always goes on top of
+        whatever landed first.
+
+        Commit timestamps strictly increase with the version (a commit is stamped at
+        least 1 ms after its predecessor, even if the clock went back), which lets
+        as_of reads binary-search the log.
+
+        Returns:
+            int: The committed version.
+        """
+        os.makedirs(self.log_path, exist_ok=True)
+        actions = [self._add_action(path) for path in add_paths]
+        actions += [{"remove": {"path": path, "deletionTimestamp": int(time.time() * 1000), "dataChange": True}}
+                    for path in remove_paths]
+        touched = {a.get("add", a.get("remove"))["path"].rsplit("/", 1)[0] for a in actions}
+
+        if read_version is not None:
+            version = read_version + 1
+        else:
+            latest = self.latest_version()
+            version = (-1 if latest is None else latest) + 1
+        for _ in range(self.COMMIT_RETRIES):
+            timestamp = int(time.time() * 1000)
+            if version > 0:
+                timestamp = max(timestamp, self._commit_info(version - 1)["timestamp"] + 1)
+            header = [{"commitInfo": {"timestamp": timestamp, "operation": operation,
+                                      "readVersion": version - 1, "numAddedFiles": len(add_paths),
+                                      "numRemovedFiles": len(remove_paths)}}]
+            if version == 0 or schema is not None:
+                header.append({"metaData": {
+                    "partitionColumns": [self.partition_column],
+                    "schema": [{"name": f.name, "type": str(f.type)} for f in schema] if schema is not None else None,
+                    "createdTime": timestamp,
+                }})
+
+            tmp_path = os.path.join(self.log_path, f".{version:020d}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for action in header + actions:
+                    f.write(json.dumps(action, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            try:
+                os.link(tmp_path, self._version_path(version))  # Fails if the version exists
+            except FileExistsError:
+                if read_version is not None:
+                    winners = self._read_actions(version)
+                    clash = {a.get("add", a.get("remove"))["path"].rsplit("/", 1)[0]
+                             for a in winners if "add" in a or "remove" in a} & touched
+                    if clash:
+                        raise CommitConflictError(
+                            f"Version {version} of {self.dataset_path} also changed {sorted(clash)}")
+                version += 1
+                continue
+            finally:
+                os.remove(tmp_path)
+
+            fsync_dir(self.log_path)
+            if version and version % self.CHECKPOINT_INTERVAL == 0:
+                self.checkpoint(version)
+            return version
+        raise CommitConflictError(f"Gave up committing to {self.dataset_path} after {self.COMMIT_RETRIES} attempts")
+
+    def checkpoint(self, version=None):
+        """
+        Write the full snapshot at a version so later reads replay from there.
+        """
+        state = self.snapshot(version)
+        path = self._checkpoint_path(state["version"])
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return path
+
+    def initialize(self):
+        """
+        Start the log of an existing hive dataset: version 0 adds every parquet file
+        already in its partition directories. No-op when the log exists.
+        """
+        if self.latest_version() is not None:
+            return self.latest_version()
+        prefix = f"{self.partition_column}="
+        add_paths = []
+        if os.path.isdir(self.dataset_path):
+            for entry in sorted(os.scandir(self.dataset_path), key=lambda e: e.name):
+                if entry.is_dir() and entry.name.startswith(prefix):
+                    add_paths += [f"{entry.name}/{name}" for name in sorted(os.listdir(entry.path))
+                                  if name.endswith(".parquet") and not name.startswith((".", "_"))]
+        try:
+            return self.commit(add_paths, operation="CREATE", read_version=-1)
+        except CommitConflictError:
+            return self.latest_version()  # Someone else created it first
+
+    @contextmanager
+    def write_partition(self, partition_value, mode="overwrite"):
+        """
+        Yield a hidden temp directory; files written there are moved into the partition
+        under unique names and committed as one version. mode='overwrite' also removes
+        the partition's current files from the new snapshot; 'append' keeps them.
+        If the block or the commit fails, nothing becomes visible.
+        """
+        read_version = self.initialize()
+        partition_name = f"{self.partition_column}={partition_value}"
+        tmp_dir = os.path.join(self.dataset_path, f".txn-{partition_name}-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        moved = []
+        try:
+            yield tmp_dir
+            partition_dir = os.path.join(self.dataset_path, partition_name)
+            os.makedirs(partition_dir, exist_ok=True)
+            commit_id = uuid.uuid4().hex[:12]
+            for name in sorted(os.listdir(tmp_dir)):
+                target_name = f"part-{commit_id}-{name}"
+                os.replace(os.path.join(tmp_dir, name), os.path.join(partition_dir, target_name))
+                moved.append(f"{partition_name}/{target_name}")
+
+            remove_paths = []
+            if mode == "overwrite":
+                current = self.snapshot(read_version)["files"] if read_version is not None else {}
+                remove_paths = [p for p, add in current.items()
+                                if add["partitionValues"].get(self.partition_column) == str(partition_value)]
+            self.commit(moved, remove_paths, operation=mode.upper(), read_version=read_version)
+        except BaseException:
+            for path in moved:
+                full_path = os.path.join(self.dataset_path, *path.split("/"))
+                if os.path.exists(full_path):
+                    os.remove(full_path)
+            raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def vacuum(self, retain_versions=10):
+        """
+        Delete data files the log removed that no snapshot among the last retain_versions
+        versions references. Only files named in a 'remove' action are candidates, so
+        files a concurrent write_partition has moved into place but not yet committed
+        are never touched. Time travel to older versions is no longer possible afterwards.
+        """
+        latest = self.latest_version()
+        if latest is None:
+            return 0
+        keep = set()
+        for version in range(max(0, latest - retain_versions + 1), latest + 1):
+            keep.update(self.snapshot(version)["files"])
+        removed_paths = {action["remove"]["path"] for version in range(latest + 1)
+                         for action in self._read_actions(version) if "remove" in action}
+
+        removed = 0
+        for relative_path in sorted(removed_paths - keep):
+            full_path = os.path.join(self.dataset_path, *relative_path.split("/"))
+            if os.path.exists(full_path):
+                os.remove(full_path)
+                removed += 1
+        print(f"Vacuumed {removed} unreferenced file(s) from {self.dataset_path}")
+        return removed
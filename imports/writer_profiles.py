@@ -0,0 +1,94 @@
+import os
+import pyarrow as pa
+import pyarrow.parquet as pq
+from tradeovant.imports.io_stats import io_timer
+from tradeovant.imports.storage_paths import storage_location
+
+
+# ------------------------------------------------------------------------------
+# WRITER PROFILES
+# ------------------------------------------------------------------------------
+WRITER_PROFILES = {
+    # Ingest: cheap to write, read a few times by the stagers
+    "raw_fast": {
+        "compression": "snappy", "compression_level": None, "row_group_size": 1_000_000,
+        "use_dictionary": True, "byte_stream_split": False, "write_page_index": False,
+    },
+    # Stage and bronze outputs: scanned often, so smaller files and page-level pruning
+    "stage_balanced": {
+        "compression": "zstd", "compression_level": 3, "row_group_size": 250_000,
+        "use_dictionary": True, "byte_stream_split": True, "write_page_index": True,
+    },
+    # Cold tier (apply_retention): smallest files, rarely read
+    "cold_archive": {
+        "compression": "zstd", "compression_level": 12, "row_group_size": 1_000_000,
+        "use_dictionary": True, "byte_stream_split": True, "write_page_index": True,
+    },
+}
+
+
+def writer_options(profile, schema):
+    """
+    pyarrow.parquet write options of a WRITER_PROFILES entry for one schema.
+    With byte_stream_split, floating-point columns (prices, greeks, IV) use the
+    BYTE_STREAM_SPLIT encoding instead of dictionaries; the rest keep dictionaries.
+
+    Returns:
+        dict: compression, compression_level, row_group_size, use_dictionary,
+              use_byte_stream_split and write_page_index.
+    """
+    try:
+        settings = WRITER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown writer profile '{profile}'. Expected one of {sorted(WRITER_PROFILES)}") from None
+    float_columns = [field.name for field in schema if pa.types.is_floating(field.type)]
+    split_columns = float_columns if settings["byte_stream_split"] else []
+    use_dictionary = settings["use_dictionary"]
+    if use_dictionary and split_columns:
+        use_dictionary = [field.name for field in schema if field.name not in split_columns]
+    return {
+        "compression": settings["compression"],
+        "compression_level": settings["compression_level"],
+        "row_group_size": settings["row_group_size"],
+        "use_dictionary": use_dictionary,
+        "use_byte_stream_split": split_columns or False,
+        "write_page_index": settings["write_page_index"],
+    }
+
+
+class ProfiledParquetWriter(pq.ParquetWriter):
+    """
+    pyarrow.parquet.ParquetWriter configured from a WRITER_PROFILES entry, for writers
+    that stream batches. Explicit keyword arguments override the profile, and the
+    profile's row_group_size is the default of write_table and write_batch.
+    """
+
+    def __init__(self, where, schema, profile=None, **write_kwargs):
+        options = writer_options(profile, schema) if profile is not None else {}
+        options.update(write_kwargs)
+        self.row_group_size = options.pop("row_group_size", None)
+        super().__init__(where, schema, **options)
+
+    def write_table(self, table, row_group_size=None):
+        super().write_table(table, row_group_size=row_group_size or self.row_group_size)
+
+
+def write_parquet(table, where, profile=None, **write_kwargs):
+    """
+    Shared Parquet write helper: pyarrow.parquet.write_table plus an IO_STATS record
+    under the bucket/prefix the target path belongs to.
+
+    Parameters:
+        table (pa.Table): The table to write.
+        where (str): Target file path (or a writable binary stream).
+        profile (str): Name of a WRITER_PROFILES entry giving the write settings.
+        write_kwargs: Passed through to pyarrow.parquet.write_table (override the profile).
+    """
+    if profile is not None:
+        write_kwargs = dict(writer_options(profile, table.schema), **write_kwargs)
+    is_path = isinstance(where, (str, os.PathLike))
+    bucket_name, bucket_key = storage_location(where) if is_path else ("", "")
+    with io_timer("write_parquet", bucket_name, bucket_key) as io_counters:
+        pq.write_table(table, where, **write_kwargs)
+        io_counters["files"] = 1
+        io_counters["bytes_written"] = os.path.getsize(where) if is_path else 0
@@ -0,0 +1,130 @@
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tradeovant.imports.partition_catalog import sqlite_transaction
+from tradeovant.imports.storage_paths import base_path
+
+
+# ------------------------------------------------------------------------------
+# ZIP MEMBER INDEX
+# ------------------------------------------------------------------------------
+def _extract_zip_members(zip_path, members, target_path):
+    """
+    Extract the given members of one zip into target_path (runs in a worker process).
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        for member in members:
+            zf.extract(member, target_path)
+    return members
+
+
+def _run_extractions(tasks, workers):
+    """
+    Run (zip_path, members, target_path) extraction tasks, in a process pool when
+    workers > 1, yielding (task, error) as each one finishes.
+    """
+    if workers == 1:
+        for task in tasks:
+            try:
+                _extract_zip_members(*task)
+                yield task, None
+            except Exception as e:
+                yield task, e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_extract_zip_members, *task): task for task in tasks}
+        for future in as_completed(futures):
+            yield futures[future], future.exception()
+
+
+class ZipIndex:
+    """
+    Persisted index of zip archives (path, mtime, size) and their member names and
+    uncompressed sizes, kept in a small SQLite file. An archive is only reopened when its mtime or size changes.
+    """
+    DB_NAME = "_zip_index.db"
+
+    def __init__(self, db_path=None):
+        self.db_path = str(db_path or os.path.join(base_path(), self.DB_NAME))
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS zip_files (
+                    zip_path TEXT PRIMARY KEY,
+                    mtime REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS zip_members (
+                    zip_path TEXT NOT NULL,
+                    member TEXT NOT NULL,
+                    file_size INTEGER,
+                    PRIMARY KEY (zip_path, member)
+                )""")
+            # Indexes created before member sizes were kept: those archives are reindexed on first use
+            if "file_size" not in [row[1] for row in conn.execute("PRAGMA table_info(zip_members)")]:
+                conn.execute("ALTER TABLE zip_members ADD COLUMN file_size INTEGER")
+            conn.execute("CREATE INDEX IF NOT EXISTS zip_members_member ON zip_members (member)")
+
+    @staticmethod
+    def _key(zip_path):
+        return os.path.abspath(str(zip_path))
+
+    def member_sizes(self, zip_path):
+        """
+        Return {member name: uncompressed size} of a zip, from the index when the
+        archive is unchanged.
+        """
+        key = self._key(zip_path)
+        st = os.stat(key)
+        with sqlite_transaction(self.db_path) as conn:
+            row = conn.execute("SELECT mtime, size FROM zip_files WHERE zip_path = ?", (key,)).fetchone()
+            if row and row[0] == st.st_mtime and row[1] == st.st_size:
+                sizes = dict(conn.execute("SELECT member, file_size FROM zip_members WHERE zip_path = ?", (key,)))
+                if None not in sizes.values():
+                    return sizes
+
+        with zipfile.ZipFile(key, 'r') as zf:
+            sizes = {info.filename: info.file_size for info in zf.infolist()}
+
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM zip_members WHERE zip_path = ?", (key,))
+            conn.execute("INSERT OR REPLACE INTO zip_files VALUES (?, ?, ?)", (key, st.st_mtime, st.st_size))
+            conn.executemany("INSERT OR IGNORE INTO zip_members VALUES (?, ?, ?)",
+                             [(key, name, size) for name, size in sizes.items()])
+        return sizes
+
+    def members(self, zip_path):
+        """
+        Return the member names of a zip, from the index when the archive is unchanged.
+        """
+        return list(self.member_sizes(zip_path))
+
+    def find_zip(self, member, under=None):
+        """
+        Return the path of an indexed zip that still exists and holds `member`, or None.
+
+        Parameters:
+            member (str): Member name, e.g. 'bot-eod-report-2025-01-01.csv'.
+            under (str): Only consider zips below this directory.
+        """
+        with sqlite_transaction(self.db_path) as conn:
+            rows = conn.execute("SELECT zip_path FROM zip_members WHERE member = ?", (member,)).fetchall()
+        root = self._key(under) + os.sep if under else None
+        for (zip_path,) in rows:
+            if (root is None or zip_path.startswith(root)) and os.path.exists(zip_path):
+                return zip_path
+        return None
+
+    def relocate(self, old_path, new_path):
+        """
+        Keep the index in step with a zip that was moved (e.g. into an archive folder).
+        """
+        old_key, new_key = self._key(old_path), self._key(new_path)
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute("DELETE FROM zip_files WHERE zip_path = ?", (new_key,))
+            conn.execute("DELETE FROM zip_members WHERE zip_path = ?", (new_key,))
+            conn.execute("UPDATE zip_files SET zip_path = ? WHERE zip_path = ?", (new_key, old_key))
+            conn.execute("UPDATE zip_members SET zip_path = ? WHERE zip_path = ?", (new_key, old_key))
@@ -5,9 +5,9 @@ import os
 import json
 import logging
 import pyarrow as pa
-import pyarrow.parquet as pq
 from datetime import datetime, timedelta
 import pytz
+from tradeovant.imports.common_utils import write_parquet
 
 
 # Load configuration from YAML file
@@ -134,7 +134,7 @@ def process_and_save_to_parquet(data, ticker, start_date, end_date, multiplier,
         filename = f"{ticker}_{start_date}_{end_date}_{multiplier}_{timespan}.parquet"
         output_path = os.path.join(output_dir, filename)
 
-        pq.write_table(table, output_path)
+        write_parquet(table, output_path, profile="raw_fast")
         logging.info(f"Saved {ticker} intraday data to Parquet at {output_path}")
     else:
         logging.info(f"No data to process for {ticker}")
@@ -1,38 +1,36 @@
-import boto3
 import yaml
 import os
 import logging
 from botocore.exceptions import ClientError
+from tradeovant.imports.common_utils import S3Backend
 
 # Load configuration from YAML file
 def load_config(config_path):
     with open(config_path, "r") as file:
         return yaml.safe_load(file)
 
+# Build one pooled S3 client (multipart transfers, see S3Backend) from the YAML settings
+def get_s3_backend(config):
+    s3_config = config["s3_base"]
+    return S3Backend(
+        endpoint_url=s3_config["s3_endpoint"],
+        aws_access_key_id=s3_config["access_key_id"],
+        aws_secret_access_key=s3_config["secret_access_key"],
+        rename_buckets=False  # Polygon's bucket: its name is used as it is
+    )
+
 # Download a single file from S3
-def download_s3_file(config, file_key, output_dir):
+def download_s3_file(config, file_key, output_dir, backend=None):
     try:
-        # Extract S3 configuration from YAML
-        s3_config = config["s3_base"]
-        access_key_id = s3_config["access_key_id"]
-        secret_access_key = s3_config["secret_access_key"]
-        endpoint_url = s3_config["s3_endpoint"]
-        bucket_name = s3_config["bucket"]
-
-        # Initialize S3 client
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=access_key_id,
-            aws_secret_access_key=secret_access_key,
-            endpoint_url=endpoint_url
-        )
+        backend = backend or get_s3_backend(config)
+        bucket_name = config["s3_base"]["bucket"]
 
         # Ensure output directory exists
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, os.path.basename(file_key))
 
-        # Download the file
-        s3_client.download_file(bucket_name, file_key, output_path)
+        # Download the file (multipart ranged GETs for large files)
+        backend.download_file(bucket_name, file_key, output_path)
         logging.info(f"Downloaded {file_key} to {output_path}")
         return True
     except ClientError as e:
@@ -42,6 +40,22 @@ def download_s3_file(config, file_key, output_dir):
         logging.error(f"Unexpected error: {e}")
         return False
 
+# Download many files from S3 side by side over one pooled client
+def download_s3_files(config, file_keys, output_dir, max_workers=None):
+    backend = get_s3_backend(config)
+    bucket_name = config["s3_base"]["bucket"]
+    os.makedirs(output_dir, exist_ok=True)
+
+    items = [(bucket_name, key, os.path.join(output_dir, os.path.basename(key))) for key in file_keys]
+    failed = []
+    for (_, file_key, output_path), error in backend.download_files(items, max_workers):
+        if error:
+            logging.error(f"Error downloading {file_key}: {error}")
+            failed.append(file_key)
+        else:
+            logging.info(f"Downloaded {file_key} to {output_path}")
+    return failed
+
 # Main execution
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
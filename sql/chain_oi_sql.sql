@@ -6,21 +6,23 @@ as
 		file_version_date,
 		option_symbol,
 		underlying_symbol,
-		try_cast(strike as double) as strike,
-		try_cast('20'||substring(option_symbol, length(underlying_symbol)+1, 6) as int) as expiry,
-		substring(option_symbol, length(underlying_symbol)+7, 1) as option_typ,
+		-- occ_* columns decoded at ingest; substring() only for partitions converted before them
+		coalesce(occ_strike, try_cast(strike as double)) as strike,
+		coalesce(year(occ_expiry) * 10000 + month(occ_expiry) * 100 + day(occ_expiry),
+		         try_cast('20'||substring(option_symbol, length(underlying_symbol)+1, 6) as int)) as expiry,
+		coalesce(occ_option_type, substring(option_symbol, length(underlying_symbol)+7, 1)) as option_typ,
 		TRY_CAST(dte as int) as days_to_expiry,
 		-- Volume Metrics
 		TRY_CAST(curr_vol AS BIGINT) AS curr_chain_vol,
 		TRY_CAST(prev_vol AS BIGINT) AS prev_chain_vol,
 		TRY_CAST(curr_vol AS BIGINT) - TRY_CAST(prev_vol AS BIGINT) AS chain_vol_diff,
 		-- OI Metrics
-		TRY_CAST(REPLACE(curr_oi, ',', '') AS BIGINT) AS curr_oi,
-		TRY_CAST(REPLACE(last_oi, ',', '') AS BIGINT) AS prev_oi,
+		TRY_CAST(REPLACE(CAST(curr_oi AS VARCHAR), ',', '') AS BIGINT) AS curr_oi,
+		TRY_CAST(REPLACE(CAST(last_oi AS VARCHAR), ',', '') AS BIGINT) AS prev_oi,
 		TRY_CAST(oi_diff_plain AS BIGINT) AS oi_diff,
-        round(TRY_CAST(curr_vol AS BIGINT) / nullif(TRY_CAST(REPLACE(curr_oi, ',', '') AS BIGINT), 0), 2) as unusual_curr_vol,
-        round((TRY_CAST(curr_vol AS BIGINT) - TRY_CAST(prev_vol AS BIGINT)) / nullif(TRY_CAST(REPLACE(curr_oi, ',', '') AS BIGINT), 0), 2) as unusual_diff_vol
-	FROM read_parquet('R:\local_bucket\raw_store\whales\oichanges\parquet\*\*.parquet', hive_partitioning = True)
+        round(TRY_CAST(curr_vol AS BIGINT) / nullif(TRY_CAST(REPLACE(CAST(curr_oi AS VARCHAR), ',', '') AS BIGINT), 0), 2) as unusual_curr_vol,
+        round((TRY_CAST(curr_vol AS BIGINT) - TRY_CAST(prev_vol AS BIGINT)) / nullif(TRY_CAST(REPLACE(CAST(curr_oi AS VARCHAR), ',', '') AS BIGINT), 0), 2) as unusual_diff_vol
+	FROM read_parquet('R:\local_bucket\raw_store\whales\oichanges\parquet\*\*.parquet', hive_partitioning = True, union_by_name = True)
 	WHERE file_version_date = '20250327'
 	and underlying_symbol in ('SPY')
 	and expiry in ('20250328', '20250331')
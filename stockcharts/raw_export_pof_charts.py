@@ -2,12 +2,10 @@ import logging
 import sys
 import os
 import time
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 from tenacity import retry, stop_after_attempt, wait_exponential
 from curl_cffi import requests
-import pyarrow.parquet as pq
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.imports.common_utils import LocalS3WithDirectory, AsyncLocalS3, read_latest_partition
 
 # Configure logging
 logging.basicConfig(
@@ -47,53 +45,26 @@ class ChartDownloader:
         session.headers.update(self.headers)
         return session
 
-    def _get_latest_partition(self):
-        """Find the latest partition directory based on file_version_date"""
+    def _get_symbols_from_parquet(self):
+        """Load distinct symbols from the latest partition (memory-mapped hot cache)"""
         bronze_path = os.path.join(
             self.base_path,
             self.config['bronze_bucket'],
             self.config['bronze_key_base']
         )
 
-        partitions = []
-        for entry in os.listdir(bronze_path):
-            if entry.startswith("file_version_date="):
-                date_str = entry.split('=')[1]
-                try:
-                    partition_date = datetime.strptime(date_str, "%Y%m%d")
-                    partitions.append((partition_date, entry))
-                except ValueError:
-                    continue
-
-        if not partitions:
-            raise ValueError("No valid partitions found")
-
-        latest_partition = max(partitions, key=lambda x: x[0])
-        return os.path.join(bronze_path, latest_partition[1])
-
-    def _get_symbols_from_parquet(self):
-        """Load distinct symbols from latest parquet partition"""
-        partition_dir = self._get_latest_partition()
-        parquet_path = os.path.join(partition_dir, self.config['parquet_file'])
-
-        table = pq.read_table(parquet_path)
+        table = read_latest_partition(bronze_path, columns=['symbol'], catalog=self.storage.catalog)
         symbols = table.column('symbol').unique().to_pylist()
-        logging.info(f"Loaded {len(symbols)} unique symbols from {parquet_path}")
+        latest = table.schema.metadata[b'hot_cache.partition_value'].decode()
+        logging.info(f"Loaded {len(symbols)} unique symbols from {bronze_path} (file_version_date={latest})")
         return symbols
 
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def _download_with_retry(self, symbol):
-        """Retryable download function for a single symbol"""
+        """Retryable download function for a single symbol; returns the chart bytes or None"""
         try:
             session = self._init_session()
             url = self.config['url_template'].format(symbol=symbol)
-            target_dir = os.path.join(
-                self.base_path,
-                self.config['target_bucket'],
-                self.config['target_key_base']
-            )
-            os.makedirs(target_dir, exist_ok=True)
-            filename = os.path.join(target_dir, f"{symbol}.png")
 
             response = session.get(
                 url,
@@ -102,35 +73,45 @@ class ChartDownloader:
             )
 
             if response.status_code == 200:
-                with open(filename, 'wb') as f:
-                    f.write(response.content)
-                return (symbol, True)
+                return response.content
             else:
                 logging.error(f"HTTP Error {response.status_code} for {symbol}")
-                return (symbol, False)
+                return None
 
         except Exception as e:
             logging.error(f"Critical error for {symbol}: {str(e)}")
             raise
 
-    def _process_batch(self, symbols):
-        """Process a batch of symbols with ThreadPoolExecutor"""
-        with ThreadPoolExecutor(max_workers=self.config['max_workers']) as executor:
-            futures = {executor.submit(self._download_with_retry, symbol): symbol for symbol in symbols}
-            results = []
+    async def _download_and_store(self, astorage, network_slots, symbol):
+        """Download one chart on a network slot, then hand the write to the async storage pool"""
+        async with network_slots:
+            try:
+                content = await asyncio.to_thread(self._download_with_retry, symbol)
+            except Exception as e:
+                logging.error(f"Unhandled exception for {symbol}: {str(e)}")
+                return (symbol, False)
 
-            for future in as_completed(futures):
-                symbol = futures[future]
-                try:
-                    results.append(future.result())
-                except Exception as e:
-                    logging.error(f"Unhandled exception for {symbol}: {str(e)}")
-                    results.append((symbol, False))
+        if content is None:
+            return (symbol, False)
 
-        return results
+        target_key = f"{self.config['target_key_base']}/{symbol}.png"
+        try:
+            await astorage.put(self.config['target_bucket'], target_key, content)
+        except Exception as e:
+            logging.error(f"Error saving chart for {symbol}: {str(e)}")
+            return (symbol, False)
+        return (symbol, True)
+
+    async def _process_batch(self, astorage, symbols):
+        """Process a batch of symbols; network calls and disk writes overlap in one event loop"""
+        network_slots = asyncio.Semaphore(self.config['max_workers'])
+        return await asyncio.gather(
+            *(self._download_and_store(astorage, network_slots, symbol) for symbol in symbols)
+        )
 
     def run(self):
         """Main execution flow with error handling"""
+        astorage = None
         try:
             symbols = []
 
@@ -144,6 +125,7 @@ class ChartDownloader:
                     logging.error(f"Error loading symbols: {str(e)}")
                     sys.exit(1)
 
+            astorage = AsyncLocalS3(self.storage, io_workers=self.config['io_workers'])
             total_symbols = len(symbols)
             batch_size = self.config['batch_size']
             success_count = 0
@@ -154,7 +136,7 @@ class ChartDownloader:
                     f"Processing batch {batch_num}/{(total_symbols // batch_size) + 1} ({len(batch_symbols)} symbols)")
 
                 try:
-                    batch_results = self._process_batch(batch_symbols)
+                    batch_results = asyncio.run(self._process_batch(astorage, batch_symbols))
                     batch_success = sum(1 for _, status in batch_results if status)
                     success_count += batch_success
 
@@ -174,6 +156,8 @@ class ChartDownloader:
             logging.info(f"Process completed. Total downloaded: {success_count}/{total_symbols}")
 
         finally:
+            if astorage is not None:
+                astorage.close()
             self.storage.stop()
 
 
@@ -183,13 +167,13 @@ if __name__ == "__main__":
         "base_path": r"R:\local_bucket",
         "bronze_bucket": "bronze_store",
         "bronze_key_base": "finviz/fundamentals",
-        "parquet_file": "brz_fundamentals.parquet",
         "target_bucket": "raw_store",
         "target_key_base": "stockcharts/pof_charts",
         "url_template": "https://stockcharts.com/pnf/chart?c={symbol},PATLDDYRBR[PA][D][F1!3!!!2!20]&r=3895&pnf=y",
         "test_symbol": "DIS",
         "request_timeout": 20,
         "max_workers": 10,      # Number of parallel downloads
+        "io_workers": 4,        # Threads writing charts to storage
         "batch_size": 200,      # Symbols per batch
         "batch_delay": 5,       # Seconds between batches
     }
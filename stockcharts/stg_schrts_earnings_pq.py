@@ -2,14 +2,14 @@ import os
 import json
 import glob
 import logging
-import shutil
 import duckdb
 import pandas as pd
+import pyarrow as pa
 import tempfile
 import yaml
 
 # Import your storage module
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.imports.common_utils import LocalS3WithDirectory, partition_commit, write_parquet
 
 
 def setup_logging(log_level):
@@ -159,18 +159,14 @@ def process_date(date, config, storage):
     file_path = target_conf["base_path"]
     partition_folder = f"file_version_date={date}"
     filename = target_conf["pattern"].format(date=date)
-    target_path = os.path.join(storage.BASE_PATH, bucket, file_path, partition_folder)
+    dataset_path = os.path.join(storage.BASE_PATH, bucket, file_path)
 
-    if os.path.exists(target_path):
-        shutil.rmtree(target_path)
-        os.makedirs(target_path, exist_ok=True)
-        logging.info(f"Removed existing partition dir: {target_path}")
-    else:
-        os.makedirs(target_path, exist_ok=True)
-    out_file = os.path.join(target_path, f"{filename}")
-    df_combined.to_parquet(out_file, index=False)
+    # Commit the partition (temp dir + atomic rename, replaces any previous version)
+    with partition_commit(dataset_path, date, catalog=storage.catalog) as tmp_dir:
+        write_parquet(pa.Table.from_pandas(df_combined, preserve_index=False), os.path.join(tmp_dir, f"{filename}"),
+                      profile="stage_balanced")
 
-    logging.info(f"Final parquet file to bucket '{bucket}' with key '{filename}'")
+    logging.info(f"Final parquet file to bucket '{bucket}' with key '{partition_folder}/{filename}'")
     # Mark the date as processed
     delta_file = config["processing"]["delta_tracking_file"]
     update_processed_dates(delta_file, date)
@@ -4,8 +4,8 @@ import glob
 import logging
 import yaml
 import pandas as pd
-import tempfile
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+import pyarrow as pa
+from tradeovant.imports.common_utils import LocalS3WithDirectory, TransactionLogTable, write_parquet
 
 def setup_logging(log_level):
     logging.basicConfig(
@@ -33,6 +33,11 @@ def update_processed_dates(delta_file, date):
 def build_local_path(storage, bucket, sub_path, filename):
     return os.path.join(storage.local_base_path, bucket, sub_path, filename)
 
+def target_table(config, storage):
+    """Transaction-log table of the staged SCTR reports (readers plan from its log)."""
+    target_conf = config["target"]
+    return TransactionLogTable(os.path.join(storage.local_base_path, target_conf["bucket"], target_conf["base_path"]))
+
 def process_date(date, config, storage):
     logging.info(f"Processing date: {date}")
 
@@ -85,35 +90,22 @@ def process_date(date, config, storage):
 
     df_final = df_final[target_columns]  # Reorder columns
 
-    # Define target directory structure
-    partition_folder = f"file_version_date={date}"
+    # Commit the partition to the table's transaction log (replaces the date's previous files)
     filename = f"schrts_sctr_reports_{date}.parquet"
-    full_target_dir = os.path.join(target_conf["base_path"], partition_folder).replace("\\", "/")
-    full_target_path = os.path.join(full_target_dir, filename).replace("\\", "/")
-
-    # Create a temporary Parquet file
-    try:
-        temp_parquet_dir = tempfile.mkdtemp()  # Create temp dir
-        temp_parquet_path = os.path.join(temp_parquet_dir, filename)
-
-        logging.info(f"Writing consolidated data to Parquet file: {temp_parquet_path}")
-        df_final.to_parquet(temp_parquet_path, index=False)  # REMOVE partition_cols
-
-    except Exception as e:
-        logging.error(f"Error writing temporary Parquet file for {date}: {e}")
-        return
-
-    # Upload to storage
-    bucket = target_conf["bucket"]
-    logging.info(f"Uploading Parquet file to bucket '{bucket}' with key '{full_target_path}'")
+    table = target_table(config, storage)
+    logging.info(f"Writing consolidated data for {date} to {table.dataset_path}")
     try:
-        storage.upload_file(temp_parquet_path, bucket, full_target_path)
+        with table.write_partition(date) as tmp_dir:
+            write_parquet(pa.Table.from_pandas(df_final, preserve_index=False), os.path.join(tmp_dir, filename),
+                          profile="stage_balanced")
     except Exception as e:
-        logging.error(f"Error uploading Parquet file for {date}: {e}")
+        logging.error(f"Error writing Parquet file for {date}: {e}")
         return
+    # screener_sql.sql and stock_list.sql glob the partition directories, so the files
+    # this commit replaced are removed right away rather than kept for time travel
+    table.vacuum(target_conf.get("retain_versions", 1))
 
-    # Clean up temporary files and update processed dates
-    os.remove(temp_parquet_path)
+    # Update processed dates
     logging.info(f"Finished processing date: {date}")
     update_processed_dates(config["processing"]["delta_tracking_file"], date)
 
@@ -1,14 +1,14 @@
 import logging
 import os
 import glob
-import shutil
 import yaml
 import duckdb
+import uuid
 import pyarrow as pa
-import pyarrow.parquet as pq
+import pyarrow.compute as pc
 
 from datetime import datetime
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.imports.common_utils import LocalS3WithDirectory, copy_file, partition_commit, write_parquet
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -72,19 +72,12 @@ def parse_date_from_filename(filename):
         logging.warning(f"Could not parse date from filename: {filename}")
         return None
 
-def get_processed_dates(stage_dir):
+def get_processed_dates(catalog, stage_dir):
     """
-    Return a set of date strings found in 'file_version_date=YYYYMMDD' subdirectories.
+    Return a set of date strings recorded in the partition catalog for
+    'file_version_date=YYYYMMDD' partitions of stage_dir.
     """
-    if not os.path.exists(stage_dir):
-        return set()
-
-    processed = set()
-    for name in os.listdir(stage_dir):
-        if name.startswith("file_version_date="):
-            date_val = name.split("=")[1]
-            processed.add(date_val)
-    return processed
+    return set(catalog.list_partitions(stage_dir, "file_version_date"))
 
 
 # ------------------------------------------------------------------------------
@@ -169,28 +162,32 @@ def add_extra_columns(table, date_val):
 
     return table
 
-def write_parquet_partitioned(table, stage_dir, overwrite=False):
+def write_parquet_partitioned(catalog, table, stage_dir, overwrite=False):
     """
     Write the table to a partitioned Parquet dataset (by file_version_date).
-    If overwrite=True, remove that partition folder first.
+    Each partition is committed atomically (temp dir + rename) and recorded in the catalog.
+    If overwrite=False, files already in the partition are carried over (hard-linked) into the new version.
     """
     # Identify unique date partitions
     date_vals = table.column(table.schema.get_field_index("file_version_date")).unique().to_pylist()
 
-    # If there's only one date in this table, we can remove that partition to 'overwrite'
-    if overwrite and len(date_vals) == 1:
-        part_dir = os.path.join(stage_dir, f"file_version_date={date_vals[0]}")
-        if os.path.exists(part_dir):
-            shutil.rmtree(part_dir)
-            logging.info(f"Removed existing partition dir: {part_dir}")
-
-    pq.write_to_dataset(
-        table,
-        root_path=stage_dir,
-        partition_cols=["file_version_date"],
-        compression="snappy",
-        use_dictionary=True
-    )
+    for date_val in date_vals:
+        part_table = table.filter(pc.equal(table["file_version_date"], date_val)).drop_columns(["file_version_date"])
+        part_dir = os.path.join(stage_dir, f"file_version_date={date_val}")
+
+        with partition_commit(stage_dir, date_val, catalog=catalog) as tmp_dir:
+            if not overwrite and os.path.isdir(part_dir):
+                # Existing files are never modified in place, so hard links carry them over without copying
+                for name in os.listdir(part_dir):
+                    copy_file(os.path.join(part_dir, name), os.path.join(tmp_dir, name), "hardlink")
+            write_parquet(
+                part_table,
+                os.path.join(tmp_dir, f"{uuid.uuid4().hex}-0.parquet"),
+                profile="stage_balanced"
+            )
+        if overwrite:
+            logging.info(f"Replaced partition dir: {part_dir}")
+
     logging.info(f"Data written to Parquet under: {stage_dir}")
 
 
@@ -226,7 +223,7 @@ def process_data_type(data_name, schema_name, schema_dict, rerun_date=None):
         return
 
     # 4) Identify processed dates
-    processed = get_processed_dates(stage_dir)
+    processed = get_processed_dates(storage.catalog, stage_dir)
     logging.info(f"Existing partitions for {data_name}: {len(processed)}")
 
     # 5) Decide which files to process
@@ -253,7 +250,7 @@ def process_data_type(data_name, schema_name, schema_dict, rerun_date=None):
             table = add_extra_columns(table, date_val)
             # Overwrite if re-run
             do_overwrite = (rerun_date == date_val)
-            write_parquet_partitioned(table, stage_dir, overwrite=do_overwrite)
+            write_parquet_partitioned(storage.catalog, table, stage_dir, overwrite=do_overwrite)
         except Exception as e:
             logging.error(f"Error processing {json_file}: {e}")
 
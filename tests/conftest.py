@@ -0,0 +1,25 @@
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts import the repo as the 'tradeovant' package (from tradeovant.imports.common_utils import ...)
+if "tradeovant" not in sys.modules:
+    spec = importlib.machinery.ModuleSpec("tradeovant", None, is_package=True)
+    spec.submodule_search_locations = [REPO_ROOT]
+    sys.modules["tradeovant"] = importlib.util.module_from_spec(spec)
+
+
+@pytest.fixture
+def base_path(tmp_path, monkeypatch):
+    """
+    Point LocalS3WithDirectory.BASE_PATH at a temporary bucket root for one test.
+    """
+    from tradeovant.imports.common_utils import LocalS3WithDirectory
+
+    monkeypatch.setattr(LocalS3WithDirectory, "BASE_PATH", str(tmp_path))
+    return tmp_path
@@ -0,0 +1,50 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tradeovant.imports.common_utils import BucketedParquetWriter, ClusteredParquetWriter, bucket_file_name
+
+CLUSTERING = (["underlying_symbol", "size"], ["underlying_symbol"])
+
+
+def batches(num_batches, rows):
+    for i in range(num_batches):
+        symbols = [f"S{(i * 7 + j * 13) % 50:02d}" for j in range(rows)]
+        yield pa.record_batch({"underlying_symbol": symbols, "size": [(j * 31) % rows for j in range(rows)]})
+
+
+def assert_row_groups_sorted(path):
+    parquet_file = pq.ParquetFile(path)
+    assert [column.column_index for column in parquet_file.metadata.row_group(0).sorting_columns] == [0, 1]
+    for index in range(parquet_file.num_row_groups):
+        rows = parquet_file.read_row_group(index).to_pylist()
+        keys = [(row["underlying_symbol"], row["size"]) for row in rows]
+        assert keys == sorted(keys)
+
+
+def test_clustered_writer_sorts_each_row_group(tmp_path):
+    path = os.path.join(tmp_path, "part.parquet")
+    schema = pa.schema([("underlying_symbol", pa.string()), ("size", pa.int64())])
+    with ClusteredParquetWriter(path, schema, CLUSTERING, row_group_size=250) as writer:
+        for batch in batches(7, 100):
+            writer.write_batch(batch)
+
+    metadata = pq.ParquetFile(path).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [250, 250, 200]
+    assert_row_groups_sorted(path)
+
+
+def test_bucketed_writer_clusters_while_streaming(tmp_path):
+    schema = pa.schema([("underlying_symbol", pa.string()), ("size", pa.int64())])
+    with BucketedParquetWriter(tmp_path, "optiontrades", "underlying_symbol", 4, schema, row_group_size=100,
+                               clustering=CLUSTERING) as writer:
+        for batch in batches(5, 100):
+            writer.write_batch(batch)
+
+    rows = 0
+    for bucket in range(4):
+        path = os.path.join(tmp_path, bucket_file_name("optiontrades", bucket))
+        assert_row_groups_sorted(path)
+        rows += pq.ParquetFile(path).metadata.num_rows
+    assert rows == 500
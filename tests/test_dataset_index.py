@@ -0,0 +1,23 @@
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from tradeovant.imports.common_utils import DatasetIndex
+
+
+def test_read_table_filters_dictionary_columns(tmp_path):
+    dataset_path = os.path.join(tmp_path, "optiontrades", "parquet")
+    for value, symbols in [("20250101", ["SPY", "QQQ", "IWM"]), ("20250102", ["DIA", "SPY"])]:
+        partition_dir = os.path.join(dataset_path, f"file_version_date={value}")
+        os.makedirs(partition_dir)
+        table = pa.table({"underlying_symbol": pc.dictionary_encode(pa.array(symbols)),
+                          "size": list(range(len(symbols)))})
+        pq.write_table(table, os.path.join(partition_dir, "optiontrades.parquet"))
+    index = DatasetIndex(dataset_path, ["underlying_symbol"])
+    index.refresh()
+
+    result = index.read_table({"underlying_symbol": ["SPY", "QQQ"]}, columns=["underlying_symbol", "size"])
+    assert sorted(result.column("underlying_symbol").to_pylist()) == ["QQQ", "SPY", "SPY"]
+    assert index.read_table({"underlying_symbol": "DIA"}).num_rows == 1
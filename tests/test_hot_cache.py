@@ -0,0 +1,21 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tradeovant.imports.common_utils import HOT_CACHE_NAME, PartitionCatalog, read_latest_partition
+
+
+def test_stale_cache_is_served_memory_mapped(base_path):
+    dataset_path = os.path.join(base_path, "bronze_store", "finviz", "fundamentals")
+    partition_dir = os.path.join(dataset_path, "file_version_date=20250101")
+    os.makedirs(partition_dir)
+    pq.write_table(pa.table({"size": pa.array(range(1_000_000), pa.int64())}), os.path.join(partition_dir, "a.parquet"))
+    catalog = PartitionCatalog()
+
+    allocated = pa.total_allocated_bytes()
+    table = read_latest_partition(dataset_path, catalog=catalog)  # Builds the cache
+    assert os.path.exists(os.path.join(dataset_path, HOT_CACHE_NAME))
+    assert table.num_rows == 1_000_000 and table.schema.metadata[b"hot_cache.partition_value"] == b"20250101"
+    # Buffers point into the mapped file, not into memory allocated by Arrow
+    assert pa.total_allocated_bytes() - allocated < 1 << 20
@@ -0,0 +1,46 @@
+from datetime import date
+
+import pyarrow as pa
+
+from tradeovant.imports.common_utils import occ_fields, parse_occ_symbols
+
+
+def decode(symbols):
+    parsed = parse_occ_symbols(symbols, prefix="occ_")
+    assert [field.name for field in occ_fields("occ_")] == list(parsed)
+    return [tuple(row) for row in zip(*(column.to_pylist() for column in parsed.values()))]
+
+
+def test_valid_symbols():
+    assert decode(pa.array(["SPY250310P00565000", "AAPL  250117C00150500", "BRK.B240229C00000100",
+                            "SPXW251231P12345678"])) == [
+        ("SPY", date(2025, 3, 10), "P", 565.0),
+        ("AAPL", date(2025, 1, 17), "C", 150.5),  # OSI form, root padded to 6
+        ("BRK.B", date(2024, 2, 29), "C", 0.1),
+        ("SPXW", date(2025, 12, 31), "P", 12345.678),
+    ]
+
+
+def test_malformed_symbols_are_null():
+    malformed = [
+        None,
+        "",
+        "250310P00565000",  # No root
+        "TOOLONGROOT250310P00565000",
+        "SPY250310X00565000",  # Not C or P
+        "SPY2503 0P00565000",
+        "SPY250310P0056500/",
+        "SPY251310P00565000",  # Month 13
+        "SPY250230C00565000",  # Feb 30
+        "SPY230229C00565000",  # Not a leap year
+    ]
+    assert decode(pa.array(malformed, pa.string())) == [(None, None, None, None)] * len(malformed)
+
+
+def test_sliced_chunked_and_dictionary_input():
+    symbols = pa.array(["x", "SPY250310P00565000", "QQQ250117C00500000", "y"])
+    expected = [("SPY", date(2025, 3, 10), "P", 565.0), ("QQQ", date(2025, 1, 17), "C", 500.0)]
+    assert decode(symbols.slice(1, 2)) == expected
+    assert decode(pa.chunked_array([symbols.slice(1, 1), symbols.slice(2, 1)])) == expected
+    assert decode(symbols.slice(1, 2).dictionary_encode()) == expected
+    assert decode(pa.array([], pa.string())) == []
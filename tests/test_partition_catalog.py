@@ -0,0 +1,55 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tradeovant.imports.common_utils import PartitionCatalog, sqlite_transaction
+
+
+def write_partition(dataset_path, value, rows):
+    partition_dir = os.path.join(dataset_path, f"file_version_date={value}")
+    os.makedirs(partition_dir, exist_ok=True)
+    pq.write_table(pa.table({"symbol": ["SPY"] * rows, "size": list(range(rows))}),
+                   os.path.join(partition_dir, f"part-{value}.parquet"))
+
+
+def test_list_partitions_bootstraps_from_disk(base_path):
+    dataset_path = os.path.join(base_path, "raw_store", "whales", "optiontrades", "parquet")
+    for value, rows in [("20250103", 3), ("20250101", 1), ("20250102", 2)]:
+        write_partition(dataset_path, value, rows)
+    os.makedirs(os.path.join(dataset_path, "_tmp"))  # Not a partition folder
+
+    catalog = PartitionCatalog()
+    assert catalog.dataset_key(dataset_path) == "raw_store/whales/optiontrades/parquet"
+    assert catalog.list_partitions(dataset_path) == ["20250101", "20250102", "20250103"]
+    entry = catalog.get_partition(dataset_path, "20250102")
+    assert (entry["row_count"], entry["file_count"]) == (2, 1)
+
+
+def test_catalog_is_not_rescanned_after_bootstrap(base_path):
+    dataset_path = os.path.join(base_path, "stage_store", "whales", "optiontrades")
+    write_partition(dataset_path, "20250101", 1)
+    catalog = PartitionCatalog()
+    assert catalog.list_partitions(dataset_path) == ["20250101"]
+
+    # A partition written without record_partition stays invisible until recorded or refreshed
+    write_partition(dataset_path, "20250102", 1)
+    assert catalog.list_partitions(dataset_path) == ["20250101"]
+    catalog.record_partition(dataset_path, "20250102")
+    assert catalog.list_partitions(dataset_path) == ["20250101", "20250102"]
+
+    write_partition(dataset_path, "20250103", 1)
+    catalog.refresh(dataset_path)
+    assert catalog.list_partitions(dataset_path) == ["20250101", "20250102", "20250103"]
+
+
+def test_reads_do_not_wait_for_a_writer(base_path):
+    dataset_path = os.path.join(base_path, "stage_store", "finviz")
+    write_partition(dataset_path, "20250101", 1)
+    catalog = PartitionCatalog()
+    catalog.list_partitions(dataset_path)
+
+    with sqlite_transaction(catalog.db_path) as conn:  # Holds the write lock
+        conn.execute("DELETE FROM partitions")
+        assert catalog.list_partitions(dataset_path) == ["20250101"]
+    assert catalog.list_partitions(dataset_path) == []
@@ -0,0 +1,71 @@
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from tradeovant.imports.common_utils import PartitionCatalog, PartitionLock, partition_commit, staging_dir
+
+
+def read_sizes(partition_dir):
+    return sorted(pq.read_table(partition_dir).column("size").to_pylist())
+
+
+def test_commit_swaps_in_the_new_partition(base_path):
+    dataset_path = os.path.join(base_path, "stage_store", "whales", "optiontrades")
+    catalog = PartitionCatalog()
+    with partition_commit(dataset_path, "20250101", catalog=catalog) as tmp_dir:
+        pq.write_table(pa.table({"size": [1, 2]}), os.path.join(tmp_dir, "a.parquet"))
+
+    partition_dir = os.path.join(dataset_path, "file_version_date=20250101")
+    assert read_sizes(partition_dir) == [1, 2]
+    assert catalog.get_partition(dataset_path, "20250101")["row_count"] == 2
+    assert not [name for name in os.listdir(staging_dir(dataset_path)) if not name.endswith(".lock")]
+
+
+def test_commit_rolls_back_on_exception(base_path):
+    dataset_path = os.path.join(base_path, "stage_store", "whales", "optiontrades")
+    catalog = PartitionCatalog()
+    with partition_commit(dataset_path, "20250101", catalog=catalog) as tmp_dir:
+        pq.write_table(pa.table({"size": [1]}), os.path.join(tmp_dir, "a.parquet"))
+    written_at = catalog.get_partition(dataset_path, "20250101")["written_at"]
+
+    with pytest.raises(RuntimeError):
+        with partition_commit(dataset_path, "20250101", catalog=catalog) as tmp_dir:
+            pq.write_table(pa.table({"size": [7, 8, 9]}), os.path.join(tmp_dir, "b.parquet"))
+            raise RuntimeError("writer failed")
+
+    # Old files and catalog entry untouched, temp directory gone, lock released
+    assert read_sizes(os.path.join(dataset_path, "file_version_date=20250101")) == [1]
+    assert catalog.get_partition(dataset_path, "20250101")["written_at"] == written_at
+    assert not [name for name in os.listdir(staging_dir(dataset_path)) if not name.endswith(".lock")]
+    with PartitionLock(dataset_path, "20250101", timeout=0):
+        pass
+
+
+def test_partition_lock_is_exclusive(base_path):
+    dataset_path = os.path.join(base_path, "stage_store", "finviz")
+    with PartitionLock(dataset_path, "20250101"):
+        with pytest.raises(TimeoutError):
+            PartitionLock(dataset_path, "20250101", timeout=0).acquire()
+        with PartitionLock(dataset_path, "20250102", timeout=0):  # Other partitions are independent
+            pass
+
+
+def test_partition_lock_waits_for_the_holder(base_path):
+    dataset_path = os.path.join(base_path, "stage_store", "finviz")
+    order = []
+    holder = PartitionLock(dataset_path, "20250101").acquire()
+
+    def waiter():
+        with PartitionLock(dataset_path, "20250101", timeout=30):
+            order.append("waiter")
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    thread.join(0.5)
+    order.append("holder")
+    holder.release()
+    thread.join(30)
+    assert order == ["holder", "waiter"]
@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import zipfile
+from datetime import date, datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.unusual_whales.raw_whales_build_parquet import (
+    build_output_fields, coerce_batch, parse_column, pending_units, run_parallel, stream_csv_to_parquet
+)
+
+
+def parse(values, type_name):
+    typed, bad = parse_column(pa.array(values, pa.string()), type_name)
+    return typed.to_pylist(), bad.tolist()
+
+
+def test_parse_int64_and_float64():
+    assert parse(["1,200", " +5 ", "-0", "", None, "1.5", "9223372036854775807", "9223372036854775808",
+                  "-9223372036854775808", "-9223372036854775809"], "int64") == (
+        [1200, 5, 0, None, None, None, 9223372036854775807, None, -9223372036854775808, None],
+        [False, False, False, False, False, True, False, True, False, True],
+    )
+    assert parse(["1.5", "+.5", "1e3", "abc"], "float64") == ([1.5, 0.5, 1000.0, None], [False, False, False, True])
+
+
+def test_parse_dates_and_timestamps_out_of_range():
+    assert parse(["2024-02-29", "2023-02-29", "2025-04-31", "2025-13-01", "2025-1-1"], "date") == (
+        [date(2024, 2, 29), None, None, None, None],
+        [False, True, True, True, True],
+    )
+    typed, bad = parse(["2025-01-02 10:00", "2025-01-02T10:00:00.5+05:30", "2025-01-02 24:00",
+                        "2025-01-02 10:00:60", "2025-01-02 10:00+24:00", "2025-01-02 10:00:00.1234567"], "timestamp")
+    assert typed[:2] == [datetime(2025, 1, 2, 10, tzinfo=timezone.utc),
+                         datetime(2025, 1, 2, 4, 30, 0, 500000, tzinfo=timezone.utc)]
+    assert bad == [False, False, True, True, True, True]
+
+
+def test_coerce_batch_quarantines_bad_rows_verbatim():
+    column_defs = {"size": {"name": "size", "type": "int64"}, "price": {"name": "price", "type": "float64"},
+                   "side": {"name": "side", "type": "string", "dictionary": True}}
+    batch = pa.record_batch({"size": ["1", "x", "3", ""], "price": ["1.5", "2", "bad", "4"],
+                             "side": ["ask", "bid", "ask", "bid"], "note": ["a", "b", "c", "d"]})
+    out = coerce_batch(batch, column_defs, build_output_fields(batch.schema, column_defs))
+
+    assert out.column("size").to_pylist() == [1, None, 3, None]
+    assert out.column("price").to_pylist() == [1.5, 2.0, None, 4.0]
+    assert out.column("side").type == pa.dictionary(pa.int32(), pa.string())
+    quarantine = out.column("quarantine").to_pylist()
+    assert quarantine[0] is None and quarantine[3] is None  # Empty is NULL, not bad
+    assert [json.loads(entry) for entry in quarantine[1:3]] == [{"size": "x"}, {"price": "bad"}]
+
+
+def test_zip_mode_sizes_from_the_index_and_archives_converted_zips(base_path):
+    storage = LocalS3WithDirectory()
+    source_root = os.path.join(base_path, "source")
+    os.makedirs(os.path.join(source_root, "darkpool"))
+    zip_path = os.path.join(source_root, "darkpool", "dp-2025-01-01.zip")
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        zf.writestr("dp-2025-01-01.csv", "ticker,size\nSPY,1\n")
+
+    units = pending_units(storage, "darkpool", source_root, ingest_mode="zip")
+    assert [(unit["member"], unit["size"]) for unit in units] == [("dp-2025-01-01.csv", 18)]
+    assert storage.zip_index.member_sizes(zip_path) == {"dp-2025-01-01.csv": 18}
+
+    # Converted by an earlier run: nothing left to do, so the zip is archived instead of rescanned
+    partition_dir = os.path.join(units[0]["parquet_path"], "file_version_date=20250101")
+    os.makedirs(partition_dir)
+    pq.write_table(pa.table({"ticker": ["SPY"]}), os.path.join(partition_dir, "darkpool.parquet"))
+    storage.catalog.record_partition(units[0]["parquet_path"], "20250101")
+    assert run_parallel(storage, ["darkpool"], source_root, ingest_mode="zip")["done"] == 0
+    assert os.listdir(os.path.join(source_root, "darkpool", "archive")) == ["dp-2025-01-01.zip"]
+
+
+def test_quoted_header_names(tmp_path):
+    csv = b'symbol,"size, shares","say ""hi"""\nSPY,10,x\n'
+    rows = stream_csv_to_parquet(io.BytesIO(csv), str(tmp_path), "darkpool", "20250101",
+                                 column_defs={"size, shares": {"name": "size, shares", "type": "int64"}})
+    table = pq.read_table(os.path.join(tmp_path, "darkpool.parquet"))
+    assert rows == 1
+    assert table.column_names[:3] == ["symbol", "size, shares", 'say "hi"']
+    assert table.column("size, shares").to_pylist() == [10] and table.column('say "hi"').to_pylist() == ["x"]
@@ -0,0 +1,101 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from tradeovant.imports.common_utils import SCHEMA_VERSION_KEY, PartitionCatalog, conform_dataset, partition_files
+from tradeovant.unusual_whales.raw_whales_build_parquet import convert_unit, upgrade_legacy_batch
+
+COLUMN_DEFS = {
+    "size": {"name": "size", "type": "int64"},
+    "price": {"name": "price", "type": "float64", "renamed_from": ["last_price"]},
+}
+
+
+def convert_csv(base_path, catalog, file_date, csv_text):
+    parquet_path = os.path.join(base_path, "raw_store", "whales", "testsource", "parquet")
+    csv_path = os.path.join(base_path, f"testsource-{file_date}.csv")
+    with open(csv_path, "w") as f:
+        f.write(csv_text)
+    unit = {"source_dir": "testsource", "parquet_path": parquet_path, "file_date": file_date, "csv_path": csv_path}
+    convert_unit(unit, 1 << 20, COLUMN_DEFS, catalog.db_path)
+    return parquet_path
+
+
+def read_partition(dataset_path, file_date):
+    return pq.read_table(partition_files(os.path.join(dataset_path, f"file_version_date={file_date}"))[0])
+
+
+def test_versions_bump_only_when_columns_change(base_path):
+    catalog = PartitionCatalog()
+    dataset_path = convert_csv(base_path, catalog, "20250101", "symbol,size\nSPY,1\n")
+    convert_csv(base_path, catalog, "20250102", "symbol,size\nQQQ,2\n")
+    assert [entry["version"] for entry in catalog.list_schema_versions(dataset_path)] == [1]
+
+    convert_csv(base_path, catalog, "20250103", "symbol,size,price\nIWM,3,1.5\n")
+    version, schema = catalog.get_schema(dataset_path)
+    assert version == 2
+    assert schema.names[:2] == ["symbol", "size"] and "price" in schema.names
+    assert catalog.get_partition(dataset_path, "20250103")["schema_version"] == 2
+    assert catalog.partitions_behind(dataset_path) == ["20250101", "20250102"]
+
+
+def test_schema_is_registered_only_after_the_commit(base_path):
+    catalog = PartitionCatalog()
+    dataset_path = convert_csv(base_path, catalog, "20250101", "symbol,size\nSPY,1\n")
+
+    with pytest.raises(FileNotFoundError):
+        unit = {"source_dir": "testsource", "parquet_path": dataset_path, "file_date": "20250102",
+                "csv_path": os.path.join(base_path, "missing.csv")}
+        convert_unit(unit, 1 << 20, COLUMN_DEFS, catalog.db_path)
+    assert [entry["version"] for entry in catalog.list_schema_versions(dataset_path)] == [1]
+
+
+def test_renamed_column_keeps_its_place(base_path):
+    catalog = PartitionCatalog()
+    dataset_path = convert_csv(base_path, catalog, "20250101", "symbol,last_price\nSPY,1.5\n")
+    assert "price" in catalog.get_schema(dataset_path)[1].names
+
+    convert_csv(base_path, catalog, "20250102", "symbol,price,size\nQQQ,2.5,7\n")
+    schema = catalog.get_schema(dataset_path)[1]
+    assert schema.names.index("price") == 1 and "last_price" not in schema.names
+
+
+def test_conform_streams_partitions_behind(base_path):
+    catalog = PartitionCatalog()
+    dataset_path = convert_csv(base_path, catalog, "20250101", "symbol,size\nSPY,1\nQQQ,2\nIWM,3\n")
+    # A legacy all-string partition, converted before the source had a typed schema
+    legacy_dir = os.path.join(dataset_path, "file_version_date=20250102")
+    os.makedirs(legacy_dir)
+    pq.write_table(pa.table({"symbol": ["DIA"], "last_price": ["4.5"], "rowid": pa.array([0], pa.int64()),
+                             "file_version_date": ["20250102"]}), os.path.join(legacy_dir, "testsource.parquet"))
+    catalog.record_partition(dataset_path, "20250102")
+    convert_csv(base_path, catalog, "20250103", "symbol,size,price\nSPY,4,1.5\n")
+
+    result = conform_dataset(dataset_path, catalog=catalog, include_unversioned=True, row_group_size=2,
+                             convert=lambda batch: upgrade_legacy_batch(batch, COLUMN_DEFS))
+    assert result == {"conformed": ["20250101", "20250102"], "errors": []}
+    assert catalog.partitions_behind(dataset_path) == []
+
+    version, schema = catalog.get_schema(dataset_path)
+    old = read_partition(dataset_path, "20250101")
+    assert old.schema.equals(schema, check_metadata=False)
+    assert old.column("size").to_pylist() == [1, 2, 3] and old.column("price").null_count == 3
+    assert pq.ParquetFile(partition_files(os.path.join(dataset_path, "file_version_date=20250101"))[0]
+                          ).metadata.num_row_groups == 2
+    assert read_partition(dataset_path, "20250102").column("price").to_pylist() == [4.5]
+    assert pq.read_schema(partition_files(legacy_dir)[0]).metadata[SCHEMA_VERSION_KEY] == str(version).encode()
+
+
+def test_conform_keeps_cold_partitions_cold(base_path):
+    catalog = PartitionCatalog()
+    dataset_path = convert_csv(base_path, catalog, "20250101", "symbol,size\nSPY,1\n")
+    policy = {"compression": "zstd", "compression_level": 12, "row_group_size": 1_000_000, "columns": None}
+    catalog.set_tier(dataset_path, "20250101", "cold", policy)
+    convert_csv(base_path, catalog, "20250102", "symbol,size,price\nQQQ,2,1.5\n")
+
+    assert conform_dataset(dataset_path, catalog=catalog)["conformed"] == ["20250101"]
+    assert catalog.get_tier(dataset_path, "20250101") == ("cold", policy)
+    path = partition_files(os.path.join(dataset_path, "file_version_date=20250101"))[0]
+    assert pq.ParquetFile(path).metadata.row_group(0).column(0).compression == "ZSTD"
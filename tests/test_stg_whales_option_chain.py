@@ -0,0 +1,79 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tradeovant.imports.common_utils import LocalS3WithDirectory, parse_occ_symbols, write_bucketed
+from tradeovant.unusual_whales.stg_whales_option_chain import (
+    bucket_local_sources, occ_expressions, partition_sources, run_sql, source_base_path
+)
+
+CHAIN_SQL = """
+    SELECT underlying_symbol, {occ_expiry} AS expiry, {occ_option_type} AS option_typ, sum(curr_oi) AS oi
+    FROM read_parquet('{oichanges}', hive_partitioning = True)
+    WHERE file_version_date = '{partition_val}'
+    GROUP BY ALL
+    ORDER BY ALL
+"""
+SYMBOLS = ["SPY250310P00565000", "QQQ250117C00500000", "SPY250310P00565000", "IWM250321C00200000"]
+
+
+def oichanges_table(with_occ):
+    table = pa.table({"option_symbol": SYMBOLS, "underlying_symbol": [symbol[:3] for symbol in SYMBOLS],
+                      "curr_oi": [10, 20, 30, 40]})
+    if with_occ:
+        for name, values in parse_occ_symbols(table.column("option_symbol"), "occ_").items():
+            table = table.append_column(name, values)
+    return table
+
+
+def dataset_config(base_path):
+    source = os.path.join(base_path, "raw_store", "whales", "oichanges", "parquet", "*", "*.parquet")
+    return {"sources": {"oichanges": source}, "occ_source": "oichanges", "sql": CHAIN_SQL}
+
+
+def run_chain(ds_config, partition_val, bucket=None):
+    occ = occ_expressions(ds_config, partition_val, "file_version_date")
+    sources = partition_sources(ds_config, partition_val, "file_version_date", bucket)
+    sql = ds_config["sql"].format(**sources, **occ, partition_val=partition_val)
+    return occ, pa.table(run_sql(sql, threads=1))  # Newer DuckDB returns a RecordBatchReader from .arrow()
+
+
+def test_occ_expressions_fall_back_for_partitions_without_the_columns(base_path):
+    ds_config = dataset_config(base_path)
+    dataset_path = source_base_path(ds_config["sources"]["oichanges"])
+    for partition_val, tables in [("20250101", [oichanges_table(False)]), ("20250102", [oichanges_table(True)]),
+                                  ("20250103", [oichanges_table(True), oichanges_table(False)])]:
+        partition_dir = os.path.join(dataset_path, f"file_version_date={partition_val}")
+        os.makedirs(partition_dir)
+        for index, table in enumerate(tables):
+            pq.write_table(table, os.path.join(partition_dir, f"part-{index}.parquet"))
+
+    legacy_occ, legacy = run_chain(ds_config, "20250101")
+    typed_occ, typed = run_chain(ds_config, "20250102")
+    mixed_occ, _ = run_chain(ds_config, "20250103")
+    assert "substring" in legacy_occ["occ_expiry"] and "substring" in mixed_occ["occ_expiry"]
+    assert typed_occ["occ_expiry"].startswith("year(occ_expiry)")
+    assert legacy.to_pylist() == typed.to_pylist() == [
+        {"underlying_symbol": "IWM", "expiry": 20250321, "option_typ": "C", "oi": 40},
+        {"underlying_symbol": "QQQ", "expiry": 20250117, "option_typ": "C", "oi": 20},
+        {"underlying_symbol": "SPY", "expiry": 20250310, "option_typ": "P", "oi": 40},
+    ]
+
+
+def test_bucketed_sources_give_the_same_result_per_bucket(base_path, monkeypatch):
+    ds_config = dataset_config(base_path)
+    dataset_path = source_base_path(ds_config["sources"]["oichanges"])
+    bucketing = ("underlying_symbol", 4)
+    monkeypatch.setattr(LocalS3WithDirectory, "BUCKETED_DATASETS", {"raw_store/whales/oichanges/parquet": bucketing})
+    partition_dir = os.path.join(dataset_path, "file_version_date=20250102")
+    os.makedirs(partition_dir)
+    write_bucketed(oichanges_table(True), partition_dir, "oichanges", *bucketing)
+
+    assert bucket_local_sources(ds_config, "20250102", "file_version_date", bucketing)
+    assert not bucket_local_sources(ds_config, "20250102", "file_version_date", ("underlying_symbol", 8))
+    _, whole = run_chain(ds_config, "20250102")
+    rows = []
+    for bucket in range(bucketing[1]):
+        rows += run_chain(ds_config, "20250102", bucket)[1].to_pylist()
+    assert sorted(rows, key=lambda row: row["underlying_symbol"]) == whole.to_pylist()
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from tradeovant.imports.common_utils import LocalS3WithDirectory, MotoBackend
+
+
+@pytest.fixture
+def moto_backend(monkeypatch):
+    pytest.importorskip("moto")
+    for name, value in [("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"),
+                        ("AWS_SESSION_TOKEN", "testing")]:
+        monkeypatch.setenv(name, value)
+    backend = MotoBackend(rename_buckets=True)
+    backend.create_buckets(["raw_store"])
+    yield backend
+    backend.stop()
+
+
+def test_multipart_transfers_round_trip(moto_backend, tmp_path):
+    size = MotoBackend.MULTIPART_THRESHOLD + (3 << 20)
+    payloads = {name: os.urandom(size) for name in ("a.zip", "b.zip")}
+    for name, payload in payloads.items():
+        (tmp_path / name).write_bytes(payload)
+
+    uploads = [(str(tmp_path / name), "raw_store", f"whales\\{name}") for name in payloads]
+    assert [error for _, error in moto_backend.upload_files(uploads)] == [None, None]
+    head = moto_backend.head_object("raw_store", "whales\\a.zip")
+    assert head["Size"] == size and head["ETag"].endswith(f"-{-(-size // MotoBackend.MULTIPART_CHUNKSIZE)}")
+
+    downloads = [("raw_store", f"whales/{name}", str(tmp_path / f"copy-{name}")) for name in payloads]
+    assert [error for _, error in moto_backend.download_files(downloads)] == [None, None]
+    for name, payload in payloads.items():
+        assert (tmp_path / f"copy-{name}").read_bytes() == payload
+
+
+def test_bucket_rename_is_opt_in(moto_backend):
+    assert moto_backend.remote_bucket("raw_store") == "raw-store"
+    third_party = MotoBackend()  # e.g. Polygon's flat-files bucket, whose name we do not control
+    try:
+        assert third_party.remote_bucket("flat_files") == "flat_files"
+    finally:
+        third_party.stop()
+
+
+def test_upload_files_skips_unchanged_content(moto_backend, base_path, monkeypatch, tmp_path):
+    storage = LocalS3WithDirectory()
+    storage._backend = moto_backend
+    mirrored = []
+    upload_files = moto_backend.upload_files
+    monkeypatch.setattr(moto_backend, "upload_files", lambda items, max_workers=None: (
+        mirrored.append([item[2] for item in items]) or upload_files(items, max_workers)))
+    for name in ("a.csv", "b.csv"):
+        (tmp_path / name).write_text(name)
+    items = [(str(tmp_path / name), "raw_store", f"whales/{name}") for name in ("a.csv", "b.csv")]
+
+    assert storage.upload_files(items, skip_unchanged=True) == []
+    (tmp_path / "b.csv").write_text("changed")
+    assert storage.upload_files(items, skip_unchanged=True) == []
+    assert mirrored == [["whales/a.csv", "whales/b.csv"], ["whales/b.csv"]]
+    assert (base_path / "raw_store" / "whales" / "b.csv").read_text() == "changed"
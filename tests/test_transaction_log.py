@@ -0,0 +1,87 @@
+import os
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from tradeovant.imports.common_utils import CommitConflictError, TransactionLogTable
+
+
+def write_file(table, partition_value, name, values):
+    partition_dir = os.path.join(table.dataset_path, f"file_version_date={partition_value}")
+    os.makedirs(partition_dir, exist_ok=True)
+    pq.write_table(pa.table({"size": values}), os.path.join(partition_dir, name))
+    return f"file_version_date={partition_value}/{name}"
+
+
+@pytest.fixture
+def table(tmp_path):
+    return TransactionLogTable(os.path.join(tmp_path, "stage_store", "stockcharts", "sctr_reports"))
+
+
+def test_blind_commit_after_version_zero(table):
+    assert table.commit([write_file(table, "20250101", "a.parquet", [1])]) == 0
+    # Version 0 is a real version: the next blind commit is 1, even on the same partition
+    assert table.commit([write_file(table, "20250101", "b.parquet", [2])]) == 1
+    assert table.latest_version() == 1
+    assert len(table.files()) == 2
+
+
+def test_blind_commit_goes_on_top_of_a_concurrent_commit(table):
+    table.commit([write_file(table, "20250101", "a.parquet", [1])])
+    stale = TransactionLogTable(table.dataset_path)
+    table.commit([write_file(table, "20250101", "b.parquet", [2])])
+
+    # A blind commit never conflicts, whatever the winner touched
+    stale.latest_version = lambda: 0
+    assert stale.commit([write_file(table, "20250101", "c.parquet", [3])]) == 2
+
+
+def test_conflicting_commits(table):
+    table.commit([write_file(table, "20250101", "a.parquet", [1])])
+    table.commit([write_file(table, "20250101", "b.parquet", [2])], read_version=0)
+
+    # Planned from version 0, and version 1 changed the same partition
+    with pytest.raises(CommitConflictError):
+        table.commit(remove_paths=["file_version_date=20250101/a.parquet"], read_version=0)
+    # Another partition is retried on top of version 1
+    assert table.commit([write_file(table, "20250102", "c.parquet", [3])], read_version=0) == 2
+
+
+def test_write_partition_snapshots_and_time_travel(table):
+    with table.write_partition("20250101") as tmp_dir:
+        pq.write_table(pa.table({"size": [1, 2]}), os.path.join(tmp_dir, "data.parquet"))
+    with table.write_partition("20250101") as tmp_dir:
+        pq.write_table(pa.table({"size": [3]}), os.path.join(tmp_dir, "data.parquet"))
+
+    assert pq.read_table(table.files()).column("size").to_pylist() == [3]
+    assert pq.read_table(table.files(version=1)).column("size").to_pylist() == [1, 2]
+    stats = next(iter(table.snapshot()["files"].values()))["stats"]
+    assert (stats["numRecords"], stats["minValues"]["size"]) == (1, 3)
+
+
+def test_as_of_reads_use_increasing_commit_timestamps(table):
+    for i in range(5):
+        table.commit([write_file(table, "20250101", f"{i}.parquet", [i])])
+    history = table.history()
+    timestamps = [entry["timestamp"] for entry in history]
+    assert timestamps == sorted(set(timestamps))
+
+    as_of = datetime.fromtimestamp((timestamps[2] + 0.5) / 1000)
+    assert table.snapshot(as_of=as_of)["version"] == 2
+    with pytest.raises(ValueError):
+        table.snapshot(as_of=as_of - timedelta(days=1))
+
+
+def test_vacuum_removes_replaced_files_only(table):
+    with table.write_partition("20250101") as tmp_dir:
+        pq.write_table(pa.table({"size": [1]}), os.path.join(tmp_dir, "data.parquet"))
+    with table.write_partition("20250101") as tmp_dir:
+        pq.write_table(pa.table({"size": [2]}), os.path.join(tmp_dir, "data.parquet"))
+    # Moved into place by a concurrent writer that has not committed yet
+    pending = write_file(table, "20250101", "part-pending-data.parquet", [3])
+
+    assert table.vacuum(retain_versions=1) == 1
+    partition_dir = os.path.join(table.dataset_path, "file_version_date=20250101")
+    assert sorted(os.listdir(partition_dir)) == sorted([os.path.basename(table.files()[0]), os.path.basename(pending)])
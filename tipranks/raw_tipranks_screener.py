@@ -4,7 +4,7 @@ import logging
 import requests
 import random
 from datetime import datetime
-from tradeovant.imports.common_utils import LocalS3WithDirectory  # Correct import for LocalS3WithDirectory
+from tradeovant.imports.common_utils import LocalS3WithDirectory, read_latest_partition
 import duckdb
 import time
 
@@ -16,17 +16,19 @@ def setup_logging():
 
 
 # Fetch tickers from the Parquet file using DuckDB
-def fetch_tickers(parquet_file_path):
+def fetch_tickers(dataset_path):
+    # Latest optionscreener partition, memory-mapped from the dataset's hot cache
+    latest = read_latest_partition(dataset_path, columns=["ticker", "is_index", "issue_type"])
     query = """
     select distinct ticker
-    from read_parquet('{parquet_file_path}', hive_partitioning = True)
-    where file_version_date = (select max(file_version_date) 
-                               from read_parquet('{parquet_file_path}', hive_partitioning = True))
-    and is_index = 'f'
+    from latest
+    where is_index = 'f'
     and issue_type <> 'ETF';
     """
     con = duckdb.connect()
-    df = con.execute(query.format(parquet_file_path=parquet_file_path)).fetchdf()
+    con.register("latest", latest)
+    df = con.execute(query).fetchdf()
+    con.close()
     return df['ticker'].tolist()
 
 
@@ -140,14 +142,14 @@ def main():
     # Specify the raw bucket name where data should be stored
     raw_bucket = "raw_store"
 
-    # Path to the Parquet file containing tickers
-    parquet_file_path = "R:/local_bucket/raw_store/whales/optionscreener/parquet/*/*.parquet"
-
     # Instantiate the storage helper
     storage = LocalS3WithDirectory()
 
-    # Step 1: Fetch tickers from the Parquet file
-    tickers = fetch_tickers(parquet_file_path)
+    # Dataset containing tickers
+    screener_path = os.path.join(storage.BASE_PATH, "raw_store", "whales", "optionscreener", "parquet")
+
+    # Step 1: Fetch tickers from the latest screener partition
+    tickers = fetch_tickers(screener_path)
     logging.info(f"Fetched {len(tickers)} tickers from Parquet file.")
 
     # Step 2: Process the tickers in batches (e.g., 100 tickers per batch)
@@ -1,10 +1,10 @@
 import logging
 import os
+import uuid
 import duckdb
 import pyarrow as pa
-import pyarrow.parquet as pq
 from datetime import datetime
-from tradeovant.imports.common_utils import LocalS3WithDirectory  # Assuming same utility as reference
+from tradeovant.imports.common_utils import LocalS3WithDirectory, partition_commit, write_parquet  # Assuming same utility as reference
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -18,19 +18,12 @@ def get_raw_partitions(raw_base_path):
     return sorted(date_dirs)
 
 
-def get_processed_dates(stage_dir):
-    """Get already processed dates from stage directory"""
-    if not os.path.exists(stage_dir):
-        return set()
+def get_processed_dates(catalog, stage_dir):
+    """Get already processed dates from the partition catalog"""
+    return set(catalog.list_partitions(stage_dir, "file_version_date"))
 
-    processed = set()
-    for name in os.listdir(stage_dir):
-        if name.startswith("file_version_date="):
-            processed.add(name.split("=")[1])
-    return processed
 
-
-def process_date_partition(raw_dir, date_val, stage_dir):
+def process_date_partition(catalog, raw_dir, date_val, stage_dir):
     """Process a single date partition using DuckDB SQL"""
     # Build file paths
     extradata_path = os.path.join(raw_dir, date_val, f"tipranks_screener_extradata_{date_val}.json")
@@ -72,18 +65,13 @@ def process_date_partition(raw_dir, date_val, stage_dir):
     try:
         arrow_table = conn.execute(query).arrow()
 
-        # Add file_version_date column
-        date_array = pa.array([date_val] * arrow_table.num_rows, pa.string())
-        arrow_table = arrow_table.append_column("file_version_date", date_array)
-
-        # Write partitioned Parquet
-        pq.write_to_dataset(
-            arrow_table,
-            root_path=stage_dir,
-            partition_cols=["file_version_date"],
-            compression="snappy",
-            existing_data_behavior="delete_matching"
-        )
+        # Commit the file_version_date partition (temp dir + atomic rename, replaces any previous version)
+        with partition_commit(stage_dir, date_val, catalog=catalog) as tmp_dir:
+            write_parquet(
+                arrow_table,
+                os.path.join(tmp_dir, f"{uuid.uuid4().hex}-0.parquet"),
+                profile="stage_balanced"
+            )
         logging.info(f"Processed date {date_val} successfully")
 
     except Exception as e:
@@ -101,7 +89,7 @@ def main():
 
     # Get date partitions
     raw_dates = get_raw_partitions(raw_base_path)
-    processed_dates = get_processed_dates(stage_dir)
+    processed_dates = get_processed_dates(storage.catalog, stage_dir)
 
     logging.info(f"Found {len(raw_dates)} raw partitions, {len(processed_dates)} already processed")
 
@@ -109,7 +97,7 @@ def main():
     for date_val in raw_dates:
         if date_val not in processed_dates:
             logging.info(f"Processing date: {date_val}")
-            process_date_partition(raw_base_path, date_val, stage_dir)
+            process_date_partition(storage.catalog, raw_base_path, date_val, stage_dir)
         else:
             logging.debug(f"Skipping already processed date: {date_val}")
 
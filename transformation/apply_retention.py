@@ -0,0 +1,59 @@
+import os
+import yaml
+import logging
+from tradeovant.imports.common_utils import LocalS3WithDirectory, apply_retention
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def load_config(config_path):
+    """Load and parse YAML configuration file"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def apply_policies(dataset_names=None):
+    """
+    Apply the retention policy of every dataset in retention_config.yaml.
+
+    Parameters:
+        dataset_names (list): Only apply these datasets' policies. Default is all.
+    """
+    current_dir = os.path.dirname(__file__)
+    config_path = os.path.join(current_dir, "..", "config", "retention_config.yaml")
+    config = load_config(os.path.abspath(config_path))
+    defaults = config.get("defaults", {})
+
+    storage = LocalS3WithDirectory()
+    for dataset_name, ds_conf in config.get("datasets", {}).items():
+        if dataset_names and dataset_name not in dataset_names:
+            continue
+        ds_conf = {**defaults, **ds_conf}
+        dataset_path = os.path.join(storage.BASE_PATH, ds_conf["sub_path"])
+        if not os.path.exists(dataset_path):
+            logging.warning(f"Dataset path does not exist: {dataset_path}")
+            continue
+
+        logging.info(f"Applying retention to {dataset_name}: cold after {ds_conf['cold_after_days']} days, "
+                     f"delete after {ds_conf['delete_after_days']} days")
+        result = apply_retention(
+            dataset_path,
+            cold_after_days=ds_conf["cold_after_days"],
+            delete_after_days=ds_conf["delete_after_days"],
+            partition_column=ds_conf["partition_column"],
+            catalog=storage.catalog,
+            compression=ds_conf["compression"],
+            compression_level=ds_conf["compression_level"],
+            row_group_size=ds_conf["row_group_size"],
+            target_file_rows=ds_conf["target_file_rows"],
+            columns=ds_conf["keep_columns"],
+        )
+        if result["errors"]:
+            logging.error(f"{dataset_name}: retention failed for {result['errors']}")
+
+    storage.stop()
+
+
+if __name__ == "__main__":
+    apply_policies()
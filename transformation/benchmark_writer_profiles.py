@@ -0,0 +1,160 @@
+import os
+import csv
+import time
+import shutil
+import yaml
+import logging
+import duckdb
+import pyarrow.dataset as pads
+from datetime import datetime
+from tradeovant.imports.common_utils import LocalS3WithDirectory, WRITER_PROFILES, write_parquet
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def load_config(config_path):
+    """Load and parse YAML configuration file"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def partition_files(dataset_path, partition_column, partition_value):
+    """Parquet files of one partition directory."""
+    partition_dir = os.path.join(dataset_path, f"{partition_column}={partition_value}")
+    return sorted(
+        os.path.join(partition_dir, name) for name in os.listdir(partition_dir)
+        if name.endswith(".parquet") and not name.startswith((".", "_"))
+    )
+
+
+def time_queries(files, queries, repeat):
+    """
+    Fastest of `repeat` runs of each query (seconds), each fetched in full as Arrow,
+    in a fresh DuckDB connection so no run reuses another's cache.
+    """
+    file_list = "[" + ", ".join("'" + path.replace(os.sep, "/") + "'" for path in files) + "]"
+    timings = {}
+    for query_name, sql in queries.items():
+        best = None
+        for _ in range(repeat):
+            conn = duckdb.connect()
+            try:
+                start = time.perf_counter()
+                conn.execute(sql.format(files=file_list)).arrow()
+                elapsed = time.perf_counter() - start
+            finally:
+                conn.close()
+            best = elapsed if best is None else min(best, elapsed)
+        timings[query_name] = best
+    return timings
+
+
+def benchmark_dataset(storage, dataset_name, ds_conf, work_dir):
+    """
+    Rewrite the sample partitions of one dataset under every profile and measure
+    size, write time and query times, next to the files as they are on disk now.
+
+    Returns:
+        list: One dict per (partition, profile), including profile 'current'.
+    """
+    dataset_path = os.path.join(storage.BASE_PATH, ds_conf["sub_path"])
+    partition_column = ds_conf["partition_column"]
+    partitions = ds_conf.get("partitions")
+    if not partitions:
+        partitions = storage.catalog.list_partitions(dataset_path, partition_column)[-ds_conf["latest_partitions"]:]
+    queries = ds_conf.get("queries") or {"full_scan": "SELECT * FROM read_parquet({files})"}
+
+    rows = []
+    for partition_value in partitions:
+        files = partition_files(dataset_path, partition_column, partition_value)
+        if not files:
+            logging.warning(f"No parquet files in {dataset_name} {partition_column}={partition_value}")
+            continue
+        table = pads.dataset(files, format="parquet").to_table()
+        logging.info(f"{dataset_name} {partition_column}={partition_value}: {table.num_rows} rows, "
+                     f"{len(table.schema)} columns")
+
+        base = {"dataset": dataset_name, "partition": partition_value, "rows": table.num_rows}
+        rows.append(dict(base, profile="current", bytes=sum(os.path.getsize(f) for f in files),
+                         write_seconds=None, **time_queries(files, queries, ds_conf["repeat"])))
+
+        for profile in ds_conf["profiles"]:
+            out_file = os.path.join(work_dir, dataset_name, partition_value, profile, "sample.parquet")
+            os.makedirs(os.path.dirname(out_file), exist_ok=True)
+            start = time.perf_counter()
+            write_parquet(table, out_file, profile=profile)
+            write_seconds = time.perf_counter() - start
+            rows.append(dict(base, profile=profile, bytes=os.path.getsize(out_file), write_seconds=write_seconds,
+                             **time_queries([out_file], queries, ds_conf["repeat"])))
+        del table
+    return rows
+
+
+def log_report(rows):
+    """Log one line per (dataset, partition, profile) with size relative to the current files."""
+    current = {(r["dataset"], r["partition"]): r["bytes"] for r in rows if r["profile"] == "current"}
+    for r in rows:
+        ratio = r["bytes"] / current[(r["dataset"], r["partition"])] if current.get((r["dataset"], r["partition"])) else 0
+        query_times = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in r.items()
+                                if k not in ("dataset", "partition", "rows", "profile", "bytes", "write_seconds"))
+        write_time = f"{r['write_seconds']:.2f}s" if r["write_seconds"] is not None else "-"
+        logging.info(f"{r['dataset']:<22} {r['partition']:<9} {r['profile']:<15} "
+                     f"{r['bytes'] / (1 << 20):>9.1f} MiB ({ratio:>5.2f}x)  write {write_time:>7}  {query_times}")
+
+
+def run_benchmark(dataset_names=None, profiles=None):
+    """
+    Benchmark the writer profiles on the sample partitions of writer_benchmark_config.yaml.
+    The report is logged and saved as CSV under <BASE_PATH>/_benchmarks/.
+
+    Parameters:
+        dataset_names (list): Only benchmark these datasets. Default is all.
+        profiles (list): Profiles to compare. Default is the config's (all WRITER_PROFILES if unset).
+    """
+    current_dir = os.path.dirname(__file__)
+    config_path = os.path.join(current_dir, "..", "config", "writer_benchmark_config.yaml")
+    config = load_config(os.path.abspath(config_path))
+    defaults = {"profiles": list(WRITER_PROFILES), **config.get("defaults", {})}
+
+    storage = LocalS3WithDirectory()
+    work_dir = os.path.join(storage.BASE_PATH, "temp_store", "_writer_benchmark")
+    rows = []
+    try:
+        for dataset_name, ds_conf in config.get("datasets", {}).items():
+            if dataset_names and dataset_name not in dataset_names:
+                continue
+            ds_conf = {**defaults, **ds_conf}
+            if profiles:
+                ds_conf["profiles"] = profiles
+            if not os.path.exists(os.path.join(storage.BASE_PATH, ds_conf["sub_path"])):
+                logging.warning(f"Dataset path does not exist: {ds_conf['sub_path']}")
+                continue
+            rows.extend(benchmark_dataset(storage, dataset_name, ds_conf, work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if not rows:
+        logging.info("Nothing benchmarked")
+        storage.stop()
+        return rows
+
+    log_report(rows)
+    report_path = os.path.join(storage.BASE_PATH, "_benchmarks", f"writer_profiles_{datetime.now():%Y%m%d_%H%M%S}.csv")
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    fieldnames = list(dict.fromkeys(key for r in rows for key in r))
+    with open(report_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    logging.info(f"Report saved to {report_path}")
+
+    storage.stop()
+    return rows
+
+
+if __name__ == "__main__":
+    # Optionally limit the run to some datasets (e.g., ['whales_optiontrades']) or profiles
+    dataset_names = None
+    profiles = None
+    run_benchmark(dataset_names=dataset_names, profiles=profiles)
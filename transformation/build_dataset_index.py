@@ -0,0 +1,33 @@
+import os
+import logging
+from tradeovant.imports.common_utils import LocalS3WithDirectory, DatasetIndex
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def build_indexes(partition_values=None):
+    """
+    Build or refresh the zone-map / bloom-filter index of every dataset in
+    LocalS3WithDirectory.INDEXED_DATASETS. New partitions are indexed on commit;
+    run this once for existing history, or after files were changed outside partition_commit.
+
+    Parameters:
+        partition_values (list): Only (re)index these partitions. Default is all.
+    """
+    storage = LocalS3WithDirectory()
+    for dataset, bloom_columns in storage.INDEXED_DATASETS.items():
+        dataset_path = os.path.join(storage.BASE_PATH, *dataset.split("/"))
+        if not os.path.exists(dataset_path):
+            logging.warning(f"Dataset path does not exist: {dataset_path}")
+            continue
+        logging.info(f"Indexing {dataset} (bloom filters on {', '.join(bloom_columns)})")
+        indexed = DatasetIndex(dataset_path, bloom_columns).refresh(partition_values)
+        logging.info(f"{dataset}: {indexed} file(s) indexed")
+    storage.stop()
+
+
+if __name__ == "__main__":
+    # Optionally limit the run to some partitions (e.g., ['20250228'])
+    partition_values = None
+    build_indexes(partition_values=partition_values)
@@ -0,0 +1,64 @@
+import os
+import yaml
+import logging
+from tradeovant.imports.common_utils import LocalS3WithDirectory, compact_dataset
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def load_config(config_path):
+    """Load and parse YAML configuration file"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+
+def compact_datasets(partition_range=None, dataset_names=None):
+    """
+    Compact the partitions of every dataset in compaction_config.yaml.
+
+    Parameters:
+        partition_range (tuple): (start, end) partition values to limit the run to, e.g. ('20250101', '20250331').
+        dataset_names (list): Only compact these datasets. Default is all.
+    """
+    current_dir = os.path.dirname(__file__)
+    config_path = os.path.join(current_dir, "..", "config", "compaction_config.yaml")
+    config = load_config(os.path.abspath(config_path))
+    defaults = config.get("defaults", {})
+    start, end = partition_range or (None, None)
+
+    storage = LocalS3WithDirectory()
+    for dataset_name, ds_conf in config.get("datasets", {}).items():
+        if dataset_names and dataset_name not in dataset_names:
+            continue
+        ds_conf = {**defaults, **ds_conf}
+        dataset_path = os.path.join(storage.BASE_PATH, ds_conf["sub_path"])
+        if not os.path.exists(dataset_path):
+            logging.warning(f"Dataset path does not exist: {dataset_path}")
+            continue
+
+        logging.info(f"Compacting dataset: {dataset_name} ({dataset_path})")
+        results = compact_dataset(
+            dataset_path,
+            partition_column=ds_conf["partition_column"],
+            start=start,
+            end=end,
+            catalog=storage.catalog,
+            target_file_rows=ds_conf["target_file_rows"],
+            row_group_size=ds_conf["row_group_size"],
+            compression=ds_conf.get("compression"),
+            profile=ds_conf.get("profile"),
+        )
+        compacted = [r for r in results if r["compacted"]]
+        files_before = sum(r["files_before"] for r in compacted)
+        files_after = sum(r["files_after"] for r in compacted)
+        logging.info(f"{dataset_name}: compacted {len(compacted)}/{len(results)} partition(s), "
+                     f"{files_before} -> {files_after} file(s)")
+
+    storage.stop()
+
+
+if __name__ == "__main__":
+    # Optionally limit the run to a range of partitions (e.g., ('20250101', '20250331'))
+    partition_range = None
+    compact_datasets(partition_range=partition_range)
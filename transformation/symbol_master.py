@@ -1,27 +1,25 @@
 import duckdb
-import pyarrow.parquet as pq
 import os
 import yaml
 import logging
+from datetime import datetime
+from tradeovant.imports.common_utils import PartitionCatalog, TransactionLogTable, write_parquet
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Function to list partitions in a directory
-def list_partitions_in_dir(base_dir, partition_column="file_version_date"):
+def source_sql(source):
     """
-    Return a sorted list of partition values found in base_dir as subdirectories like:
-    file_version_date=YYYYMMDD
+    DuckDB table expression of a configured source. A glob string is read with
+    read_parquet; {'txn_log': dataset_path} reads the files of a TransactionLogTable
+    snapshot, the latest unless 'version' or 'as_of' pins one.
     """
-    if not os.path.exists(base_dir):
-        logging.warning(f"Directory does not exist: {base_dir}")
-        return []
-    partitions = []
-    for entry in os.listdir(base_dir):
-        if entry.startswith(f"{partition_column}="):
-            val = entry.split("=")[1]
-            partitions.append(val)
-    return sorted(partitions)
+    if isinstance(source, dict):
+        as_of = source.get('as_of')
+        table = TransactionLogTable(source['txn_log'])
+        return table.read_parquet_sql(version=source.get('version'),
+                                      as_of=datetime.fromisoformat(str(as_of)) if as_of else None)
+    return f"read_parquet('{source}', hive_partitioning = True)"
 
 # Main processing function
 def process_datasets(config_file='symbol_master.yaml'):
@@ -45,8 +43,8 @@ def process_datasets(config_file='symbol_master.yaml'):
         if ds_conf['type'] == 'aggregated':
             # Process aggregated dataset
             try:
-                # Format SQL with source paths
-                sql = ds_conf['sql'].format(**ds_conf['sources'])
+                # Format SQL with source table expressions
+                sql = ds_conf['sql'].format(**{name: source_sql(source) for name, source in ds_conf['sources'].items()})
                 
                 # Connect to DuckDB
                 conn = duckdb.connect()
@@ -59,7 +57,7 @@ def process_datasets(config_file='symbol_master.yaml'):
                 os.makedirs(target_dir, exist_ok=True)
                 
                 # Write result to target file (overwrite if exists)
-                pq.write_table(result, ds_conf['target'], compression='snappy')
+                write_parquet(result, ds_conf['target'], profile='stage_balanced')
                 logging.info(f"Wrote aggregated data to {ds_conf['target']}")
                 
                 # Close connection
@@ -74,7 +72,7 @@ def process_datasets(config_file='symbol_master.yaml'):
             target_path = ds_conf['target']
             
             # List partitions from source
-            partitions = list_partitions_in_dir(source_path, partition_column)
+            partitions = PartitionCatalog().list_partitions(source_path, partition_column)
             if not partitions:
                 logging.warning(f"No partitions found in {source_path}")
                 continue
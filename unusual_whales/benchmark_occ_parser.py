@@ -0,0 +1,122 @@
+import os
+import time
+import logging
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as pads
+from tradeovant.imports.common_utils import LocalS3WithDirectory, parse_occ_symbols
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# The per-query substring parsing the chain SQL used before the occ_* columns existed
+SUBSTRING_SQL = """
+    SELECT
+        substring(option_symbol, 1, length(underlying_symbol)) as root,
+        try_cast('20'||substring(option_symbol, length(underlying_symbol)+1, 6) as int) as expiry,
+        substring(option_symbol, length(underlying_symbol)+7, 1) as option_typ,
+        try_cast(substring(option_symbol, length(underlying_symbol)+8, 8) as bigint) / 1000.0 as strike
+    FROM symbols
+"""
+
+
+def load_symbols(storage, source_dir, partition=None):
+    """
+    (underlying_symbol, option_symbol) of one raw partition of source_dir (the latest
+    when partition is None), or None when the source has no partitions.
+    """
+    parquet_path = os.path.join(storage.BASE_PATH, "raw_store", "whales", source_dir, "parquet")
+    partitions = storage.catalog.list_partitions(parquet_path, "file_version_date")
+    if not partitions:
+        return None
+    partition = partition or partitions[-1]
+    symbol_column = "option_chain_id" if source_dir == "optiontrades" else "option_symbol"
+    partition_dir = os.path.join(parquet_path, f"file_version_date={partition}")
+    table = pads.dataset(partition_dir, format="parquet").to_table(columns=["underlying_symbol", symbol_column])
+    logging.info(f"Loaded {table.num_rows} symbols from {source_dir} file_version_date={partition}")
+    return pa.table({"underlying_symbol": table.column(0).cast(pa.string()),
+                     "option_symbol": table.column(1).cast(pa.string())})
+
+
+def synthetic_symbols(num_rows, seed=0):
+    """num_rows random OCC symbols over a few hundred roots, strikes and expiries."""
+    rng = np.random.default_rng(seed)
+    roots = np.array(["SPY", "QQQ", "SPXW", "AAPL", "TSLA", "NVDA", "IWM", "BRK.B"] + [f"T{i}" for i in range(400)])
+    underlying = rng.choice(roots, num_rows)
+    expiries = np.array([f"25{month:02d}{day:02d}" for month in range(1, 13) for day in (3, 10, 17, 24)])
+    symbols = np.char.add(np.char.add(np.char.add(underlying, rng.choice(expiries, num_rows)),
+                                      rng.choice(np.array(["C", "P"]), num_rows)),
+                          np.char.zfill(rng.integers(1, 5000, num_rows).astype(str), 5))
+    symbols = np.char.add(symbols, "000")
+    logging.info(f"Generated {num_rows} synthetic symbols")
+    return pa.table({"underlying_symbol": pa.array(underlying), "option_symbol": pa.array(symbols)})
+
+
+def best_of(func, repeat):
+    """(fastest run in seconds, last result) of repeat calls to func."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_benchmark(source_dir="oichanges", partition=None, synthetic_rows=5_000_000, repeat=3):
+    """
+    Time parse_occ_symbols (Arrow compute, what ingest runs once) against the DuckDB
+    substring expressions (what every chain query ran), on one raw partition or on
+    synthetic symbols when the source has none, and check the two agree.
+
+    Returns:
+        dict: Rows, seconds per method and the number of rows where they disagree.
+    """
+    storage = LocalS3WithDirectory()
+    table = load_symbols(storage, source_dir, partition)
+    storage.stop()
+    if table is None:
+        table = synthetic_symbols(synthetic_rows)
+
+    def run_sql():
+        conn = duckdb.connect()
+        try:
+            conn.register("symbols", table)
+            return conn.execute(SUBSTRING_SQL).arrow()
+        finally:
+            conn.close()
+
+    sql_seconds, sql_result = best_of(run_sql, repeat)
+    arrow_seconds, parsed = best_of(lambda: parse_occ_symbols(table.column("option_symbol")), repeat)
+
+    # Compare on the rows the SQL parses (it trusts underlying_symbol to be the root)
+    conn = duckdb.connect()
+    try:
+        conn.register("sql_result", sql_result)
+        conn.register("parsed", pa.table({name: values for name, values in parsed.items()}))
+        mismatches = conn.execute("""
+            SELECT count(*) FROM (SELECT *, row_number() OVER () AS n FROM sql_result) s
+            JOIN (SELECT *, row_number() OVER () AS n FROM parsed) p USING (n)
+            WHERE s.expiry IS DISTINCT FROM year(p.expiry) * 10000 + month(p.expiry) * 100 + day(p.expiry)
+               OR s.option_typ IS DISTINCT FROM p.option_type
+               OR s.strike IS DISTINCT FROM p.strike
+        """).fetchone()[0]
+    finally:
+        conn.close()
+
+    rows = table.num_rows
+    logging.info(f"{rows} symbols, best of {repeat}")
+    logging.info(f"  duckdb substring : {sql_seconds:8.3f}s  ({rows / sql_seconds / 1e6:7.1f} M rows/s)")
+    logging.info(f"  parse_occ_symbols: {arrow_seconds:8.3f}s  ({rows / arrow_seconds / 1e6:7.1f} M rows/s)")
+    logging.info(f"  rows where the two disagree: {mismatches}")
+    return {"rows": rows, "sql_seconds": sql_seconds, "arrow_seconds": arrow_seconds, "mismatches": mismatches}
+
+
+if __name__ == "__main__":
+    # Source to sample ('oichanges', 'hotchains' or 'optiontrades') and partition (None = latest)
+    source_dir = "oichanges"
+    partition = None
+    # Rows of synthetic symbols used when the source has no partitions
+    synthetic_rows = 5_000_000
+    run_benchmark(source_dir=source_dir, partition=partition, synthetic_rows=synthetic_rows)
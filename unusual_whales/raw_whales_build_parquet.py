@@ -1,18 +1,32 @@
+import io
 import os
+import json
+import time
 import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import yaml
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.csv as pacsv
 import pyarrow.parquet as pq
 
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.imports.common_utils import (
+    RENAMED_FROM_KEY, BucketedParquetWriter, ClusteredParquetWriter, LocalS3WithDirectory, PartitionCatalog,
+    ProfiledParquetWriter, bucketing_for, clustering_for, occ_fields, parse_occ_symbols, partition_commit,
+    partition_files, project_to_schema, sqlite_transaction
+)
 
 
 def list_csv_files(storage, bucket_name, bucket_key):
     """
-    List all CSV files in the given storage location.
+    Lazily yield the names of the CSV files in the given storage location.
     """
-    files = storage.list_files(bucket_name, bucket_key)
-    return [os.path.basename(f) for f in files if f.endswith(".csv")]
+    prefix = bucket_key.replace("\\", "/").rstrip("/") + "/"
+    for obj in storage.iter_objects(bucket_name, prefix, suffix=".csv"):
+        yield os.path.basename(obj["Key"])
 
 
 def extract_date_from_filename(filename):
@@ -23,175 +37,620 @@ def extract_date_from_filename(filename):
     return filename[-14:-4]  # e.g. "2025-01-01"
 
 
-def get_parquet_partitions(parquet_path):
+def get_parquet_partitions(storage, parquet_path):
     """
-    Return a set of existing 'file_version_date' partitions (e.g., '20250101').
-    Looks for subdirectories named 'file_version_date=<date>'.
+    Return a set of existing 'file_version_date' partitions (e.g., '20250101'),
+    as recorded in the partition catalog.
     """
-    if not os.path.exists(parquet_path):
-        return set()
+    return set(storage.catalog.list_partitions(parquet_path, "file_version_date"))
 
-    partitions = set()
-    for dir_name in os.listdir(parquet_path):
-        if dir_name.startswith("file_version_date="):
-            partitions.add(dir_name.split("=")[1])
-    return partitions
 
-
-def move_zip_file_to_archive(source_path, csv_filename):
+def move_zip_file_to_archive(storage, source_path, csv_filename):
     """
     1) Construct the expected ZIP filename from the CSV filename.
     2) Move that ZIP file from the source directory to an 'archive' subdirectory.
-    3) If the ZIP is in a subdirectory, do a quick search under source_path.
+    3) If the ZIP is not directly under source_path, look it up in the zip index
+       (filled by fetch_and_extract) and only walk the tree as a last resort.
     """
     expected_zip_name = csv_filename.replace(".csv", ".zip")
     archive_dir = os.path.join(source_path, "archive")
     os.makedirs(archive_dir, exist_ok=True)
 
-    zip_path = None
-    for root, dirs, files in os.walk(source_path):
-        if os.path.abspath(root) == os.path.abspath(archive_dir):
-            # Skip searching inside 'archive' to avoid moving it again
-            continue
-        if expected_zip_name in files:
-            zip_path = os.path.join(root, expected_zip_name)
-            break
+    zip_path = os.path.join(source_path, expected_zip_name)
+    if not os.path.exists(zip_path):
+        zip_path = storage.zip_index.find_zip(csv_filename, under=source_path)
+        if zip_path and os.path.abspath(os.path.dirname(zip_path)) == os.path.abspath(archive_dir):
+            zip_path = None
+
+    if not zip_path:
+        for root, dirs, files in os.walk(source_path):
+            if os.path.abspath(root) == os.path.abspath(archive_dir):
+                # Skip searching inside 'archive' to avoid moving it again
+                dirs[:] = []
+                continue
+            if expected_zip_name in files:
+                zip_path = os.path.join(root, expected_zip_name)
+                break
 
     if zip_path and os.path.exists(zip_path):
-        shutil.move(zip_path, os.path.join(archive_dir, expected_zip_name))
+        archive_path = os.path.join(archive_dir, os.path.basename(zip_path))
+        shutil.move(zip_path, archive_path)
+        storage.zip_index.relocate(zip_path, archive_path)
         print(f"Moved ZIP file to archive: {zip_path} -> {archive_dir}")
     else:
         print(f"ZIP file '{expected_zip_name}' not found under {source_path}. Skipping.")
 
 
-def read_csv_as_all_strings(csv_file):
+STREAM_MEMORY_BYTES = 1 << 30  # Peak memory budget of one CSV -> Parquet conversion
+SOURCE_ROOT = r"R:\daily_options_history"  # Downloaded zips, one folder per source
+RAW_PROFILE = "raw_fast"  # Writer profile of the raw partitions (see WRITER_PROFILES)
+RAW_SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "..", "config", "whales_raw_schemas.yaml")
+QUARANTINE_COLUMN = "quarantine"
+OCC_PREFIX = "occ_"  # Prefix of the columns decoded from a source's OCC option symbol column
+
+ARROW_TYPES = {
+    "string": pa.string(),
+    "int64": pa.int64(),
+    "float64": pa.float64(),
+    "date": pa.date32(),
+    "timestamp": pa.timestamp("us", tz="UTC"),
+}
+# Values that cast cleanly to each type (after trimming, and stripping commas from numbers)
+VALUE_PATTERNS = {
+    "int64": r"^[+-]?\d+$",
+    "float64": r"^[+-]?((\d+\.?\d*|\.\d+)([eE][+-]?\d+)?|(?i:nan|inf|infinity))$",
+    "date": r"^\d{4}-\d{2}-\d{2}$",
+    "timestamp": r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?(Z|[+-]\d{2}(:?\d{2})?)?$",
+}
+TZ_OFFSET_PATTERN = r"(Z|[+-]\d{2}(:?\d{2})?)$"
+# Fields of a well-formed date or timestamp, range-checked before casting
+DATETIME_FIELDS_PATTERN = (r"^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2})"
+                           r"(?:[ T](?P<hour>\d{2}):(?P<minute>\d{2})(?::(?P<second>\d{2})(?:\.\d+)?)?"
+                           r"(?:Z|[+-](?P<offset_hour>\d{2}):?(?P<offset_minute>\d{2})?)?)?$")
+INT64_LIMITS = ("9223372036854775807", "9223372036854775808")  # Largest positive / negative magnitude
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+# ------------------------------------------------------------------------------
+# TYPED RAW SCHEMAS
+# ------------------------------------------------------------------------------
+def load_raw_schemas(schema_file=RAW_SCHEMA_FILE):
     """
-    Read the CSV using PyArrow, forcing ALL columns to string type
-    (bypasses potential type-inference issues).
+    Load the typed raw schemas of config/whales_raw_schemas.yaml.
+    Expected format:
+      schemas:
+        optiontrades: [{name: 'size', type: 'int64'}, {name: 'side', type: 'string', dictionary: true}, ...]
+    A string column flagged 'occ: true' holds OCC option symbols (see parse_occ_symbols).
+    A column listing 'renamed_from: [old_name, ...]' was called old_name in older exports.
+    Returns {source_dir: {column: field_def}}.
     """
-    # 1. Read the header line to get column names.
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        first_line = f.readline().strip()
-    column_names = first_line.split(",")
+    with open(schema_file, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    return {source: {field_def["name"]: field_def for field_def in fields_def}
+            for source, fields_def in (data.get("schemas") or {}).items()}
 
-    # 2. Build a dict mapping each column to pa.string()
-    column_types = {col: pa.string() for col in column_names}
 
-    # 3. Read the CSV with forced string columns
-    table = pacsv.read_csv(
-        csv_file,
-        read_options=pacsv.ReadOptions(use_threads=True),
-        parse_options=pacsv.ParseOptions(delimiter=",", quote_char='"'),
-        convert_options=pacsv.ConvertOptions(column_types=column_types)
-    )
+def occ_column(csv_schema, column_defs):
+    """Name of the CSV column flagged 'occ: true' in column_defs, or None."""
+    for field in csv_schema:
+        if ((column_defs or {}).get(field.name) or {}).get("occ"):
+            return field.name
+    return None
+
 
-    return table
+def csv_renames(column_defs):
+    """{old name: current name} of the columns column_defs marks 'renamed_from'."""
+    return {old_name: name for name, field_def in (column_defs or {}).items()
+            for old_name in field_def.get("renamed_from") or []}
 
 
-def add_columns(table, file_date):
+def build_output_fields(csv_schema, column_defs):
     """
-    Add two columns to the Arrow table:
-     - rowid: a sequential ID (like Spark's monotonically_increasing_id)
-     - file_version_date: the partition date (e.g. '20250101')
+    Arrow fields of the converted CSV columns: typed as column_defs says, strings
+    otherwise, then the decoded OCC symbol columns (occ_root, occ_expiry,
+    occ_option_type, occ_strike) when a column is flagged 'occ', plus the quarantine
+    column when the source has a schema. A renamed column carries its former names
+    in its field metadata (RENAMED_FROM_KEY), so the schema registry replaces the old
+    column instead of adding one.
     """
-    # Create rowid (0..N-1)
-    row_count = table.num_rows
-    rowid_array = pa.array(range(row_count), type=pa.int64())
-    table = table.append_column("rowid", rowid_array)
-
-    # Create file_version_date column
-    fvd_array = pa.array([file_date] * row_count, type=pa.string())
-    table = table.append_column("file_version_date", fvd_array)
-
-    return table
-
-
-def process_csv_files(storage,
-                      bucket_name,
-                      bucket_key,
-                      parquet_path,
-                      source_path,
-                      source_dir,
-                      rerun_dates=None):
-    """
-    Reads all CSV files from (bucket_name, bucket_key), converts them to
-    Parquet partitioned by file_version_date (YYYYMMDD), moves the corresponding ZIP,
-    and removes the CSV. If rerun_dates is None, only processes new dates;
-    if rerun_dates is a list, reprocesses those date(s).
-    """
-    # 1) List CSV files
-    csv_files = list_csv_files(storage, bucket_name, bucket_key)
-    print(f"Found {len(csv_files)} CSV files in {bucket_name}/{bucket_key}.")
-
-    # 2) Get existing Parquet partitions
-    processed_dates = get_parquet_partitions(parquet_path)
-    print(f"Existing partitions: {len(processed_dates)}")
-
-    # 3) Determine files to process
-    to_process = []
-    for file in csv_files:
-        # e.g., '2025-01-01'
-        file_date_with_hyphens = extract_date_from_filename(file)
-        # e.g., '20250101'
-        file_date = file_date_with_hyphens.replace("-", "")
-
-        if rerun_dates:
-            # Process only if it's in the rerun list
-            if file_date in rerun_dates:
-                to_process.append((file, file_date))
+    fields = []
+    for field in csv_schema:
+        field_def = (column_defs or {}).get(field.name)
+        if field_def is None:
+            fields.append(pa.field(field.name, pa.string()))
+            continue
+        if field_def.get("dictionary"):
+            field = pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
         else:
-            # Process if we haven't done this date yet
-            if file_date not in processed_dates:
-                to_process.append((file, file_date))
+            field = pa.field(field.name, ARROW_TYPES[field_def["type"].lower()])
+        if field_def.get("renamed_from"):
+            field = field.with_metadata({RENAMED_FROM_KEY: ",".join(field_def["renamed_from"]).encode("utf-8")})
+        fields.append(field)
+    if occ_column(csv_schema, column_defs) is not None:
+        fields.extend(occ_fields(OCC_PREFIX))
+    if column_defs:
+        fields.append(pa.field(QUARANTINE_COLUMN, pa.string()))
+    return fields
+
+
+def out_of_range(candidates, type_name):
+    """
+    Boolean mask of well-formed candidates (see VALUE_PATTERNS) that pyarrow would
+    still refuse to cast: int64 overflow, and dates or times with a month, day,
+    hour, minute, second or UTC offset out of range. Checked over whole arrays so a
+    single bad value never forces a value-by-value parse.
+    """
+    if type_name == "int64":
+        digits = pc.replace_substring_regex(candidates, r"^[+-]?0*", "")
+        length = pc.utf8_length(digits)
+        limit = pc.if_else(pc.starts_with(candidates, "-"), INT64_LIMITS[1], INT64_LIMITS[0])
+        over = pc.or_(pc.greater(length, 19), pc.and_(pc.equal(length, 19), pc.greater(digits, limit)))
+        return pc.fill_null(over, False).to_numpy(zero_copy_only=False)
+    if type_name not in ("date", "timestamp"):
+        return np.zeros(len(candidates), dtype=bool)
+
+    fields = pc.extract_regex(candidates, DATETIME_FIELDS_PATTERN)
+
+    def number(name):
+        text = pc.struct_field(fields, name)
+        text = pc.if_else(pc.equal(text, ""), "0", text)  # Absent optional field
+        return pc.cast(pc.fill_null(text, "0"), pa.int64()).to_numpy(zero_copy_only=False)
+
+    year, month, day = number("year"), number("month"), number("day")
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + ((month == 2) & leap)
+    invalid = (month < 1) | (month > 12) | (day < 1) | (day > month_days)
+    invalid |= (number("hour") > 23) | (number("minute") > 59) | (number("second") > 59)
+    invalid |= (number("offset_hour") > 23) | (number("offset_minute") > 59)
+    return invalid & pc.is_valid(fields).to_numpy(zero_copy_only=False)
+
+
+def cast_or_null(values, arrow_type):
+    """
+    Cast values to arrow_type, nulling whatever still fails. A failing array is split
+    in halves until the offending values are isolated, so a stray value costs a few
+    extra casts rather than one per row.
+    """
+    try:
+        return pc.cast(values, arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        if len(values) == 1:
+            return pa.nulls(1, arrow_type)
+        middle = len(values) // 2
+        return pa.concat_arrays([cast_or_null(values.slice(0, middle), arrow_type),
+                                 cast_or_null(values.slice(middle), arrow_type)])
 
-    print(f"Files to process: {len(to_process)}")
 
-    # 4) For each file, read CSV -> Arrow -> Partitioned Parquet
-    for file, file_date in to_process:
-        print(f"Processing file: {file} with date: {file_date}")
+def parse_column(values, type_name):
+    """
+    Cast a string array to type_name. Empty strings become NULL; values that do not
+    parse (malformed or out of range) also become NULL and are flagged.
 
-        local_file_path = os.path.join(storage.BASE_PATH, bucket_name, bucket_key, file)
+    Returns:
+        (pa.Array, np.ndarray): The typed array and a boolean mask of unparseable values.
+    """
+    values = pc.utf8_trim_whitespace(values)
+    values = pc.if_else(pc.equal(values, ""), pa.scalar(None, pa.string()), values)
+    if type_name in ("int64", "float64"):
+        values = pc.replace_substring(values, ",", "")
+    candidates = pc.if_else(pc.match_substring_regex(values, VALUE_PATTERNS[type_name]), values,
+                            pa.scalar(None, pa.string()))
+    if type_name == "int64":
+        candidates = pc.replace_substring_regex(candidates, r"^\+", "")  # pyarrow rejects '+5'
+    candidates = pc.if_else(out_of_range(candidates, type_name), pa.scalar(None, pa.string()), candidates)
+    if type_name == "timestamp":
+        # Naive timestamps are taken as UTC
+        has_offset = pc.match_substring_regex(candidates, TZ_OFFSET_PATTERN)
+        candidates = pc.if_else(has_offset, candidates, pc.binary_join_element_wise(candidates, "+00:00", ""))
+
+    typed = cast_or_null(candidates, ARROW_TYPES[type_name])
+    bad = pc.and_(pc.is_valid(values), pc.is_null(typed))
+    return typed, bad.to_numpy(zero_copy_only=False)
+
+
+def coerce_batch(batch, column_defs, out_fields):
+    """
+    Apply a source's typed schema to one all-string record batch: typed columns are
+    parsed once here, low-cardinality strings dictionary-encoded, and every row with
+    unparseable values gets them verbatim in the quarantine column as JSON
+    ({column: raw value}); clean rows have NULL there. The OCC symbol column, if
+    any, is decoded here too, so downstream queries never re-parse it.
+    """
+    columns = []
+    bad_rows = np.zeros(batch.num_rows, dtype=bool)
+    rejected = {}
+    for field, out_field in zip(batch.schema, out_fields):
+        values = batch.column(field.name)
+        field_def = column_defs.get(field.name)
+        if field_def is None:
+            columns.append(values)
+        elif field_def["type"].lower() == "string":
+            columns.append(pc.dictionary_encode(values) if field_def.get("dictionary") else values)
+        else:
+            typed, bad = parse_column(values, field_def["type"].lower())
+            columns.append(typed)
+            if bad.any():
+                bad_rows |= bad
+                rejected[field.name] = (bad, values)
+
+    symbol_column = occ_column(batch.schema, column_defs)
+    if symbol_column is not None:
+        columns.extend(parse_occ_symbols(batch.column(symbol_column), OCC_PREFIX).values())
+
+    quarantine = pa.nulls(batch.num_rows, pa.string())
+    if bad_rows.any():
+        # Only the bad rows are converted to Python and scattered back into the column
+        rows = np.flatnonzero(bad_rows)
+        raw = {name: (bad[rows], values.take(pa.array(rows)).to_pylist()) for name, (bad, values) in rejected.items()}
+        entries = [json.dumps({name: row_values[i] for name, (row_bad, row_values) in raw.items() if row_bad[i]})
+                   for i in range(len(rows))]
+        quarantine = pc.replace_with_mask(quarantine, pa.array(bad_rows), pa.array(entries, pa.string()))
+    columns.append(quarantine)
+    return pa.RecordBatch.from_arrays(columns, schema=pa.schema(out_fields))
+
+
+def upgrade_legacy_batch(batch, column_defs):
+    """
+    Apply a source's typed schema to a batch of a partition converted before it had
+    one (all strings, no quarantine column): columns are renamed and typed as a fresh
+    conversion would (see coerce_batch), with the OCC columns decoded again, and
+    rowid / file_version_date kept. Other batches are returned unchanged.
+    Used as the convert step of conform_partition (see raw_whales_conform_schema.py).
+    """
+    if not column_defs or QUARANTINE_COLUMN in batch.schema.names:
+        return batch
+    extra_names = [name for name in ("rowid", "file_version_date") if name in batch.schema.names]
+    occ_names = {field.name for field in occ_fields(OCC_PREFIX)}
+    renames = csv_renames(column_defs)
+    source_names = [name for name in batch.schema.names if name not in extra_names and name not in occ_names]
+    if not all(pa.types.is_string(batch.schema.field(name).type) for name in source_names):
+        return batch
+    source = pa.RecordBatch.from_arrays([batch.column(name) for name in source_names],
+                                        names=[renames.get(name, name) for name in source_names])
+    typed = coerce_batch(source, column_defs, build_output_fields(source.schema, column_defs))
+    return pa.RecordBatch.from_arrays(typed.columns + [batch.column(name) for name in extra_names],
+                                      names=typed.schema.names + extra_names)
+
+
+def add_batch_columns(batch, file_date, row_offset):
+    """
+    Add two columns to one record batch:
+     - rowid: a sequential ID continuing from row_offset (like Spark's monotonically_increasing_id)
+     - file_version_date: the partition date (e.g. '20250101')
+    """
+    num_rows = batch.num_rows
+    rowid_array = pa.array(np.arange(row_offset, row_offset + num_rows, dtype=np.int64))
+    fvd_array = pa.repeat(pa.scalar(file_date, pa.string()), num_rows)
+    return pa.RecordBatch.from_arrays(
+        batch.columns + [rowid_array, fvd_array],
+        names=batch.schema.names + ["rowid", "file_version_date"]
+    )
 
-        # Read CSV with forced string columns
-        arrow_table = read_csv_as_all_strings(local_file_path)
-        # Add rowid & file_version_date
-        arrow_table = add_columns(arrow_table, file_date)
 
-        # Create partition subdirectory (e.g. /.../file_version_date=20250101)
-        partition_dir = os.path.join(parquet_path, f"file_version_date={file_date}")
-        os.makedirs(partition_dir, exist_ok=True)
+def stream_csv_to_parquet(stream, out_dir, base_name, file_date, bucketing=None, memory_bytes=STREAM_MEMORY_BYTES,
+                          column_defs=None, clustering=None, catalog=None, dataset_path=None):
+    """
+    Convert one CSV (an open binary stream: a file or a zip member) to Parquet in
+    out_dir without ever holding the whole file: PyArrow's incremental CSV reader
+    parses it block by block (ALL columns as strings, bypassing type-inference issues),
+    the source's typed schema is applied (see coerce_batch) and every batch is
+    written as soon as it is parsed.
+
+    Memory: the reader keeps a few blocks of memory_bytes / 8 in flight, and bucketed
+    output buffers at most memory_bytes / 2 before flushing, so peak memory follows
+    memory_bytes rather than the file size.
+
+    With clustering, every row group is sorted on the clustering keys as it is
+    written, with page indexes and bloom filters (see ClusteredParquetWriter), so the
+    memory bound holds for clustered sources too.
+
+    Header columns of an older export are renamed to their current names (see
+    csv_renames). With a catalog and dataset_path, the file's columns are folded into
+    the dataset's latest registered schema (PartitionCatalog.unify_schema) and every
+    batch is projected onto it (columns this file lacks become nulls), so all files
+    share one schema. Registering it is left to the caller, once the partition is
+    committed (see convert_unit).
+
+    Parameters:
+        stream: Binary file object positioned at the header line.
+        out_dir (str): Directory to write into, usually a partition_commit temp dir.
+        base_name (str): Output name, '<base_name>.parquet' or '<base_name>-bucket-NNNN.parquet'.
+        file_date (str): Partition date, e.g. '20250101'.
+        bucketing (tuple): (column, num_buckets) from bucketing_for, or None for one file.
+        memory_bytes (int): Peak memory budget.
+        column_defs (dict): Typed schema of the source ({column: field_def}, see
+            load_raw_schemas). None keeps every column a string.
+        clustering (tuple): (sort columns, bloom filter columns) from clustering_for, or None.
+        catalog (PartitionCatalog): Catalog holding the schema registry, or None to skip it.
+        dataset_path (str): Dataset root the file is written to (its registry key).
+
+    Returns:
+        int: Number of rows written.
+    """
+    # 1. Read the header line and let the Arrow CSV parser split it (quoted names may hold
+    #    commas or quotes), then parse the rest of the stream with those names
+    parse_options = pacsv.ParseOptions(delimiter=",", quote_char='"')
+    renames = csv_renames(column_defs)
+    header = pacsv.open_csv(io.BytesIO(stream.readline()), parse_options=parse_options).schema.names
+    column_names = [renames.get(name, name) for name in header]
+    reader = pacsv.open_csv(
+        stream,
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=max(1 << 20, memory_bytes // 8),
+                                       column_names=column_names),
+        parse_options=parse_options,
+        convert_options=pacsv.ConvertOptions(column_types={col: pa.string() for col in column_names})
+    )
+    out_fields = build_output_fields(reader.schema, column_defs)
+    out_schema = pa.schema(
+        out_fields + [pa.field("rowid", pa.int64()), pa.field("file_version_date", pa.string())]
+    )
+    registered = catalog is not None and dataset_path is not None
+    if registered:
+        out_schema = catalog.unify_schema(dataset_path, out_schema)
+
+    # 2. Write batch by batch, to one file or one file per symbol bucket
+    if bucketing is not None:
+        writer = BucketedParquetWriter(out_dir, base_name, *bucketing, out_schema,
+                                       max_buffer_bytes=memory_bytes // 2, profile=RAW_PROFILE, clustering=clustering)
+    elif clustering is not None:
+        writer = ClusteredParquetWriter(os.path.join(out_dir, f"{base_name}.parquet"), out_schema, clustering,
+                                        RAW_PROFILE)
+    else:
+        writer = ProfiledParquetWriter(os.path.join(out_dir, f"{base_name}.parquet"), out_schema, RAW_PROFILE)
+
+    row_count = 0
+    with writer:
+        for batch in reader:
+            if column_defs:
+                batch = coerce_batch(batch, column_defs, out_fields)
+            num_rows = batch.num_rows
+            batch = add_batch_columns(batch, file_date, row_count)
+            if registered:
+                batch = project_to_schema(batch, out_schema)
+            writer.write_batch(batch)
+            row_count += num_rows
+    return row_count
+
+
+def stream_zip_member_to_parquet(zip_path, member, out_dir, base_name, file_date, bucketing=None,
+                                 memory_bytes=STREAM_MEMORY_BYTES, column_defs=None, clustering=None,
+                                 catalog=None, dataset_path=None):
+    """
+    Stream one CSV member of a zip straight into Parquet: the member is decompressed
+    on the fly, so the extracted CSV never touches the disk.
+    Returns the number of rows written.
+    """
+    with zipfile.ZipFile(zip_path, 'r') as zf:
+        with zf.open(member) as f:
+            return stream_csv_to_parquet(f, out_dir, base_name, file_date, bucketing, memory_bytes, column_defs,
+                                         clustering, catalog=catalog, dataset_path=dataset_path)
 
-        # Create a Parquet filename for this CSV
-        # e.g. "bot-eod-report-2024-08-23.parquet" or something unique
-        base_name = source_dir
-        out_file = os.path.join(partition_dir, f"{base_name}.parquet")
 
-        # Write the Parquet file (overwrite if it already exists)
-        pq.write_table(arrow_table, out_file, compression="snappy")
-        print(f"Wrote Parquet: {out_file}")
+# ------------------------------------------------------------------------------
+# PARALLEL DRIVER
+# ------------------------------------------------------------------------------
+class IngestStatus:
+    """
+    Per-unit status of raw conversions, one row per (source_dir, file_date), kept in
+    a small SQLite file next to the buckets: pending -> done | failed, with the
+    input size, rows written, duration and the last error.
+    """
+    DB_NAME = "_whales_ingest.db"
+
+    def __init__(self, db_path=None):
+        self.db_path = str(db_path or os.path.join(LocalS3WithDirectory.BASE_PATH, self.DB_NAME))
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_units (
+                    source_dir TEXT NOT NULL,
+                    file_date TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    size_bytes INTEGER,
+                    rows INTEGER,
+                    seconds REAL,
+                    error TEXT,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (source_dir, file_date)
+                )""")
+
+    def mark(self, unit, status, rows=None, seconds=None, error=None):
+        with sqlite_transaction(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ingest_units VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (unit["source_dir"], unit["file_date"], status, unit["size"], rows, seconds, error,
+                 datetime.now().isoformat(timespec="seconds"))
+            )
 
-        # 5) Move the ZIP to archive
-        move_zip_file_to_archive(source_path, file)
+    def list_units(self, status=None):
+        """
+        Return [(source_dir, file_date, status, size_bytes, rows, seconds, error, updated_at)].
+        """
+        with sqlite_transaction(self.db_path) as conn:
+            if status is None:
+                return conn.execute("SELECT * FROM ingest_units ORDER BY source_dir, file_date").fetchall()
+            return conn.execute("SELECT * FROM ingest_units WHERE status = ? ORDER BY source_dir, file_date",
+                                (status,)).fetchall()
 
-        # 6) Remove the CSV file
-        if os.path.exists(local_file_path):
-            os.remove(local_file_path)
-            print(f"Removed CSV file: {local_file_path}")
+
+def pending_units(storage, source_dir, source_root=SOURCE_ROOT, ingest_mode="csv", rerun_dates=None):
+    """
+    The (source_dir, file_date) units of one source still to convert (or those in
+    rerun_dates), each a dict with its input (extracted CSV or zip member) and size
+    in bytes (uncompressed for zip members).
+    """
+    source_path = os.path.join(source_root, source_dir)
+    bucket_name = "raw_store"
+    bucket_key = os.path.join("whales", source_dir, "csv")
+    parquet_path = os.path.join(storage.BASE_PATH, bucket_name, "whales", source_dir, "parquet")
+    processed_dates = get_parquet_partitions(storage, parquet_path)
+
+    def wanted(file_date):
+        return file_date in rerun_dates if rerun_dates else file_date not in processed_dates
+
+    units = []
+    base = {"source_dir": source_dir, "source_path": source_path, "parquet_path": parquet_path}
+    if ingest_mode == "zip":
+        zip_files = sorted(f for f in os.listdir(source_path) if f.endswith(".zip")) if os.path.isdir(source_path) else []
+        for zip_name in zip_files:
+            zip_path = os.path.join(source_path, zip_name)
+            sizes = storage.zip_index.member_sizes(zip_path)
+            for member in (m for m in sizes if m.endswith(".csv")):
+                file_date = extract_date_from_filename(os.path.basename(member)).replace("-", "")
+                if wanted(file_date):
+                    units.append(dict(base, file_date=file_date, zip_path=zip_path, member=member, size=sizes[member]))
+    else:
+        for file in list_csv_files(storage, bucket_name, bucket_key):
+            file_date = extract_date_from_filename(file).replace("-", "")
+            if wanted(file_date):
+                csv_path = os.path.join(storage.BASE_PATH, bucket_name, bucket_key, file)
+                units.append(dict(base, file_date=file_date, csv_file=file, csv_path=csv_path,
+                                  size=os.path.getsize(csv_path)))
+    return units
 
 
-def rerun_files(storage, bucket_name, bucket_key, parquet_path, source_path, source_dir, rerun_dates ):
+def converted_zips(storage, source_dir, source_root=SOURCE_ROOT):
     """
-    Remove existing Parquet partitions for specified dates and reprocess them.
+    Zips of one source (zip mode) whose CSV members were all converted in earlier
+    runs: nothing is left to do with them but archive them.
     """
-    print(f"Re-running for dates: {rerun_dates}")
-    for date in rerun_dates:
-        date_dir = os.path.join(parquet_path, f"file_version_date={date}")
-        if os.path.exists(date_dir):
-            shutil.rmtree(date_dir)
-            print(f"Removed existing parquet data for date: {date}")
+    source_path = os.path.join(source_root, source_dir)
+    if not os.path.isdir(source_path):
+        return []
+    parquet_path = os.path.join(storage.BASE_PATH, "raw_store", "whales", source_dir, "parquet")
+    processed_dates = get_parquet_partitions(storage, parquet_path)
+    done = []
+    for zip_name in sorted(f for f in os.listdir(source_path) if f.endswith(".zip")):
+        zip_path = os.path.join(source_path, zip_name)
+        members = [m for m in storage.zip_index.members(zip_path) if m.endswith(".csv")]
+        if members and all(extract_date_from_filename(os.path.basename(m)).replace("-", "") in processed_dates
+                           for m in members):
+            done.append(zip_path)
+    return done
+
+
+def archive_zip(storage, zip_path):
+    """Move a source zip into the 'archive' folder next to it, keeping the zip index in step."""
+    archive_dir = os.path.join(os.path.dirname(zip_path), "archive")
+    os.makedirs(archive_dir, exist_ok=True)
+    archive_path = os.path.join(archive_dir, os.path.basename(zip_path))
+    shutil.move(zip_path, archive_path)
+    storage.zip_index.relocate(zip_path, archive_path)
+    print(f"Moved ZIP file to archive: {zip_path} -> {archive_dir}")
 
-    # After removing old data, we reprocess the CSVs for these dates
-    process_csv_files(storage, bucket_name, bucket_key, parquet_path, source_path, source_dir, rerun_dates)
+
+def _init_worker(threads_per_worker):
+    """
+    Cap the Arrow thread pools of a worker process, so workers x threads stays within the CPU budget.
+    """
+    pa.set_cpu_count(threads_per_worker)
+    pa.set_io_thread_count(threads_per_worker)
+
+
+def convert_unit(unit, memory_bytes, column_defs, catalog_path):
+    """
+    Convert one (source_dir, file_date) unit into its partition (runs in a worker process).
+    The partition's schema is registered once it is committed, so a failed conversion
+    never leaves a schema version behind.
+    Returns (rows, seconds).
+    """
+    start = time.perf_counter()
+    parquet_path = unit["parquet_path"]
+    bucketing = bucketing_for(parquet_path)
+    clustering = clustering_for(parquet_path)
+    catalog = PartitionCatalog(catalog_path)
+    with partition_commit(parquet_path, unit["file_date"], catalog=catalog) as tmp_dir:
+        if "member" in unit:
+            rows = stream_zip_member_to_parquet(unit["zip_path"], unit["member"], tmp_dir, unit["source_dir"],
+                                                unit["file_date"], bucketing, memory_bytes, column_defs, clustering,
+                                                catalog=catalog, dataset_path=parquet_path)
+        else:
+            with open(unit["csv_path"], "rb") as f:
+                rows = stream_csv_to_parquet(f, tmp_dir, unit["source_dir"], unit["file_date"], bucketing,
+                                             memory_bytes, column_defs, clustering, catalog=catalog,
+                                             dataset_path=parquet_path)
+    files = partition_files(os.path.join(parquet_path, f"file_version_date={unit['file_date']}"))
+    if files:
+        catalog.register_schema(parquet_path, pq.read_schema(files[0]), unit["file_date"])
+    return rows, time.perf_counter() - start
+
+
+def run_parallel(storage, source_dirs, source_root=SOURCE_ROOT, ingest_mode="csv", max_cpus=None, threads_per_worker=2,
+                 memory_bytes=STREAM_MEMORY_BYTES, raw_schemas=None, rerun_dates=None):
+    """
+    Convert every pending (source_dir, file_date) unit of all sources in a process
+    pool. Units are scheduled biggest first, so the large optiontrades days start
+    early instead of finishing last. At most max_cpus // threads_per_worker workers run,
+    each with its Arrow thread pools capped at threads_per_worker and its memory
+    at memory_bytes. Every unit's outcome is recorded in IngestStatus.
+
+    After a CSV unit succeeds its zip is archived and the CSV removed. A zip in zip
+    mode is archived once all of its pending members succeeded, or up front when an
+    earlier run already converted them all.
+
+    Returns:
+        dict: {'done': n, 'failed': [(source_dir, file_date, error), ...], 'seconds': wall time}
+    """
+    start = time.perf_counter()
+    raw_schemas = raw_schemas or {}
+    if ingest_mode == "zip" and not rerun_dates:
+        # Zips fully converted by an earlier run would otherwise be rescanned on every run
+        for source_dir in source_dirs:
+            for zip_path in converted_zips(storage, source_dir, source_root):
+                archive_zip(storage, zip_path)
+    units = [unit for source_dir in source_dirs
+             for unit in pending_units(storage, source_dir, source_root, ingest_mode, rerun_dates)]
+    units.sort(key=lambda unit: unit["size"], reverse=True)
+    result = {"done": 0, "failed": [], "seconds": 0.0}
+    if not units:
+        print("No pending units")
+        return result
+
+    max_cpus = max_cpus or os.cpu_count() or 1
+    max_workers = max(1, min(len(units), max_cpus // threads_per_worker))
+    print(f"Converting {len(units)} unit(s), {sum(u['size'] for u in units) / (1 << 30):.1f} GiB, "
+          f"with {max_workers} worker(s) x {threads_per_worker} thread(s)")
+
+    status = IngestStatus(os.path.join(storage.BASE_PATH, IngestStatus.DB_NAME))
+    for unit in units:
+        status.mark(unit, "pending")
+
+    failed_zips = set()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(threads_per_worker,)) as executor:
+        futures = {
+            executor.submit(convert_unit, unit, memory_bytes, raw_schemas.get(unit["source_dir"]),
+                            storage.catalog.db_path): unit
+            for unit in units
+        }
+        for future in as_completed(futures):
+            unit = futures[future]
+            label = f"{unit['source_dir']} {unit['file_date']}"
+            try:
+                rows, seconds = future.result()
+            except Exception as e:
+                print(f"Failed {label}: {e}")
+                status.mark(unit, "failed", error=str(e))
+                result["failed"].append((unit["source_dir"], unit["file_date"], str(e)))
+                failed_zips.add(unit.get("zip_path"))
+                continue
+
+            status.mark(unit, "done", rows=rows, seconds=round(seconds, 3))
+            result["done"] += 1
+            print(f"Wrote {label}: {rows} rows in {seconds:.1f}s")
+            if "csv_path" in unit:
+                move_zip_file_to_archive(storage, unit["source_path"], unit["csv_file"])
+                if os.path.exists(unit["csv_path"]):
+                    os.remove(unit["csv_path"])
+                    print(f"Removed CSV file: {unit['csv_path']}")
+
+    # Zip mode: archive each zip whose members all converted
+    for zip_path in sorted({unit["zip_path"] for unit in units if "zip_path" in unit} - failed_zips):
+        archive_zip(storage, zip_path)
+
+    result["seconds"] = time.perf_counter() - start
+    print(f"Converted {result['done']} unit(s), {len(result['failed'])} failed, in {result['seconds']:.1f}s")
+    return result
 
 
 if __name__ == "__main__":
@@ -202,30 +661,36 @@ if __name__ == "__main__":
     # 2) List of source directories
     source_dirs = ["darkpool", "hotchains", "oichanges", "optiontrades", "optionscreener"]
 
-    try:
-        # 3) Iterate through each source directory
-        for source_dir in source_dirs:
-            source_path = rf"R:\daily_options_history\{source_dir}"
-
-            bucket_name = "raw_store"
-            bucket_key = f"whales\\{source_dir}\\csv"
-            parquet_key = f"whales\\{source_dir}\\parquet"
-            parquet_path = os.path.join(storage.BASE_PATH, bucket_name, parquet_key)
-
-            # Process unprocessed data
-            process_csv_files(
-                storage=storage,
-                bucket_name=bucket_name,
-                bucket_key=bucket_key,
-                parquet_path=parquet_path,
-                source_path=source_path,
-                source_dir=source_dir
-            )
+    # "csv": convert CSVs extracted by raw_whales_extract_csv.py
+    # "zip": stream CSV members straight out of the source zips (no extracted CSVs)
+    ingest_mode = "csv"
+
+    # Peak memory of one CSV -> Parquet conversion (e.g. 256 << 20 on a small machine)
+    memory_bytes = STREAM_MEMORY_BYTES
 
-            # Example: re-run a specific date
-            # rerun_dates = ["20250101"]
-            # rerun_files(storage, bucket_name, bucket_key, parquet_path, source_path, rerun_dates, source_dir)
+    # Typed schema per source (sources without one stay all-string)
+    raw_schemas = load_raw_schemas()
 
+    # Parallel conversion: (source, date) units spread over max_cpus // threads_per_worker
+    # worker processes. Peak memory is about workers x memory_bytes.
+    max_cpus = os.cpu_count()
+    threads_per_worker = 2
+
+    # Dates to reprocess (None converts only new dates), e.g. ["20250101"]
+    rerun_dates = None
+
+    try:
+        # 3) Convert all sources in parallel
+        run_parallel(
+            storage=storage,
+            source_dirs=source_dirs,
+            ingest_mode=ingest_mode,
+            max_cpus=max_cpus,
+            threads_per_worker=threads_per_worker,
+            memory_bytes=memory_bytes,
+            raw_schemas=raw_schemas,
+            rerun_dates=rerun_dates
+        )
     except Exception as e:
         print(f"An error occurred: {e}")
     finally:
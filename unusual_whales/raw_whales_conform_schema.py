@@ -0,0 +1,54 @@
+import os
+from functools import partial
+
+from tradeovant.imports.common_utils import LocalS3WithDirectory, conform_dataset
+from tradeovant.unusual_whales.raw_whales_build_parquet import RAW_PROFILE, load_raw_schemas, upgrade_legacy_batch
+
+
+def conform_sources(storage, source_dirs, raw_schemas=None, include_unversioned=False):
+    """
+    Rewrite the raw partitions whose columns lag their source's latest registered
+    schema (an export added or renamed a column), so wide scans read a single schema.
+    Runs apart from raw_whales_build_parquet.py: conversions only register schemas,
+    and this job brings the partitions that are behind up to date, one row group at a
+    time (see conform_partition).
+
+    With include_unversioned, partitions converted before the schema registry existed
+    are rewritten too (a one-off that may touch the whole history); those written
+    all-string before their source had a typed schema are typed on the way (see
+    upgrade_legacy_batch), which also adds their OCC columns.
+
+    Returns:
+        dict: {source_dir: {'conformed': [...], 'errors': [...]}}
+    """
+    raw_schemas = raw_schemas or {}
+    results = {}
+    for source_dir in source_dirs:
+        parquet_path = os.path.join(storage.BASE_PATH, "raw_store", "whales", source_dir, "parquet")
+        results[source_dir] = conform_dataset(
+            parquet_path, catalog=storage.catalog, include_unversioned=include_unversioned, profile=RAW_PROFILE,
+            convert=partial(upgrade_legacy_batch, column_defs=raw_schemas.get(source_dir))
+        )
+    return results
+
+
+if __name__ == "__main__":
+
+    # 1) Initialize local S3-like storage
+    storage = LocalS3WithDirectory()
+
+    # 2) Sources to conform
+    source_dirs = ["darkpool", "hotchains", "oichanges", "optiontrades", "optionscreener"]
+
+    # Also rewrite the partitions converted before the schema registry existed
+    # (one-off; may touch the whole history)
+    include_unversioned = False
+
+    try:
+        # 3) Rewrite the partitions behind their source's latest schema
+        conform_sources(storage, source_dirs, load_raw_schemas(), include_unversioned)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    finally:
+        # 4) Stop the storage service if needed
+        storage.stop()
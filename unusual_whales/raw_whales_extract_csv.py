@@ -7,7 +7,8 @@ if __name__ == "__main__":
     # List of source directories
     source_dirs = ["darkpool", "hotchains", "oichanges", "optiontrades", "optionscreener"]
 
-    # Iterate through the directories
+    # Build one extraction job per directory
+    jobs = []
     for source_dir in source_dirs:
         # Define the source path dynamically
         source_path = rf"R:\daily_options_history\{source_dir}"
@@ -16,9 +17,11 @@ if __name__ == "__main__":
         target_bucket = "raw_store"
         target_key = f"whales\\{source_dir}\\csv"
 
-        # Fetch and extract files for the current directory
-        print(f"Processing: {source_path} -> {target_bucket}/{target_key}")
-        storage.fetch_and_extract(source_path, target_bucket, target_key)
+        print(f"Queued: {source_path} -> {target_bucket}/{target_key}")
+        jobs.append((source_path, target_bucket, target_key))
+
+    # Extract all directories in parallel (one process pool across every drop)
+    storage.fetch_and_extract_many(jobs, max_workers=storage.EXTRACT_WORKERS)
 
     # Stop the service
     storage.stop()
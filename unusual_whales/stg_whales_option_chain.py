@@ -1,22 +1,96 @@
 import duckdb
-import pyarrow.parquet as pq
 import os
 import yaml
 import logging
+import pyarrow.parquet as pq
+from tradeovant.imports.common_utils import (
+    PartitionCatalog, bucket_file_name, bucket_glob, bucketing_for, partition_buckets, partition_commit, partition_files,
+    run_per_bucket, write_bucketed, write_parquet
+)
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def list_partitions(base_dir, partition_column="file_version_date"):
-    """List partition values (e.g., '20250228') from directories like 'file_version_date=20250228'."""
-    if not os.path.exists(base_dir):
-        logging.warning(f"Directory does not exist: {base_dir}")
-        return []
-    partitions = []
-    for entry in os.listdir(base_dir):
-        if entry.startswith(f"{partition_column}="):
-            partitions.append(entry.split("=")[1])
-    return sorted(partitions)
+
+# SQL of the {occ_expiry} / {occ_option_type} placeholders of the chain SQL: the
+# columns decoded at ingest, or option_symbol decoded with substring() for partitions
+# converted before they existed
+OCC_EXPRESSIONS = {
+    "occ_expiry": ("year(occ_expiry) * 10000 + month(occ_expiry) * 100 + day(occ_expiry)",
+                   "try_cast('20'||substring(option_symbol, length(underlying_symbol)+1, 6) as int)"),
+    "occ_option_type": ("occ_option_type",
+                        "substring(option_symbol, length(underlying_symbol)+7, 1)"),
+}
+
+
+def source_base_path(source):
+    """Dataset root of a source glob, e.g. R:\\...\\parquet\\*\\*.parquet -> R:\\...\\parquet."""
+    return source.split('*')[0].rstrip('\\')
+
+
+def partition_sources(ds_config, partition_val, partition_column, bucket=None):
+    """
+    Source globs of the dataset SQL narrowed to one partition, or to one symbol
+    bucket of it. DuckDB binds columns on the first file a glob matches, so a glob
+    over the whole history would fail on columns older partitions lack (occ_*).
+    """
+    sources = {}
+    for name, source in ds_config['sources'].items():
+        base = source_base_path(source)
+        if bucket is None:
+            sources[name] = os.path.join(base, f"{partition_column}={partition_val}", "*.parquet")
+        else:
+            sources[name] = bucket_glob(base, bucket, partition_val, partition_column)
+    return sources
+
+
+def run_sql(sql, threads=None):
+    """Run one query in its own in-memory DuckDB connection and return an Arrow table."""
+    conn = duckdb.connect()
+    try:
+        if threads:
+            conn.execute(f"SET threads = {threads}")
+        return conn.execute(sql).arrow()
+    finally:
+        conn.close()
+
+
+def bucket_local_sources(ds_config, partition_val, partition_column, target_bucketing):
+    """
+    True when every source partition is split into the same symbol buckets as the
+    target, so the chain SQL (joins and windows all keyed by underlying_symbol) can
+    run bucket by bucket.
+    """
+    if target_bucketing is None:
+        return False
+    for source in ds_config['sources'].values():
+        base = source_base_path(source)
+        if bucketing_for(base) != target_bucketing:
+            return False
+        buckets = partition_buckets(os.path.join(base, f"{partition_column}={partition_val}"))
+        if buckets is None or len(buckets) != target_bucketing[1]:
+            return False
+    return True
+
+
+def occ_expressions(ds_config, partition_val, partition_column):
+    """
+    Values of the OCC placeholders of the dataset SQL for one partition (see
+    OCC_EXPRESSIONS): the decoded column when every file of the occ_source partition
+    has it, checked on the file footers, else the substring() decode.
+    """
+    if 'occ_source' not in ds_config:
+        return {}
+    base = source_base_path(ds_config['sources'][ds_config['occ_source']])
+    partition_dir = os.path.join(base, f"{partition_column}={partition_val}")
+    files = partition_files(partition_dir) if os.path.isdir(partition_dir) else []
+    file_columns = [set(pq.read_schema(path).names) for path in files]
+    expressions = {}
+    for column, (decoded_sql, substring_sql) in OCC_EXPRESSIONS.items():
+        decoded = bool(file_columns) and all(column in names for names in file_columns)
+        expressions[column] = decoded_sql if decoded else substring_sql
+    return expressions
+
 
 def process_partitions(config_file='whales_stg_option_chains.yaml', rerun_partitions = None):
     """Process partitioned datasets based on YAML config."""
@@ -34,6 +108,8 @@ def process_partitions(config_file='whales_stg_option_chains.yaml', rerun_partit
         logging.error("No datasets found in configuration.")
         return
 
+    catalog = PartitionCatalog()
+
     for dataset_name, ds_config in datasets.items():
         if ds_config.get('type') != 'partitioned':
             logging.info(f"Skipping non-partitioned dataset: {dataset_name}")
@@ -44,11 +120,12 @@ def process_partitions(config_file='whales_stg_option_chains.yaml', rerun_partit
         partition_column = ds_config.get('partition_column', 'file_version_date')
         target_base = ds_config['target']
         # Use the first source path to list partitions (assumes consistent partitioning)
-        source_base = list(ds_config['sources'].values())[0].split('*')[0].rstrip('\\')
+        source_base = source_base_path(list(ds_config['sources'].values())[0])
+        target_bucketing = bucketing_for(target_base)
 
-        # Get source and target partitions
-        source_partitions = list_partitions(source_base, partition_column)
-        target_partitions = list_partitions(target_base, partition_column)
+        # Get source and target partitions from the catalog
+        source_partitions = catalog.list_partitions(source_base, partition_column)
+        target_partitions = catalog.list_partitions(target_base, partition_column)
 
         # Determine partitions to process
         if rerun_partitions:
@@ -60,21 +137,32 @@ def process_partitions(config_file='whales_stg_option_chains.yaml', rerun_partit
 
         for partition_val in partitions_to_process:
             try:
-                # Format SQL with source paths and partition value
-                sql = ds_config['sql'].format(**ds_config['sources'], partition_val=partition_val)
-
-                # Execute SQL with DuckDB
-                conn = duckdb.connect()
-                result = conn.execute(sql).arrow()
-                conn.close()
-
-                # Write to target partition
-                target_dir = os.path.join(target_base, f"{partition_column}={partition_val}")
-                os.makedirs(target_dir, exist_ok=True)
-                output_file = os.path.join(target_dir, "optionchains.parquet")
-                pq.write_table(result, output_file, compression='gzip', row_group_size=1000)
-
-                logging.info(f"Processed partition {partition_val} to {output_file}")
+                occ = occ_expressions(ds_config, partition_val, partition_column)
+                with partition_commit(target_base, partition_val, partition_column, catalog=catalog) as tmp_dir:
+                    if bucket_local_sources(ds_config, partition_val, partition_column, target_bucketing):
+                        # One query per symbol bucket, each reading only that bucket's source files
+                        def run_bucket(bucket):
+                            sources = partition_sources(ds_config, partition_val, partition_column, bucket)
+                            return run_sql(ds_config['sql'].format(**sources, **occ, partition_val=partition_val),
+                                           threads=1)
+
+                        results = run_per_bucket(run_bucket, target_bucketing[1], max_workers=os.cpu_count())
+                        for bucket, result in sorted(results.items()):
+                            write_parquet(result, os.path.join(tmp_dir, bucket_file_name("optionchains", bucket)),
+                                          profile='stage_balanced')
+                    else:
+                        # Format SQL with the partition's source paths and partition value
+                        sources = partition_sources(ds_config, partition_val, partition_column)
+                        sql = ds_config['sql'].format(**sources, **occ, partition_val=partition_val)
+                        result = run_sql(sql)
+                        if target_bucketing is not None:
+                            write_bucketed(result, tmp_dir, "optionchains", *target_bucketing,
+                                           profile='stage_balanced')
+                        else:
+                            write_parquet(result, os.path.join(tmp_dir, "optionchains.parquet"), profile='stage_balanced')
+                output_dir = os.path.join(target_base, f"{partition_column}={partition_val}")
+
+                logging.info(f"Processed partition {partition_val} to {output_dir}")
             except Exception as e:
                 logging.error(f"Error processing partition {partition_val}: {e}")
 
@@ -1,23 +1,12 @@
 import duckdb
-import pyarrow.parquet as pq
 import os
 import yaml
 import logging
+from tradeovant.imports.common_utils import PartitionCatalog, partition_commit, write_parquet
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def list_partitions(base_dir, partition_column="file_version_date"):
-    """List partition values (e.g., '20250228') from directories like 'file_version_date=20250228'."""
-    if not os.path.exists(base_dir):
-        logging.warning(f"Directory does not exist: {base_dir}")
-        return []
-    partitions = []
-    for entry in os.listdir(base_dir):
-        if entry.startswith(f"{partition_column}="):
-            partitions.append(entry.split("=")[1])
-    return sorted(partitions)
-
 def process_partitions(config_file='whales_stg_option_screener.yaml', rerun_partitions=None):
     """Process partitioned datasets based on YAML config."""
     # Load YAML configuration
@@ -34,6 +23,8 @@ def process_partitions(config_file='whales_stg_option_screener.yaml', rerun_part
         logging.error("No datasets found in configuration.")
         return
 
+    catalog = PartitionCatalog()
+
     for dataset_name, ds_config in datasets.items():
         if ds_config.get('type') != 'partitioned':
             logging.info(f"Skipping non-partitioned dataset: {dataset_name}")
@@ -46,9 +37,9 @@ def process_partitions(config_file='whales_stg_option_screener.yaml', rerun_part
         # Use the first source path to list partitions (assumes consistent partitioning)
         source_base = list(ds_config['sources'].values())[0].split('*')[0].rstrip('\\')
 
-        # Get source and target partitions
-        source_partitions = list_partitions(source_base, partition_column)
-        target_partitions = list_partitions(target_base, partition_column)
+        # Get source and target partitions from the catalog
+        source_partitions = catalog.list_partitions(source_base, partition_column)
+        target_partitions = catalog.list_partitions(target_base, partition_column)
 
         # Determine partitions to process
         if rerun_partitions:
@@ -68,11 +59,10 @@ def process_partitions(config_file='whales_stg_option_screener.yaml', rerun_part
                 result = conn.execute(sql).arrow()
                 conn.close()
 
-                # Write to target partition
-                target_dir = os.path.join(target_base, f"{partition_column}={partition_val}")
-                os.makedirs(target_dir, exist_ok=True)
-                output_file = os.path.join(target_dir, "optionscreener.parquet")
-                pq.write_table(result, output_file, compression='snappy')
+                # Commit to target partition (temp dir + atomic rename)
+                with partition_commit(target_base, partition_val, partition_column, catalog=catalog) as tmp_dir:
+                    write_parquet(result, os.path.join(tmp_dir, "optionscreener.parquet"), profile='stage_balanced')
+                output_file = os.path.join(target_base, f"{partition_column}={partition_val}", "optionscreener.parquet")
 
                 logging.info(f"Processed partition {partition_val} to {output_file}")
             except Exception as e:
@@ -1,42 +1,16 @@
 import os
-import glob
 import logging
-import shutil
 import yaml
 import duckdb
-import pyarrow.parquet as pq
-from tradeovant.imports.common_utils import LocalS3WithDirectory
+from tradeovant.imports.common_utils import (
+    LocalS3WithDirectory, bucket_file_name, bucketing_for, clustering_for, group_bucket_files, partition_commit,
+    run_per_bucket, storage_location, write_bucketed, write_clustered
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def list_partitions_in_dir(base_dir, partition_column="file_version_date"):
-    """
-    Return a sorted list of partition values found in `base_dir` as subdirectories like:
-      file_version_date=YYYYMMDD
-    """
-    if not os.path.exists(base_dir):
-        return []
-    partitions = []
-    for entry in os.listdir(base_dir):
-        # Expect subdirs named like "file_version_date=20250101"
-        if entry.startswith(f"{partition_column}="):
-            val = entry.split("=")[1]
-            partitions.append(val)
-    return sorted(partitions)
-
-
-def remove_partition_dir(base_dir, partition_val, partition_column="file_version_date"):
-    """
-    Remove an existing partition directory if it exists, e.g.:
-      /base_dir/file_version_date=YYYYMMDD
-    """
-    part_dir = os.path.join(base_dir, f"{partition_column}={partition_val}")
-    if os.path.exists(part_dir):
-        shutil.rmtree(part_dir)
-        logging.info(f"Removed existing partition directory: {part_dir}")
-
-
 def transform_partition_parquet(
+        storage,
         source_path,
         target_path,
         partition_val,
@@ -49,61 +23,92 @@ def transform_partition_parquet(
         file_name
 ):
     """
-    1) Read a single partition (partition_val) from `source_path`.
+    1) Read a single partition (partition_val) from `source_path`
+       (through the storage read cache when the backend is remote).
     2) Load it into DuckDB as 'input_data'.
-    3) Run the query_select to produce a result.
-    4) Write the result to `target_path` as a partitioned Parquet.
+    3) Run the query_select to produce a result, one symbol bucket at a time (in
+       parallel) when source and target are bucketed alike.
+    4) Commit the result to `target_path` as a partition (temp dir + atomic rename),
+       one file per symbol bucket when the target is bucketed, sorted with page
+       indexes and bloom filters on its keys when the target is clustered.
+    5) Record the new partition in the catalog.
     """
 
-    # Partition directory for reading
-    source_partition_dir = os.path.join(source_path, f"{partition_column}={partition_val}")
-    if not os.path.exists(source_partition_dir):
-        logging.warning(f"Source partition dir does not exist: {source_partition_dir}")
-        return
-
-    # Gather all parquet files within the partition folder
-    parquet_files = glob.glob(os.path.join(source_partition_dir, "*.parquet"))
+    # Gather all parquet files within the partition folder (local paths, cached if remote)
+    bucket_name, bucket_key = storage_location(source_path)
+    partition_prefix = f"{bucket_key}/{partition_column}={partition_val}/"
+    parquet_files = storage.cached_paths(bucket_name, partition_prefix, suffix=".parquet")
     if not parquet_files:
-        logging.warning(f"No parquet files found in {source_partition_dir}")
+        logging.warning(f"No parquet files found in {bucket_name}/{partition_prefix}")
         return
 
-    # Connect DuckDB in-memory
-    conn = duckdb.connect()
-    raw_path = rf"{source_path.replace("\\", "/")}/*/*.parquet"
-    presql = f"""
-        CREATE TEMP TABLE temp_options_flow AS
-        SELECT *
-        FROM read_parquet("{raw_path}", hive_partitioning = TRUE)
-        WHERE file_version_date = '{partition_val}';
-        """
-    #print(f"presql is: {presql}" )
-    conn.execute(presql)
-
-    logging.info(f"Processing.. {partition_column}={partition_val}")
-    # Execute the custom SQL
-    #arrow_table = conn.execute(query_select).arrow()
     sql_stmt = f"""{pre_select} from temp_options_flow
                     {pre_grouping} 
                     {core_select}  from temp_options_flow
                     {dataset_join} 
                     {core_grouping}"""
     #print(f"sql statement is : {sql_stmt}")
-    arrow_table = conn.execute(sql_stmt).arrow()
 
-    # Write the result to the target partition path
+    def run_query(paths, threads=None):
+        # Connect DuckDB in-memory
+        conn = duckdb.connect()
+        try:
+            if threads:
+                conn.execute(f"SET threads = {threads}")
+            file_list = ", ".join("'" + path.replace(os.sep, "/") + "'" for path in paths)
+            presql = f"""
+                CREATE TEMP TABLE temp_options_flow AS
+                SELECT *
+                FROM read_parquet([{file_list}], hive_partitioning = TRUE)
+                WHERE file_version_date = '{partition_val}';
+                """
+            conn.execute(presql)
+            return conn.execute(sql_stmt).arrow()
+        finally:
+            conn.close()
+
+    # The query only groups and joins within an option chain, so when the source and
+    # target share the same symbol bucketing each bucket is transformed on its own, in parallel
+    target_bucketing = bucketing_for(target_path)
+    target_clustering = clustering_for(target_path)
+    source_buckets = None
+    if target_bucketing is not None and bucketing_for(source_path) == target_bucketing:
+        source_buckets = group_bucket_files(parquet_files)
+
+    logging.info(f"Processing.. {partition_column}={partition_val}"
+                 + (f" in {target_bucketing[1]} buckets" if source_buckets else ""))
+    target_file = f"stg_{file_name}"
     target_partition_dir = os.path.join(target_path, f"{partition_column}={partition_val}")
-    os.makedirs(target_partition_dir, exist_ok=True)
-    out_file = os.path.join(target_partition_dir, f"stg_{file_name}.parquet")
+    if source_buckets:
+        results = run_per_bucket(lambda b: run_query(source_buckets[b], threads=1) if b in source_buckets else None,
+                                 target_bucketing[1], max_workers=os.cpu_count())
+        schema = next(result.schema for result in results.values() if result is not None)
+        with partition_commit(target_path, partition_val, partition_column, catalog=storage.catalog) as tmp_dir:
+            for bucket, arrow_table in sorted(results.items()):
+                write_clustered(
+                    table=arrow_table if arrow_table is not None else schema.empty_table(),
+                    where=os.path.join(tmp_dir, bucket_file_name(target_file, bucket)),
+                    clustering=target_clustering,
+                    profile="stage_balanced"
+                )
+        logging.info(f"Wrote transformed data to {target_partition_dir}")
+        return
 
-    pq.write_table(
-        table=arrow_table,
-        where=out_file,
-        compression="snappy"
-    )
-    logging.info(f"Wrote transformed data to {out_file}")
+    arrow_table = run_query(parquet_files)
 
-    # Cleanup
-    conn.close()
+    # Write the result to the target partition path (atomically replaces any previous version)
+    with partition_commit(target_path, partition_val, partition_column, catalog=storage.catalog) as tmp_dir:
+        if target_bucketing is not None:
+            write_bucketed(arrow_table, tmp_dir, target_file, *target_bucketing, clustering=target_clustering,
+                           profile="stage_balanced")
+        else:
+            write_clustered(
+                table=arrow_table,
+                where=os.path.join(tmp_dir, f"{target_file}.parquet"),
+                clustering=target_clustering,
+                profile="stage_balanced"
+            )
+    logging.info(f"Wrote transformed data to {target_partition_dir}")
 
 
 def main(rerun_partitions):
@@ -156,9 +161,9 @@ def main(rerun_partitions):
         logging.info(f"Raw path: {raw_path}")
         logging.info(f"Stage path: {stage_path}")
 
-        # List partitions in source (stage) and target (bronze)
-        source_partitions = list_partitions_in_dir(raw_path, partition_column)
-        target_partitions = list_partitions_in_dir(stage_path, partition_column)
+        # List partitions in source (raw) and target (stage) from the catalog
+        source_partitions = storage.catalog.list_partitions(raw_path, partition_column)
+        target_partitions = storage.catalog.list_partitions(stage_path, partition_column)
 
         logging.info(f"Found {len(source_partitions)-len(target_partitions)} partitions in raw for {dataset_name} to be processed...")
 
@@ -168,12 +173,13 @@ def main(rerun_partitions):
             already_in_target = (pval in target_partitions)
 
             # Decide if we should process this partition
+            # (a re-run replaces the old target partition atomically on commit)
             if do_rerun:
-                logging.info(f"Re-run requested for partition={pval}. Removing old data in target.")
-                remove_partition_dir(stage_path, pval, partition_column)
+                logging.info(f"Re-run requested for partition={pval}. Old data in target will be replaced.")
 
             if (not already_in_target) or do_rerun:
                 transform_partition_parquet(
+                    storage=storage,
                     source_path=raw_path,
                     target_path=stage_path,
                     partition_val=pval,